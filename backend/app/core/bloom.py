@@ -0,0 +1,49 @@
+import hashlib
+import math
+import threading
+from typing import Iterable
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings: `in` is never wrong for items
+    that were added, and wrong about new ones at most ~`error_rate` of the
+    time while fewer than `capacity` items are in it (more only raises
+    that rate). Used to answer "definitely not seen" without a database
+    round trip.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _positions(self, item: str):
+        # Double hashing (Kirsch-Mitzenmacher): k positions from one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str):
+        positions = self._positions(item)
+        with self._lock:
+            for position in positions:
+                self._bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def update(self, items: Iterable[str]):
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def clear(self):
+        with self._lock:
+            self._bits = bytearray(len(self._bits))
+            self.count = 0
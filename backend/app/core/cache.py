@@ -0,0 +1,50 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from app.core.metrics import metrics
+
+
+class TTLCache:
+    """
+    Small thread-safe LRU cache whose entries also expire after `ttl_seconds`.
+    Used for hot, cheap-to-lose results (QA answers, entity lookups).
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, name: Optional[str] = None):
+        self.name = name  # reported as the `cache` label in /metrics
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < now:
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                hit = False
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+                hit = True
+        if self.name:
+            metrics.inc("cache_requests_total", cache=self.name, result="hit" if hit else "miss")
+        return item[1] if hit else default
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
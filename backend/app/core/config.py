@@ -1,3 +1,4 @@
+from typing import List, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -7,6 +8,132 @@ class Settings(BaseSettings):
     NEO4J_PASSWORD: str
     GROQ_API_KEY: str
 
+    # Start-up: the server accepts requests at once while Neo4j and the in-memory
+    # indexes warm up in the background (GET /ready); data endpoints wait for that
+    STARTUP_WAIT_SECONDS: float = 30        # ...up to this long, then 503
+    STARTUP_RETRY_MAX_SECONDS: float = 30   # Backoff cap while Neo4j is unreachable
+
+    # Neo4j driver pool / retries
+    NEO4J_DATABASE: Optional[str] = None        # None = server default database
+    NEO4J_MAX_POOL_SIZE: int = 50               # Connections per driver
+    NEO4J_ACQUISITION_TIMEOUT: float = 30.0     # Seconds to wait for a free connection
+    NEO4J_MAX_RETRY_TIME: float = 15.0          # Seconds managed transactions retry transient errors
+
+    # Max rows sent in a single UNWIND statement when flushing graphs to Neo4j
+    NEO4J_WRITE_BATCH_SIZE: int = 500
+
+    # Observability
+    LOG_LEVEL: str = "INFO"
+    SERVER_TIMING_HEADER: bool = False  # Adds a Server-Timing header with per-stage durations
+
+    # LLM gateway (all Groq calls). Budgets, chat priority and 429 pauses are shared
+    # by every process on the host through SQLite in DATA_DIR (off: per process)
+    LLM_BUDGET_SHARED: bool = True
+    GROQ_BASE_URL: Optional[str] = None      # e.g. http://localhost:8900 for fake_llm_server.py
+    LLM_REQUESTS_PER_MINUTE: float = 30        # 0 disables a budget
+    LLM_TOKENS_PER_MINUTE: float = 12000
+    LLM_COMPLETION_TOKENS_ESTIMATE: int = 400  # Expected output size, charged up front
+    LLM_MAX_RETRIES: int = 5
+    LLM_BACKOFF_BASE_SECONDS: float = 1.0
+    LLM_BACKOFF_MAX_SECONDS: float = 60.0
+
+    # Local state (caches, cursors) lives here; mount it as a volume in Docker
+    DATA_DIR: str = "data"
+
+    # RSS feeds to poll (JSON list in .env, e.g. RSS_FEEDS='["https://techcrunch.com/feed/"]')
+    RSS_FEEDS: List[str] = ["https://techcrunch.com/feed/"]
+    FEED_SEEN_IDS_LIMIT: int = 1000  # Entry GUIDs remembered per feed
+
+    # Extraction cache: skips the LLM for article text we've already extracted
+    EXTRACTION_CACHE_ENABLED: bool = True
+    EXTRACTION_CACHE_TTL_HOURS: float = 24 * 7
+    EXTRACTION_CACHE_MAX_ENTRIES: int = 10000
+
+    # Graph backend: "neo4j", or "memory" for a standalone in-process graph
+    # (nothing persisted; handy for tests and running without Docker)
+    GRAPH_BACKEND: str = "neo4j"
+    GRAPH_READ_REPLICA: bool = True  # Serve reads from an in-memory copy kept in sync by the write path
+    EDGE_HISTORY_LIMIT: int = 20     # Sentiment history entries kept per relationship (newest)
+    EDGE_SOURCES_LIMIT: int = 10     # Article urls kept per relationship (newest)
+
+    # Article provenance: Bloom filter in front of the "already ingested?" check
+    ARTICLE_FILTER_CAPACITY: int = 1_000_000
+    ARTICLE_FILTER_ERROR_RATE: float = 0.01
+    ARTICLE_FILTER_REFRESH_SECONDS: float = 60  # Picks up Articles written by other processes
+    CHAT_SOURCES_LIMIT: int = 5                 # Source articles returned with a chat answer
+
+    # Ingestion log: every extraction (before entity resolution) is appended to
+    # zstd segments in DATA_DIR/ingest_log; `python replay_log.py` rebuilds the graph from it
+    INGEST_LOG_ENABLED: bool = True
+    INGEST_LOG_SEGMENT_MB: int = 64         # A new segment file is started past this size
+    INGEST_LOG_COMPRESSION_LEVEL: int = 3
+    REPLAY_BATCH_GRAPHS: int = 1000         # Logged graphs per write transaction during a replay
+
+    # HTTP: ETag / 304 on read endpoints, zstd or gzip for larger bodies
+    HTTP_COMPRESSION_MIN_BYTES: int = 1024  # Smaller bodies aren't worth the CPU
+    HTTP_GZIP_LEVEL: int = 6
+    HTTP_ZSTD_LEVEL: int = 3
+
+    # /graph snapshot cache
+    GRAPH_SNAPSHOT_TTL_SECONDS: float = 300  # Full re-sync interval (picks up out-of-process writes)
+    GRAPH_PAGE_SIZE: int = 2000              # Default links per /graph page
+    GRAPH_MAX_PAGE_SIZE: int = 10000
+
+    # Server-side layout + analytics for /graph (positions, PageRank, communities)
+    LAYOUT_ENABLED: bool = True
+    LAYOUT_REFRESH_SECONDS: float = 30     # How often the layout job checks for graph changes
+    LAYOUT_ITERATIONS: int = 200           # Force iterations for a layout from scratch
+    LAYOUT_INCREMENTAL_ITERATIONS: int = 40  # ...and after a warm start
+    LAYOUT_EXACT_MAX_NODES: int = 2000     # Above this, repulsion is computed against a sample
+    LAYOUT_REPULSION_SAMPLES: int = 500
+
+    # Ingestion queue: the scheduler / trigger only enqueue articles, and
+    # `python worker.py` processes (any number of them) do the extraction.
+    # Off: the web process extracts inline. Turn it on only where workers run
+    # (docker-compose does); it needs GRAPH_BACKEND=neo4j
+    INGEST_QUEUE_ENABLED: bool = False
+    JOB_LEASE_SECONDS: float = 600      # A job whose worker dies is retried after this
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BASE_SECONDS: float = 30  # Backoff: 30s, 60s, 120s, ... (with jitter)
+    JOB_RETRY_MAX_SECONDS: float = 3600
+    WORKER_BATCH_SIZE: int = 10         # Jobs leased per worker round
+    WORKER_POLL_SECONDS: float = 5      # Idle wait when the queue is empty
+
+    # Entity resolution between extraction and save
+    ENTITY_RESOLUTION_ENABLED: bool = True
+    ENTITY_FUZZY_THRESHOLD: float = 0.85  # Trigram Dice similarity for fuzzy matches
+
+    # Materialized chat context (per entity + global digest)
+    CONTEXT_LINES_PER_ENTITY: int = 25
+    CONTEXT_MAX_EDGES_SCANNED: int = 500     # Per entity rebuild
+    CONTEXT_DIGEST_ENTITIES: int = 10        # Top entities by degree in the general digest
+    CONTEXT_DIGEST_LINES: int = 3            # Relationship lines per digest entity
+    CONTEXT_DIGEST_REFRESH_SECONDS: float = 30
+    CONTEXT_WINDOW_MAX_EDGES: int = 2000     # Edges scanned for a time-windowed digest
+
+    # Chat retrieval: hashed n-gram vectors over entity ids and relationship facts
+    VECTOR_DIM: int = 512
+    VECTOR_TOP_K: int = 20          # Nearest items scanned per question
+    VECTOR_MIN_SCORE: float = 0.3   # Cosine similarity a hit must reach
+    VECTOR_MAX_ENTITIES: int = 5    # Entities whose context goes to the answer prompt
+    QA_LLM_ENTITY_FALLBACK: bool = False  # Ask the LLM for entities when retrieval finds none
+
+    # Chat: answer / entity caches keyed by (question, graph version)
+    QA_CACHE_MAX_ENTRIES: int = 1000
+    QA_CACHE_TTL_SECONDS: float = 600
+
+    # Batch extraction: several articles per LLM call (one system prompt)
+    EXTRACT_BATCH_MODE: bool = False
+    EXTRACT_BATCH_TOKEN_BUDGET: int = 3000  # Estimated article tokens per request
+    EXTRACT_BATCH_MAX_ARTICLES: int = 8
+
+    # Async ETL pipeline (fetch -> extract -> write)
+    PIPELINE_EXTRACT_CONCURRENCY: int = 5   # LLM extractions in flight at once
+    PIPELINE_QUEUE_SIZE: int = 20           # Max items buffered between stages
+    PIPELINE_EXTRACT_RATE: float = 2.0      # Extraction calls started per second (0 = unlimited)
+    PIPELINE_WRITE_RATE: float = 0          # Neo4j flushes per second (0 = unlimited)
+    PIPELINE_WRITE_FLUSH_SIZE: int = 25     # Graphs collected before each bulk write
+
     class Config:
         env_file = ".env"
         # This allows the .env file to be in the current folder or parent folder
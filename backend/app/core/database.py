@@ -1,36 +1,162 @@
-from neo4j import GraphDatabase
+import logging
+from contextlib import asynccontextmanager, contextmanager
 from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
 
 class Neo4jConnection:
+    """
+    Owns the Neo4j drivers (and their connection pools).
+
+    - Async driver: used by `async def` endpoints so they never block the event loop.
+    - Sync driver: used by background threads and scripts.
+
+    Prefer the helpers over raw sessions: they always close the session,
+    route reads vs writes (READ_ACCESS can go to cluster followers), and run
+    as managed transactions, which the driver retries on transient errors
+    for up to NEO4J_MAX_RETRY_TIME seconds.
+
+    The neo4j package is imported when the first driver is created, so
+    importing this module (and the app) stays cheap.
+    """
+
     def __init__(self):
         self.driver = None
+        self.async_driver = None
+
+    def _driver_options(self) -> dict:
+        return {
+            "auth": (settings.NEO4J_USERNAME, settings.NEO4J_PASSWORD),
+            "max_connection_pool_size": settings.NEO4J_MAX_POOL_SIZE,
+            "connection_acquisition_timeout": settings.NEO4J_ACQUISITION_TIMEOUT,
+            "max_transaction_retry_time": settings.NEO4J_MAX_RETRY_TIME,
+        }
+
+    def _session_options(self, read: bool) -> dict:
+        from neo4j import READ_ACCESS, WRITE_ACCESS
+
+        options = {"default_access_mode": READ_ACCESS if read else WRITE_ACCESS}
+        if settings.NEO4J_DATABASE:
+            options["database"] = settings.NEO4J_DATABASE
+        return options
+
+    # --- Lifecycle ---
 
     def connect(self):
         if not self.driver:
+            from neo4j import GraphDatabase
+
             try:
-                print(f"🔌 Connecting to Neo4j at {settings.NEO4J_URI}...")
-                self.driver = GraphDatabase.driver(
-                    settings.NEO4J_URI,
-                    auth=(settings.NEO4J_USERNAME, settings.NEO4J_PASSWORD)
-                )
+                logger.info(f"🔌 Connecting to Neo4j at {settings.NEO4J_URI}...")
+                self.driver = GraphDatabase.driver(settings.NEO4J_URI, **self._driver_options())
                 # Verify connectivity immediately
                 self.driver.verify_connectivity()
-                print("✅ Connected to Neo4j successfully!")
+                logger.info("✅ Connected to Neo4j successfully!")
             except Exception as e:
-                print(f"❌ Failed to connect to Neo4j: {e}")
+                logger.error(f"❌ Failed to connect to Neo4j: {e}")
+                # Unverified: the next connect() tries again
+                if self.driver:
+                    self.driver.close()
+                    self.driver = None
                 # We raise the error so the app knows it failed to start
                 raise e
 
+    async def aconnect(self):
+        if not self.async_driver:
+            from neo4j import AsyncGraphDatabase
+
+            try:
+                self.async_driver = AsyncGraphDatabase.driver(settings.NEO4J_URI, **self._driver_options())
+                await self.async_driver.verify_connectivity()
+                logger.info("✅ Async Neo4j driver ready.")
+            except Exception as e:
+                logger.error(f"❌ Failed to connect to Neo4j (async): {e}")
+                if self.async_driver:
+                    await self.async_driver.close()
+                    self.async_driver = None
+                raise e
+
     def close(self):
         if self.driver:
             self.driver.close()
-            print("🔒 Neo4j connection closed.")
+            self.driver = None
+            logger.info("🔒 Neo4j connection closed.")
+
+    async def aclose(self):
+        if self.async_driver:
+            await self.async_driver.close()
+            self.async_driver = None
+        self.close()
 
-    def get_session(self):
-        """Returns a new session for database transactions."""
+    # --- Sync sessions ---
+
+    def get_session(self, read: bool = False):
+        """Returns a new session for database transactions. Caller must close it."""
         if not self.driver:
             self.connect()
-        return self.driver.session()
+        return self.driver.session(**self._session_options(read))
+
+    @contextmanager
+    def session(self, read: bool = False):
+        """A session that is always closed, even when the block raises."""
+        session = self.get_session(read)
+        try:
+            yield session
+        finally:
+            session.close()
+
+    def read(self, query: str, **params) -> list:
+        """Runs a read query as a retried managed transaction; returns records as dicts."""
+        with metrics.span("neo4j_read", name="neo4j_query_duration_seconds"), self.session(read=True) as session:
+            return session.execute_read(lambda tx: tx.run(query, params).data())
+
+    def write(self, query: str, **params) -> list:
+        with metrics.span("neo4j_write", name="neo4j_query_duration_seconds"), self.session() as session:
+            return session.execute_write(lambda tx: tx.run(query, params).data())
+
+    def write_transaction(self, work, *args, **kwargs):
+        """Runs `work(tx, *args, **kwargs)` in one retried write transaction."""
+        with metrics.span("neo4j_write", name="neo4j_query_duration_seconds"), self.session() as session:
+            return session.execute_write(work, *args, **kwargs)
+
+    # --- Async sessions ---
+
+    @asynccontextmanager
+    async def asession(self, read: bool = False):
+        if not self.async_driver:
+            await self.aconnect()
+        session = self.async_driver.session(**self._session_options(read))
+        try:
+            yield session
+        finally:
+            await session.close()
+
+    async def aread(self, query: str, **params) -> list:
+        async def work(tx):
+            result = await tx.run(query, params)
+            return await result.data()
+
+        with metrics.span("neo4j_read", name="neo4j_query_duration_seconds"):
+            async with self.asession(read=True) as session:
+                return await session.execute_read(work)
+
+    async def awrite(self, query: str, **params) -> list:
+        async def work(tx):
+            result = await tx.run(query, params)
+            return await result.data()
+
+        with metrics.span("neo4j_write", name="neo4j_query_duration_seconds"):
+            async with self.asession() as session:
+                return await session.execute_write(work)
+
+    async def awrite_transaction(self, work, *args, **kwargs):
+        """Runs `await work(tx, *args, **kwargs)` in one retried write transaction."""
+        with metrics.span("neo4j_write", name="neo4j_query_duration_seconds"):
+            async with self.asession() as session:
+                return await session.execute_write(work, *args, **kwargs)
+
 
 # Create a single instance to be imported elsewhere
-neo4j_conn = Neo4jConnection()
\ No newline at end of file
+neo4j_conn = Neo4jConnection()
@@ -0,0 +1,124 @@
+import logging
+
+from app.core.database import neo4j_conn
+
+logger = logging.getLogger(__name__)
+
+# Every extracted entity carries this label on top of its type label
+# ("Company", "Person", ...), so lookups by id can use one index.
+ENTITY_LABEL = "Entity"
+
+ENTITY_ID_CONSTRAINT = "entity_id_unique"
+ENTITY_ID_INDEX = "entity_id"
+ENTITY_ID_FULLTEXT = "entity_id_fulltext"
+ENTITY_LAST_SEEN_INDEX = "entity_last_seen"
+
+# Source articles: (:Article {url})-[:MENTIONS]->(:Entity)
+ARTICLE_LABEL = "Article"
+MENTIONS = "MENTIONS"
+ARTICLE_URL_CONSTRAINT = "article_url_unique"
+ARTICLE_HASH_INDEX = "article_content_hash"
+ARTICLE_INGESTED_INDEX = "article_ingested_at"
+
+# One node holding the version of the layout saved on the entities
+LAYOUT_STATE_LABEL = "LayoutState"
+
+# Relationship types whose last_seen range index is known to exist
+_indexed_relationships = set()
+
+
+def primary_label(labels) -> str:
+    """The type label used for display (e.g. "Company"), ignoring :Entity."""
+    for label in labels or []:
+        if label != ENTITY_LABEL:
+            return label
+    return ENTITY_LABEL
+
+
+def ensure_relationship_indexes(types):
+    """
+    Range index on `last_seen` per relationship type (Neo4j relationship
+    indexes are per type). Types are open-ended, so new ones are indexed
+    the first time the write path sees them.
+    """
+    missing = [t for t in types if t not in _indexed_relationships]
+    if not missing:
+        return
+    with neo4j_conn.session() as session:
+        for relationship in missing:
+            index_name = f"rel_last_seen_{relationship}".replace("`", "")
+            session.run(f"""
+            CREATE INDEX `{index_name}` IF NOT EXISTS
+            FOR ()-[r:`{relationship}`]-() ON (r.last_seen)
+            """).consume()
+            _indexed_relationships.add(relationship)
+
+
+def ensure_schema():
+    """
+    Startup migration: makes sure every entity node is labelled :Entity
+    and that `id` lookups are index seeks instead of full node scans.
+    Safe to run on every boot; each step is idempotent.
+    """
+    # Auto-commit session: schema commands and CALL { } IN TRANSACTIONS can't
+    # run inside a managed transaction
+    with neo4j_conn.session() as session:
+        # 1. Backfill the common label on nodes written before it existed
+        session.run(f"""
+        MATCH (n)
+        WHERE n.id IS NOT NULL AND NOT n:{ENTITY_LABEL} AND NOT n:{ARTICLE_LABEL}
+        CALL {{ WITH n SET n:{ENTITY_LABEL} }} IN TRANSACTIONS OF 10000 ROWS
+        """).consume()
+
+        # 2. Uniqueness on id (also gives us the backing index)
+        try:
+            session.run(f"""
+            CREATE CONSTRAINT {ENTITY_ID_CONSTRAINT} IF NOT EXISTS
+            FOR (n:{ENTITY_LABEL}) REQUIRE n.id IS UNIQUE
+            """).consume()
+        except Exception as e:
+            # Older data can hold the same id under two type labels; keep
+            # the seeks with a plain index until those are merged by hand.
+            logger.warning(f"⚠️ Could not create {ENTITY_ID_CONSTRAINT} (duplicate ids?): {e}")
+            session.run(f"""
+            CREATE INDEX {ENTITY_ID_INDEX} IF NOT EXISTS
+            FOR (n:{ENTITY_LABEL}) ON (n.id)
+            """).consume()
+
+        # 3. Full-text index for fuzzy lookups by name
+        session.run(f"""
+        CREATE FULLTEXT INDEX {ENTITY_ID_FULLTEXT} IF NOT EXISTS
+        FOR (n:{ENTITY_LABEL}) ON EACH [n.id]
+        """).consume()
+
+        # 4. Range index for time-windowed reads
+        session.run(f"""
+        CREATE INDEX {ENTITY_LAST_SEEN_INDEX} IF NOT EXISTS
+        FOR (n:{ENTITY_LABEL}) ON (n.last_seen)
+        """).consume()
+
+        # 5. Articles: unique url, plus lookups by content and by ingestion time
+        session.run(f"""
+        CREATE CONSTRAINT {ARTICLE_URL_CONSTRAINT} IF NOT EXISTS
+        FOR (a:{ARTICLE_LABEL}) REQUIRE a.url IS UNIQUE
+        """).consume()
+        session.run(f"""
+        CREATE INDEX {ARTICLE_HASH_INDEX} IF NOT EXISTS
+        FOR (a:{ARTICLE_LABEL}) ON (a.content_hash)
+        """).consume()
+        session.run(f"""
+        CREATE INDEX {ARTICLE_INGESTED_INDEX} IF NOT EXISTS
+        FOR (a:{ARTICLE_LABEL}) ON (a.ingested_at)
+        """).consume()
+
+        relationship_types = [
+            r["relationshipType"] for r in session.run("CALL db.relationshipTypes()")
+            if r["relationshipType"] != MENTIONS
+        ]
+
+    # 6. Time range index per relationship type
+    ensure_relationship_indexes(relationship_types)
+
+    with neo4j_conn.session() as session:
+        session.run("CALL db.awaitIndexes(300)").consume()
+    logger.info("🗂️ Graph schema ready (:Entity / :Article constraints + indexes).")
@@ -0,0 +1,151 @@
+import asyncio
+import gzip
+import secrets
+from typing import Optional
+
+import zstandard
+from fastapi import Request
+from fastapi.responses import ORJSONResponse, Response
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.metrics import metrics
+
+# Version counters are per process: a validator from another process
+# (behind the same load balancer) must never match by accident
+INSTANCE_TAG = secrets.token_hex(4)
+
+# Compressed variants get their own ETag (see CompressionMiddleware)
+_ENCODINGS = ("zstd", "gzip")
+
+# Bodies this large are compressed off the event loop
+_THREAD_MIN_BYTES = 256 * 1024
+
+
+# --- Validators ---
+
+def make_etag(*parts) -> str:
+    """Strong ETag from the version counters a response was built from."""
+    return '"' + ".".join([INSTANCE_TAG, *map(str, parts)]) + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """
+    The If-None-Match entry that matches `etag`, or None. Comparison is
+    weak, and an encoding suffix still names the same entity.
+    """
+    if not if_none_match:
+        return None
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return etag
+        tag = candidate.removeprefix("W/")
+        for encoding in _ENCODINGS:
+            tag = tag.replace(f"-{encoding}\"", "\"")
+        if tag == etag:
+            return candidate
+    return None
+
+
+def _validator_headers(etag: str) -> dict:
+    # no-cache: clients keep the body but revalidate on every use, which costs a 304
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """A 304 when the client already holds `etag`, else None (build the body)."""
+    matched = etag_matches(request.headers.get("if-none-match"), etag)
+    if matched:
+        metrics.inc("cache_requests_total", cache="http_etag", result="hit")
+        # Echo the variant the client holds (it may carry an encoding suffix)
+        return Response(status_code=304, headers=_validator_headers(matched))
+    metrics.inc("cache_requests_total", cache="http_etag", result="miss")
+    return None
+
+
+def cached_json(payload, etag: str) -> ORJSONResponse:
+    return ORJSONResponse(payload, headers=_validator_headers(etag))
+
+
+# --- Compression ---
+
+def _negotiate(accept_encoding: str) -> Optional[str]:
+    """The supported encoding with the highest q-value (zstd wins ties), or None."""
+    best, best_q = None, 0.0
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                continue
+        if name in _ENCODINGS and q > 0 and (q > best_q or (q == best_q and name == "zstd")):
+            best, best_q = name, q
+    return best
+
+
+class CompressionMiddleware:
+    """
+    zstd or gzip, as negotiated with Accept-Encoding, for complete bodies
+    of at least `minimum_size` bytes. Streaming responses (SSE, NDJSON)
+    pass through untouched, so they still flush event by event. The
+    ETag of a compressed variant gets an "-<encoding>" suffix, since its
+    bytes differ; etag_matches() accepts either.
+    """
+
+    def __init__(self, app, minimum_size: int, gzip_level: int, zstd_level: int):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "zstd":
+            return zstandard.ZstdCompressor(level=self.zstd_level).compress(body)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = _negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        held = None
+
+        async def send_compressed(message):
+            nonlocal held
+            if message["type"] == "http.response.start":
+                # Hold the headers until the body shows whether it's worth compressing
+                held = message
+                return
+            if held is None:
+                await send(message)
+                return
+
+            start, held = held, None
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=list(start["headers"]))
+            if message.get("more_body") or len(body) < self.minimum_size or "content-encoding" in headers:
+                await send(start)
+                await send(message)
+                return
+
+            if len(body) >= _THREAD_MIN_BYTES:
+                body = await asyncio.to_thread(self._compress, body, encoding)
+            else:
+                body = self._compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and etag.endswith('"'):
+                headers["ETag"] = f'{etag[:-1]}-{encoding}"'
+            await send({**start, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
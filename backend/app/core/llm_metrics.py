@@ -0,0 +1,43 @@
+import time
+from typing import Dict
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from app.core.metrics import metrics
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """LangChain callback that counts LLM calls, errors and tokens per model."""
+
+    def __init__(self, model: str):
+        self.model = model
+        self._started: Dict[object, float] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+        metrics.inc("llm_calls_total", model=self.model)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        start = self._started.pop(run_id, None)
+        if start is not None:
+            metrics.observe("llm_call_duration_seconds", time.perf_counter() - start, model=self.model)
+
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if not usage:
+            # Streaming responses carry usage on the message instead
+            for generations in response.generations:
+                for generation in generations:
+                    message_usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                    if message_usage:
+                        usage = {
+                            "prompt_tokens": message_usage.get("input_tokens", 0),
+                            "completion_tokens": message_usage.get("output_tokens", 0),
+                        }
+        for kind in ("prompt", "completion"):
+            tokens = usage.get(f"{kind}_tokens")
+            if tokens:
+                metrics.inc("llm_tokens_total", tokens, model=self.model, kind=kind)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._started.pop(run_id, None)
+        metrics.inc("llm_errors_total", model=self.model, error=type(error).__name__)
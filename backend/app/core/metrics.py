@@ -0,0 +1,190 @@
+import contextvars
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+# Seconds; covers sub-millisecond cache lookups up to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Per-request span totals for the Server-Timing header (None outside a request)
+_request_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "request_timings", default=None)
+
+
+def _label_key(labels: dict) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(key: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in key]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * (buckets + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+
+class Metrics:
+    """
+    In-process counters and histograms, rendered in the Prometheus text
+    format by /metrics. Cheap enough for hot paths: one lock, a dict
+    lookup and an add per observation.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counters: Dict[str, Dict[tuple, float]] = {}
+        self._histograms: Dict[str, Dict[tuple, _Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._gauges: Dict[str, Callable[[], Dict[tuple, float]]] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(len(self.buckets))
+            histogram.counts[bisect_left(self.buckets, seconds)] += 1
+            histogram.sum += seconds
+            histogram.count += 1
+
+    def gauge(self, name: str, collect: Callable[[], Dict[tuple, float]]):
+        """Registers a gauge read at scrape time; `collect` returns {label_key: value}."""
+        self._gauges[name] = collect
+
+    @contextmanager
+    def span(self, stage: str, name: str = "stage_duration_seconds", **labels):
+        """
+        Times the block into histogram `name` with a `stage` label, and adds
+        it to the current request's Server-Timing totals.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.observe(name, elapsed, stage=stage, **labels)
+            timings = _request_timings.get()
+            if timings is not None:
+                timings[stage] = timings.get(stage, 0.0) + elapsed
+
+    def value(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_label_key(labels), 0)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {
+                name: {key: (list(h.counts), h.sum, h.count) for key, h in series.items()}
+                for name, series in self._histograms.items()
+            }
+
+        for name, series in sorted(counters.items()):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} counter")
+            for key, value in series.items():
+                lines.append(f"{name}{_format_labels(key)} {value}")
+
+        for name, series in sorted(histograms.items()):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, (counts, total, count) in series.items():
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    le = 'le="%s"' % bound
+                    lines.append(f"{name}_bucket{_format_labels(key, le)} {cumulative}")
+                le = 'le="+Inf"'
+                lines.append(f"{name}_bucket{_format_labels(key, le)} {count}")
+                lines.append(f"{name}_sum{_format_labels(key)} {total}")
+                lines.append(f"{name}_count{_format_labels(key)} {count}")
+
+        for name, collect in sorted(self._gauges.items()):
+            try:
+                series = collect()
+            except Exception as e:
+                logging.getLogger(__name__).warning(f"⚠️ Gauge {name} failed: {e}")
+                continue
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} gauge")
+            for key, value in series.items():
+                lines.append(f"{name}{_format_labels(key)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def request_timings():
+    """Collects span totals for one HTTP request; yields the {stage: seconds} dict."""
+    timings: Dict[str, float] = {}
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+def server_timing_header(timings: Dict[str, float], total: float) -> str:
+    parts = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def configure_logging():
+    """Replaces the old print() calls: one handler, level from LOG_LEVEL."""
+    logging.basicConfig(
+        level=getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+
+
+# Create a single instance to be imported elsewhere
+metrics = Metrics()
+metrics.describe("stage_duration_seconds", "Time spent per pipeline / QA / HTTP stage")
+metrics.describe("neo4j_query_duration_seconds", "Neo4j helper call latency by access mode")
+metrics.describe("llm_calls_total", "LLM calls started")
+metrics.describe("llm_errors_total", "LLM calls that raised")
+metrics.describe("llm_tokens_total", "Tokens reported by the LLM provider")
+metrics.describe("llm_call_duration_seconds", "LLM call latency")
+metrics.describe("cache_requests_total", "Cache lookups by cache and result")
+metrics.describe("pipeline_articles_total", "Articles by pipeline outcome")
+metrics.describe("article_checks_total", "Already-ingested checks by result (filtered = Bloom filter only)")
+metrics.describe("llm_queue_wait_seconds", "Time spent waiting for LLM rate-limit budget")
+metrics.describe("llm_retries_total", "LLM calls retried after a retryable error")
+metrics.describe("llm_coalesced_total", "LLM calls served by an identical in-flight request")
+metrics.describe("jobs_total", "Ingestion jobs settled by workers")
+metrics.describe("post_commit_errors_total", "Graph writes that committed but failed to update in-process indexes")
+metrics.describe("jobs", "Ingestion jobs by status")
+metrics.describe("http_requests_total", "HTTP requests by route, method and status")
+metrics.describe("http_request_duration_seconds", "HTTP request latency by route")
+metrics.describe("ingest_log_records_total", "Extraction results appended to the ingestion log")
+metrics.describe("ingest_log_bytes_total", "Compressed bytes appended to the ingestion log")
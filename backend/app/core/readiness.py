@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Origin for `ready_after`: when the app's modules were being imported
+_PROCESS_STARTED = time.monotonic()
+
+
+class Readiness:
+    """
+    Start-up state behind GET /ready.
+
+    The server starts accepting requests right away; the slow start-up
+    work (connecting to Neo4j, loading the in-memory indexes) runs as
+    background steps that report here. Endpoints that need the data
+    `wait()` for it, /ready answers 503 until then.
+    """
+
+    def __init__(self):
+        self.steps: Dict[str, str] = {}   # name -> "pending" / "ok" / last error
+        self.ready_after: Optional[float] = None
+        self._event: Optional[asyncio.Event] = None
+
+    def begin(self):
+        """Called by the lifespan; the event belongs to the running loop."""
+        self.steps = {}
+        self.ready_after = None
+        self._event = asyncio.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self._event is not None and self._event.is_set()
+
+    async def step(self, name: str, work: Callable[[], Awaitable], retry: bool = False):
+        """Runs one start-up step; with `retry`, backs off and tries again until it succeeds."""
+        self.steps[name] = "pending"
+        started = time.perf_counter()
+        delay = 1.0
+        while True:
+            try:
+                await work()
+                break
+            except Exception as e:
+                self.steps[name] = f"{type(e).__name__}: {e}"
+                if not retry:
+                    logger.error(f"❌ Start-up step '{name}' failed: {e}")
+                    return
+                logger.warning(f"⏳ Start-up step '{name}' failed ({e}); retrying in {delay:.0f}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, settings.STARTUP_RETRY_MAX_SECONDS)
+        self.steps[name] = "ok"
+        logger.info(f"✅ Start-up step '{name}' done in {time.perf_counter() - started:.2f}s")
+
+    def mark_ready(self):
+        self.ready_after = time.monotonic() - _PROCESS_STARTED
+        self._event.set()
+        logger.info(f"🟢 Ready {self.ready_after:.2f}s after start.")
+
+    async def wait(self, timeout: Optional[float]) -> bool:
+        """True once ready; False after `timeout` seconds (None: no limit)."""
+        if self.ready:
+            return True
+        if self._event is None:
+            return False
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "steps": dict(self.steps),
+            "ready_after_seconds": round(self.ready_after, 3) if self.ready_after is not None else None,
+            "uptime_seconds": round(time.monotonic() - _PROCESS_STARTED, 3),
+        }
+
+
+# Create a single instance to be imported elsewhere
+readiness = Readiness()
@@ -1,52 +1,75 @@
+import asyncio
+import logging
+import os
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from app.services.scraper import fetch_latest_news
-from app.services.extractor import extract_graph_from_text
-from app.services.graph_store import save_graph_to_neo4j
+from app.core.config import settings
+from app.services.pipeline import run_etl_pipeline
+from app.services.ingest_worker import enqueue_latest_news
+
+logger = logging.getLogger(__name__)
 
 # Create the scheduler instance
 scheduler = AsyncIOScheduler()
 
+# Held open for the life of the process that owns the scheduler
+_lock_file = None
+
 async def scheduled_scraping_job():
     """
     This function runs automatically.
-    It does the full ETL pipeline: Scrape -> Extract -> Save.
+    With the ingestion queue on, it only enqueues new articles (workers
+    do the extraction); otherwise it runs the full ETL pipeline in-process.
     """
-    print("⏰ Cron Job Started: Fetching News...")
+    logger.info("⏰ Cron Job Started: Fetching News...")
     
     try:
-        # 1. Scrape
-        articles = fetch_latest_news()
-        if not articles:
-            print("⚠️ No articles found.")
+        if settings.INGEST_QUEUE_ENABLED:
+            found = await asyncio.to_thread(enqueue_latest_news)
+        else:
+            found = (await run_etl_pipeline())["fetched"]
+        if not found:
+            logger.warning("⚠️ No articles found.")
             return
 
-        print(f"📰 Found {len(articles)} articles. Processing...")
-
-        # 2. Process each article
-        for article in articles:
-            full_text = f"{article['title']}. {article['summary']}"
-            
-            # Extract
-            print(f"🧠 Extracting: {article['title']}...")
-            graph_data = extract_graph_from_text(full_text)
-            
-            # Save
-            if graph_data:
-                save_graph_to_neo4j(graph_data)
-            else:
-                print("❌ Extraction failed for this article.")
-                
-        print("✅ Cron Job Finished successfully.")
+        logger.info("✅ Cron Job Finished successfully.")
         
     except Exception as e:
-        print(f"❌ Cron Job Failed: {e}")
+        logger.error(f"❌ Cron Job Failed: {e}")
 
-def start_scheduler():
+def _acquire_scheduler_lock() -> bool:
     """
-    Starts the scheduler loop.
+    Only one process per host may run the scheduler (gunicorn starts one
+    app per worker). A non-blocking flock on a file in DATA_DIR picks the
+    winner; the OS releases it if that process dies.
     """
+    global _lock_file
+    try:
+        import fcntl
+    except ImportError:
+        return True  # No flock (Windows): single-process dev setups only
+
+    os.makedirs(settings.DATA_DIR, exist_ok=True)
+    lock_file = open(os.path.join(settings.DATA_DIR, "scheduler.lock"), "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _lock_file = lock_file
+    return True
+
+def start_scheduler() -> bool:
+    """
+    Starts the scheduler loop (in one process only).
+    Returns True in the process that owns it.
+    """
+    if not _acquire_scheduler_lock():
+        logger.info("⏳ Scheduler already running in another process; skipping.")
+        return False
+
     # Add the job to run every 6 hours
     # For testing, you can change 'hours=6' to 'seconds=60' to see it run every minute!
     scheduler.add_job(scheduled_scraping_job, "interval", hours=6)
     scheduler.start()
-    print("⏳ Scheduler started. Scraper will run every 6 hours.")
\ No newline at end of file
+    logger.info("⏳ Scheduler started. Scraper will run every 6 hours.")
+    return True
@@ -0,0 +1,74 @@
+import time
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional, Union
+
+# Compact per-edge sentiment history: "<epoch seconds>:<code>"
+SENTIMENT_CODES = {"Positive": "+", "Negative": "-", "Neutral": "0"}
+CODE_SENTIMENTS = {code: name for name, code in SENTIMENT_CODES.items()}
+
+
+def now_ts() -> int:
+    return int(time.time())
+
+
+def history_entry(ts: int, sentiment: str) -> str:
+    return f"{ts}:{SENTIMENT_CODES.get(sentiment or 'Neutral', '0')}"
+
+
+def parse_history_entry(entry: str):
+    """"1718000000:+" -> (1718000000, "Positive")"""
+    ts, _, code = entry.partition(":")
+    return int(ts), CODE_SENTIMENTS.get(code, "Neutral")
+
+
+def parse_time(value: Union[None, int, str], end_of_day: bool = False) -> Optional[int]:
+    """
+    Epoch seconds from an int / numeric string, or an ISO 8601 date or
+    datetime ("2025-06-01", "2025-06-01T12:00:00Z"; naive means UTC).
+    With `end_of_day`, a bare date means its last second (for `to=`).
+    Raises ValueError for anything else.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, int):
+        return value
+    text = str(value).strip()
+    if text.lstrip("-").isdigit():
+        return int(text)
+    parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    if end_of_day and len(text) == 10:
+        return int(parsed.timestamp()) + 86399
+    return int(parsed.timestamp())
+
+
+def format_day(ts: Optional[int]) -> str:
+    if not ts:
+        return "unknown"
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+class TimeWindow(NamedTuple):
+    """Closed [start, end] in epoch seconds; either side may be open (None)."""
+    start: Optional[int] = None
+    end: Optional[int] = None
+
+    @classmethod
+    def parse(cls, start=None, end=None) -> Optional["TimeWindow"]:
+        window = cls(parse_time(start), parse_time(end, end_of_day=True))
+        return window if window.start is not None or window.end is not None else None
+
+    def overlaps(self, first_seen: Optional[int], last_seen: Optional[int]) -> bool:
+        """
+        Whether a relationship was reported during the window: its
+        [first_seen, last_seen] span intersects it. Edges written before
+        timestamps existed have none and never match a window.
+        """
+        if first_seen is None or last_seen is None:
+            return False
+        if self.start is not None and last_seen < self.start:
+            return False
+        if self.end is not None and first_seen > self.end:
+            return False
+        return True
@@ -1,34 +1,131 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
+import logging
+import time
+import orjson
 import uvicorn
 from typing import List, Optional
+from app.core.config import settings
+from app.core.readiness import readiness
 from app.core.database import neo4j_conn
-from app.services.scraper import fetch_latest_news
+from app.core.http_cache import CompressionMiddleware, cached_json, make_etag, not_modified
+from app.core.metrics import configure_logging, metrics, request_timings, server_timing_header
+from app.core.graph_schema import ensure_schema
+from app.core.temporal import TimeWindow
+from app.services.scraper import commit_news, fetch_latest_news
+from app.services import extractor, qa_service
 from app.services.extractor import extract_graph_from_text
 from app.services.graph_store import save_graph_to_neo4j
-from app.services.qa_service import answer_question
+from app.services.qa_service import aanswer_question, astream_answer
+from app.services.pipeline import run_etl_pipeline
+from app.services.graph_backends import uses_neo4j, warm_read_replica
+from app.services.graph_cache import graph_snapshot
+from app.services.graph_layout import graph_layout
+from app.services.graph_query import iter_neighborhood
+from app.services.entity_resolver import entity_resolver, resolve_entities
+from app.services.vector_index import vector_index
+from app.services.extraction_cache import extraction_cache
+from app.services.ingest_worker import enqueue_latest_news
+from app.services.job_queue import job_queue
 from app.core.scheduler import start_scheduler
 
+configure_logging()
+logger = logging.getLogger(__name__)
+
+# Values read at scrape time
+metrics.gauge("graph_snapshot_version", lambda: {(): graph_snapshot.version})
+metrics.gauge("entity_index_size", lambda: {(): len(entity_resolver)})
+metrics.gauge("vector_index_size", lambda: {(): len(vector_index)})
+metrics.gauge("extraction_cache_hit_rate", lambda: {(): extraction_cache.stats()["hit_rate"]})
+metrics.gauge("jobs", lambda: {(("status", status),): count for status, count in job_queue.stats().items()})
+
+async def _connect_neo4j():
+    await neo4j_conn.aconnect()
+    await asyncio.to_thread(neo4j_conn.connect)
+    await asyncio.to_thread(ensure_schema)
+
+
+def _load_indexes():
+    # Fill the in-memory read replica before serving any reads from it
+    warm_read_replica()
+    entity_resolver.load_from_graph()
+    vector_index.load_from_graph()
+
+
+def _build_llm_clients():
+    # Imports LangChain / Groq and builds every chain, so the first
+    # extraction or chat doesn't pay for it
+    for chain in (extractor.chain, extractor.batch_chain, qa_service.contextualize_chain,
+                  qa_service.entity_chain, qa_service.answer_chain):
+        chain.get()
+
+
+async def _start_up(stop: asyncio.Event, tasks: list):
+    """
+    The slow part of start-up, run after the server is already accepting
+    requests (a cold start answers the wake-up cron at once). Progress
+    is reported on GET /ready.
+    """
+    # 1. Database: retried until it answers (a sleeping instance may still be waking up)
+    if uses_neo4j():
+        await readiness.step("neo4j", _connect_neo4j, retry=True)
+    # 2. In-memory indexes: retried as well, since reads are served from them
+    # (not ready until they're loaded)
+    await readiness.step("indexes", lambda: asyncio.to_thread(_load_indexes), retry=True)
+
+    # 3. Background jobs. Queued ingestion needs workers, and they need a shared graph
+    if settings.INGEST_QUEUE_ENABLED and not uses_neo4j():
+        logger.warning("⚠️ INGEST_QUEUE_ENABLED needs GRAPH_BACKEND=neo4j (workers can't reach an "
+                       "in-memory graph); ingesting inline instead.")
+        settings.INGEST_QUEUE_ENABLED = False
+    # Writes from other processes (workers) reach this one's snapshot and replica
+    if uses_neo4j():
+        tasks.append(asyncio.create_task(graph_snapshot.run(stop)))
+    # Graph layout: the scheduler's process computes it, the others load it
+    owns_scheduler = start_scheduler()
+    if settings.LAYOUT_ENABLED:
+        tasks.append(asyncio.create_task(graph_layout.run(compute=owns_scheduler, stop=stop)))
+    readiness.mark_ready()
+
+    # 4. LLM clients, off the request path
+    await readiness.step("llm", lambda: asyncio.to_thread(_build_llm_clients))
+
+
 # Lifespan handles startup and shutdown events
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
-    print("🚀 Starting up Silicon Valley Insider Backend...")
-    neo4j_conn.connect()
-    
-    # Start the background scheduler
-    start_scheduler()  # <--- THIS IS NOW ACTIVE
-    
+    # Startup: nothing here blocks; see _start_up
+    logger.info("🚀 Starting up Silicon Valley Insider Backend...")
+    readiness.begin()
+    stop = asyncio.Event()
+    tasks = []
+    start_up = asyncio.create_task(_start_up(stop, tasks))
+
     yield
     # Shutdown
-    print("🛑 Shutting down...")
-    neo4j_conn.close()
+    logger.info("🛑 Shutting down...")
+    stop.set()
+    for task in (start_up, *_deferred_scrapes):
+        if not task.done():
+            task.cancel()
+    await asyncio.gather(start_up, *tasks, *_deferred_scrapes, return_exceptions=True)
+    await neo4j_conn.aclose()
+
 
-app = FastAPI(title="Silicon Valley Insider Graph", lifespan=lifespan)
+async def require_ready():
+    """Dependency for endpoints that need the graph: waits out start-up, then 503."""
+    if not await readiness.wait(settings.STARTUP_WAIT_SECONDS):
+        raise HTTPException(status_code=503, detail="Starting up", headers={"Retry-After": "5"})
+
+
+# orjson for every JSON body (the /graph payload is the big one)
+app = FastAPI(title="Silicon Valley Insider Graph", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -36,32 +133,72 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+# Wraps CORS, so it compresses the final body and suffixes the final ETag
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.HTTP_COMPRESSION_MIN_BYTES,
+    gzip_level=settings.HTTP_GZIP_LEVEL,
+    zstd_level=settings.HTTP_ZSTD_LEVEL,
+)
+
+
+@app.middleware("http")
+async def record_timings(request: Request, call_next):
+    """
+    Times every request and, with SERVER_TIMING_HEADER on, reports the
+    spans it ran (neo4j_read, qa_entities, ...) in a Server-Timing header.
+    Streaming responses only include what finished before the first byte.
+    """
+    started = time.perf_counter()
+    with request_timings() as timings:
+        response = await call_next(request)
+    elapsed = time.perf_counter() - started
+
+    route = request.scope.get("route")
+    path = route.path if route else "unmatched"
+    metrics.observe("http_request_duration_seconds", elapsed, path=path, method=request.method)
+    metrics.inc("http_requests_total", path=path, method=request.method, status=response.status_code)
+    if settings.SERVER_TIMING_HEADER:
+        response.headers["Server-Timing"] = server_timing_header(timings, elapsed)
+    return response
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 
 @app.get("/")
 def read_root():
     return {"status": "online", "message": "Graph Database System Ready"}
 
 
-@app.get("/test-db")
-def test_db_connection():
+@app.get("/ready")
+def ready():
+    """Readiness probe: 200 once start-up finished, 503 (with per-step status) before."""
+    return JSONResponse(readiness.status(), status_code=200 if readiness.ready else 503)
+
+
+@app.get("/test-db", dependencies=[Depends(require_ready)])
+async def test_db_connection():
     """
     Runs a real query against the Neo4j database to prove it works.
     """
     query = "RETURN 'Hello from Neo4j' AS message"
 
     try:
-        session = neo4j_conn.get_session()
         # Run the query and get the single result
-        result = session.run(query).single()
-        session.close()
-        return {"neo4j_response": result["message"]}
+        records = await neo4j_conn.aread(query)
+        return {"neo4j_response": records[0]["message"]}
     except Exception as e:
         return {"error": str(e)}
 
 
-@app.get("/scrape-and-extract")
+@app.get("/scrape-and-extract", dependencies=[Depends(require_ready)])
 def manual_extraction():
     articles = fetch_latest_news()
     if not articles:
@@ -71,13 +208,17 @@ def manual_extraction():
     article = articles[0]
     full_text = f"{article['title']}. {article['summary']}"
 
-    print(f"🧠 Processing: {article['title']}")
-    graph_data = extract_graph_from_text(full_text)
+    logger.info(f"🧠 Processing: {article['title']}")
+    extracted = extract_graph_from_text(full_text)
+    graph_data = resolve_entities(extracted)
 
     if graph_data:
         # --- THIS IS THE NEW PART ---
-        print("💾 Saving to Neo4j...")
-        save_graph_to_neo4j(graph_data)
+        logger.info("💾 Saving to Neo4j...")
+        if not save_graph_to_neo4j(graph_data, article=article, extracted=extracted):
+            return {"error": "Saving the graph failed"}
+        # The other fetched articles come back on the next poll
+        commit_news([article])
         # ----------------------------
 
         return {
@@ -89,93 +230,171 @@ def manual_extraction():
         return {"error": "AI extraction failed"}
 
 
+def _parse_window(start, end) -> Optional[TimeWindow]:
+    """`from` / `to` as epoch seconds or ISO dates; 400 on anything else."""
+    try:
+        return TimeWindow.parse(start, end)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="`from` / `to` must be epoch seconds or ISO 8601 dates")
+
+
 class QueryRequest(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
     question: str
     history: Optional[List[dict]] = []
+    # Optional time window for the graph context (epoch seconds or ISO dates)
+    time_from: Optional[str] = Field(None, alias="from")
+    time_to: Optional[str] = Field(None, alias="to")
+
+    def window(self) -> Optional[TimeWindow]:
+        return _parse_window(self.time_from, self.time_to)
 
 
-@app.post("/chat")
-def chat_with_graph(request: QueryRequest):
+@app.post("/chat", dependencies=[Depends(require_ready)])
+async def chat_with_graph(request: QueryRequest):
     """
     The GraphRAG Endpoint.
     User asks a question -> System looks up Graph -> Returns Answer.
     """
-    result = answer_question(request.question, request.history)
+    result = await aanswer_question(request.question, request.history, request.window())
     return result
 
 
-@app.get("/graph")
-def get_full_graph():
+@app.post("/chat/stream", dependencies=[Depends(require_ready)])
+async def chat_with_graph_stream(request: QueryRequest):
     """
-    Fetches the entire Knowledge Graph for the Frontend Visualizer.
+    Streaming GraphRAG Endpoint (Server-Sent Events).
+    Emits `question`, `entities`, `context` and `sources` (the articles
+    behind the context) as each stage finishes, then one `token` event
+    per answer chunk, then `done` with the same payload /chat returns.
     """
-    session = neo4j_conn.get_session()
+    window = request.window()
+
+    async def event_stream():
+        try:
+            async for event, data in astream_answer(request.question, request.history, window):
+                yield b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+        except Exception as e:
+            logger.error(f"❌ Chat stream failed: {e}")
+            yield b"event: error\ndata: " + orjson.dumps({"message": str(e)}) + b"\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # Stop proxies (nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/graph", dependencies=[Depends(require_ready)])
+def get_full_graph(
+    request: Request,
+    cursor: int = 0,
+    limit: Optional[int] = None,
+    labels: Optional[str] = None,
+    relationships: Optional[str] = None,
+    since: Optional[int] = None,
+    time_from: Optional[str] = Query(None, alias="from"),
+    time_to: Optional[str] = Query(None, alias="to"),
+):
+    """
+    Fetches the Knowledge Graph for the Frontend Visualizer.
+
+    Served from an in-memory snapshot that the write path keeps up to date.
+    - cursor / limit: page through links; follow `next_cursor` until it is null
+    - labels / relationships: comma-separated filters (e.g. labels=Company,Person)
+    - since: only nodes/links added or changed after this `version`
+    - from / to: only links reported in that time window (epoch seconds or
+      ISO dates, e.g. from=2025-06-01&to=2025-06-30)
+
+    Nodes carry server-computed x / y / z, degree, pagerank and community
+    once the layout job has placed them (`layout_version` says which run).
 
-    # 1. Fetch all relationships
-    # We use LIMIT 1000 to prevent browser crashes if the graph gets too huge
-    query = """
-    MATCH (s)-[r]->(t)
-    RETURN s, r, t
-    LIMIT 500
+    The ETag names the snapshot and layout versions: a client sending it
+    back in If-None-Match gets a 304 until a write or a layout run lands.
+    """
+    limit = min(limit or settings.GRAPH_PAGE_SIZE, settings.GRAPH_MAX_PAGE_SIZE)
+    window = _parse_window(time_from, time_to)
+
+    # 1. Revalidation: nothing changed since the client's copy
+    cached = not_modified(request, make_etag(graph_snapshot.current_version(), graph_layout.version))
+    if cached is not None:
+        return cached
+
+    page = graph_snapshot.query(
+        cursor=cursor,
+        limit=limit,
+        labels=_split_csv(labels),
+        relationships=_split_csv(relationships),
+        since=since,
+        window=window,
+    )
+    # 2. The validator describes the versions this body was built from
+    layout_version = graph_layout.version
+    graph_layout.decorate(page["nodes"])
+    page["layout_version"] = layout_version
+    return cached_json(page, make_etag(page["version"], layout_version))
+
+
+@app.get("/graph/neighborhood", dependencies=[Depends(require_ready)])
+async def get_graph_neighborhood(
+    ids: List[str] = Query(..., description="Entity id(s) to start from; repeat for several"),
+    depth: int = Query(1, ge=1, le=3),
+    max_degree: int = Query(25, ge=1, le=500),
+    max_nodes: int = Query(1000, ge=1, le=20000),
+):
+    """
+    Streams the k-hop subgraph around one or more entities as NDJSON
+    (one node/link event per line), so the frontend can explore lazily
+    without the API ever materializing the whole result.
     """
-    results = session.run(query)
+    events = iter_neighborhood(ids, depth=depth, max_degree=max_degree, max_nodes=max_nodes)
+    lines = (orjson.dumps(event) + b"\n" async for event in events)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
 
-    nodes_dict = {}
-    links = []
 
-    for record in results:
-        source = record["s"]
-        target = record["t"]
-        rel = record["r"]
+def _split_csv(value: Optional[str]):
+    if not value:
+        return None
+    return {item.strip() for item in value.split(",") if item.strip()}
 
-        # 2. Process Nodes (Use a Dict to prevent Duplicates)
-        # Neo4j Node Objects can be accessed like dicts for properties
-        s_id = source.get("id", "Unknown")
-        t_id = target.get("id", "Unknown")
 
-        # Get the Label (e.g., "Company", "Person") for coloring
-        s_label = list(source.labels)[0] if source.labels else "Entity"
-        t_label = list(target.labels)[0] if target.labels else "Entity"
+# Scrapes triggered during start-up (kept referenced until they finish)
+_deferred_scrapes = set()
 
-        nodes_dict[s_id] = {"id": s_id, "group": s_label}
-        nodes_dict[t_id] = {"id": t_id, "group": t_label}
 
-        # 3. Process Edges
-        links.append({
-            "source": s_id,
-            "target": t_id,
-            "relationship": rel.type,
-            "sentiment": rel.get("sentiment", "Neutral")
-        })
+async def _scrape_when_ready():
+    if await readiness.wait(None):
+        await _run_scrape()
 
-    session.close()
 
-    # Convert nodes dict back to list
-    return {
-        "nodes": list(nodes_dict.values()),
-        "links": links
-    }
+async def _run_scrape():
+    if settings.INGEST_QUEUE_ENABLED:
+        queued = await asyncio.to_thread(enqueue_latest_news)
+        return {"status": "success", "queued": queued, "jobs": job_queue.stats()}
+
+    # Same async pipeline as the scheduler, so the event loop stays free
+    stats = await run_etl_pipeline()
+
+    return {"status": "success", "processed": stats["extracted"]}
 
 
 @app.get("/trigger-scrape-secure-xyz")
-def trigger_scrape():
+async def trigger_scrape():
     """
     Public endpoint that an external Cron Job service can hit 
-    to wake up the server and run the ETL pipeline.
+    to wake up the server and queue new articles for the workers
+    (or run the ETL pipeline in-process when the queue is disabled).
+    On a cold start it answers 202 right away and runs once start-up is done.
     """
-    print("⏰ Manual Scrape Triggered...")
-    articles = fetch_latest_news()
-
-    processed_count = 0
-    for article in articles:
-        full_text = f"{article['title']}. {article['summary']}"
-        # Deduplication check is handled inside save_graph logic or extraction
-        graph_data = extract_graph_from_text(full_text)
-        if graph_data:
-            save_graph_to_neo4j(graph_data)
-            processed_count += 1
-
-    return {"status": "success", "processed": processed_count}
+    logger.info("⏰ Manual Scrape Triggered...")
+    if not readiness.ready:
+        task = asyncio.create_task(_scrape_when_ready())
+        _deferred_scrapes.add(task)
+        task.add_done_callback(_deferred_scrapes.discard)
+        return JSONResponse({"status": "accepted", "ready": False}, status_code=202)
+    return await _run_scrape()
 
 
 if __name__ == "__main__":
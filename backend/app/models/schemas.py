@@ -16,4 +16,12 @@ class Edge(BaseModel):
 # The final output we expect from the LLM
 class GraphData(BaseModel):
     nodes: List[Node]
-    edges: List[Edge]
\ No newline at end of file
+    edges: List[Edge]
+
+# One article's graph inside a batched extraction
+class ArticleGraph(GraphData):
+    index: int  # Position of the article in the batch prompt
+
+# Output of a batched extraction: one GraphData per article
+class BatchGraphData(BaseModel):
+    articles: List[ArticleGraph]
\ No newline at end of file
@@ -0,0 +1,96 @@
+import logging
+import threading
+import time
+from typing import Iterable, List, Optional, Set
+
+from app.core.bloom import BloomFilter
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.temporal import now_ts
+from app.services.extraction_cache import content_hash
+from app.services.graph_backends import primary_store
+# The Article node key is the job key, so a job and its Article share one id
+from app.services.job_queue import job_key as article_url
+
+logger = logging.getLogger(__name__)
+
+
+def article_row(article: dict, entities: Iterable[str]) -> dict:
+    """The write-path row for one Article node and the entities it MENTIONS."""
+    return {
+        "url": article_url(article),
+        "title": article.get("title", ""),
+        "content_hash": content_hash(f"{article.get('title', '')}. {article.get('summary', '')}"),
+        "published": article.get("published_ts"),
+        "ingested_at": now_ts(),
+        "entities": sorted(set(entities)),
+    }
+
+
+class ArticleRegistry:
+    """
+    "Was this article already ingested?" without a query per article.
+
+    A Bloom filter of every Article url sits in front of the graph: a url
+    it has never seen is new for sure, and only the rare maybe-seen ones
+    are confirmed with one bulk query for the whole batch. The filter is
+    loaded on first use, then topped up with Articles ingested since the
+    last refresh (other processes write too) at most every
+    `refresh_seconds`, plus whatever this process writes.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._synced_at: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        with self._lock:
+            if self._synced_at is not None and time.monotonic() - self._checked_at < self.refresh_seconds:
+                return
+            started = now_ts()
+            # Overlap the previous sync a little: clocks of other writers drift
+            since = None if self._synced_at is None else self._synced_at - 60
+            urls = primary_store.article_urls(since)
+            self._bloom.update(urls)
+            if since is None:
+                logger.info(f"🌸 Article filter loaded with {len(urls)} url(s).")
+            self._synced_at = started
+            self._checked_at = time.monotonic()
+
+    def add(self, urls: Iterable[str]):
+        self._bloom.update(urls)
+
+    def existing(self, urls: Iterable[str]) -> Set[str]:
+        """The subset of `urls` that already have an Article node."""
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return set()
+        self._refresh()
+
+        maybe = [url for url in urls if url in self._bloom]
+        metrics.inc("article_checks_total", len(urls) - len(maybe), result="filtered")
+        if not maybe:
+            return set()
+
+        found = primary_store.existing_articles(maybe)
+        metrics.inc("article_checks_total", len(found), result="exists")
+        metrics.inc("article_checks_total", len(maybe) - len(found), result="false_positive")
+        return found
+
+    def filter_new(self, articles: List[dict]) -> List[dict]:
+        """Drops articles that were already ingested, in one bulk check."""
+        existing = self.existing(article_url(article) for article in articles)
+        if existing:
+            logger.info(f"⏭️ Skipping {len(existing)} already-ingested article(s).")
+        return [article for article in articles if article_url(article) not in existing]
+
+
+# Create a single instance to be imported elsewhere
+article_registry = ArticleRegistry(
+    capacity=settings.ARTICLE_FILTER_CAPACITY,
+    error_rate=settings.ARTICLE_FILTER_ERROR_RATE,
+    refresh_seconds=settings.ARTICLE_FILTER_REFRESH_SECONDS,
+)
@@ -0,0 +1,211 @@
+import asyncio
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Iterable, List, Optional
+
+from app.core.config import settings
+from app.core.graph_schema import primary_label
+from app.core.temporal import TimeWindow, format_day
+from app.services.graph_backends import read_store
+
+SENTIMENT_ORDER = ("Positive", "Negative", "Neutral")
+
+
+def _summary_line(entity_id: str, group: str, degree: int, sentiment: Counter) -> str:
+    tally = ", ".join(f"{sentiment[name]} {name.lower()}" for name in SENTIMENT_ORDER if sentiment[name])
+    plural = "" if degree == 1 else "s"
+    return f"{entity_id} ({group}): {degree} relationship{plural}" + (f"; sentiment {tally}" if tally else "")
+
+
+def _relation_line(entity_id: str, record: dict) -> str:
+    """"OpenAI PARTNERS_WITH Microsoft (Positive; 3 mentions, last 2025-06-01)"""
+    sentiment = record["sentiment"] or "Neutral"
+    mentions = record.get("mention_count") or 0
+    if record["outgoing"]:
+        line = f"{entity_id} {record['relationship']} {record['neighbor']}"
+    else:
+        line = f"{record['neighbor']} {record['relationship']} {entity_id}"
+    plural = "" if mentions == 1 else "s"
+    return f"{line} ({sentiment}; {mentions} mention{plural}, last {format_day(record.get('last_seen'))})"
+
+
+class EntityContextStore:
+    """
+    Materialized GraphRAG context, so a chat lookup is a dict read instead
+    of a graph query plus string building on every request.
+
+    Per entity: a summary line (type, degree, sentiment tally), its
+    relationship lines ranked by how often they were reported and how
+    central the other endpoint is (opinionated edges first), and when it
+    last changed. The write path
+    calls `touch()` with the ids it wrote; only those entries are rebuilt,
+    lazily, on their next read.
+
+    The global digest (for questions that name no entity) covers the top
+    entities by degree, and is rebuilt at most every `digest_refresh_seconds`
+    after something changed.
+
+    Time-windowed lookups (`window=`) only count relationships reported
+    during the window; they are built per request and never cached.
+    """
+
+    def __init__(self, lines_per_entity: int, digest_entities: int, digest_lines: int,
+                 digest_refresh_seconds: float):
+        self.lines_per_entity = lines_per_entity
+        self.digest_entities = digest_entities
+        self.digest_lines = digest_lines
+        self.digest_refresh_seconds = digest_refresh_seconds
+        self._entries = {}
+        self._dirty = set()
+        self._version = 0
+        self._digest = None
+        self._digest_version = -1
+        self._digest_built_at = 0.0
+        self._lock = threading.Lock()
+
+    # --- Invalidation ---
+
+    def touch(self, ids: Iterable[str]):
+        """Marks entities whose relationships just changed."""
+        with self._lock:
+            self._dirty.update(ids)
+            self._version += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._dirty.clear()
+            self._version += 1
+
+    # --- Building ---
+
+    def _build(self, entity_id: str, window: Optional[TimeWindow] = None) -> Optional[dict]:
+        seeds = read_store.seed_nodes([entity_id])
+        if not seeds:
+            return None
+
+        records = read_store.neighborhood_hop([entity_id], settings.CONTEXT_MAX_EDGES_SCANNED)
+        if window:
+            records = [r for r in records if window.overlaps(r.get("first_seen"), r.get("last_seen"))]
+        degrees = read_store.degrees(list({r["neighbor"] for r in records} | {entity_id}))
+
+        sentiment = Counter()
+        ranked = []
+        for record in records:
+            relation_sentiment = record["sentiment"] or "Neutral"
+            sentiment[relation_sentiment] += 1
+            score = (relation_sentiment != "Neutral", record.get("mention_count") or 0,
+                     degrees.get(record["neighbor"], 0))
+            ranked.append((score, _relation_line(entity_id, record)))
+
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        # Inside a window the degree is what happened in it
+        degree = len(records) if window else degrees.get(entity_id, len(records))
+        return {
+            "id": entity_id,
+            "group": primary_label(seeds[0]["labels"]),
+            "degree": degree,
+            "sentiment": dict(sentiment),
+            "summary": _summary_line(entity_id, primary_label(seeds[0]["labels"]), degree, sentiment),
+            "lines": [line for _, line in ranked[:self.lines_per_entity]],
+            "updated_at": time.time(),
+        }
+
+    def get(self, entity_id: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(entity_id)
+            if entry is not None and entity_id not in self._dirty:
+                return entry
+            self._dirty.discard(entity_id)
+
+        entry = self._build(entity_id)
+        with self._lock:
+            if entry is None:
+                self._entries.pop(entity_id, None)
+            else:
+                self._entries[entity_id] = entry
+        return entry
+
+    def context_for(self, names: List[str], window: Optional[TimeWindow] = None) -> str:
+        blocks = []
+        for name in names:
+            entry = self._build(name, window) if window else self.get(name)
+            if entry and entry["lines"]:
+                blocks.append("\n".join([entry["summary"], *entry["lines"]]))
+        return "\n\n".join(blocks)
+
+    def digest(self, window: Optional[TimeWindow] = None) -> str:
+        """Top entities by degree, each with its strongest relationships."""
+        if window:
+            return self._window_digest(window)
+
+        now = time.monotonic()
+        with self._lock:
+            fresh = self._digest is not None and (
+                self._digest_version == self._version
+                or now - self._digest_built_at < self.digest_refresh_seconds)
+            if fresh:
+                return self._digest
+            version = self._version
+
+        blocks = []
+        for top in read_store.top_entities(self.digest_entities):
+            if not top["degree"]:
+                break
+            entry = self.get(top["id"])
+            if entry:
+                blocks.append("\n".join([entry["summary"], *entry["lines"][:self.digest_lines]]))
+        digest = "\n\n".join(blocks)
+
+        with self._lock:
+            self._digest = digest
+            self._digest_version = version
+            self._digest_built_at = now
+        return digest
+
+    def _window_digest(self, window: TimeWindow) -> str:
+        """
+        The digest restricted to a time window, built from one scan of the
+        relationships reported in it: entities ranked by how many of those
+        they take part in, each with its most mentioned ones.
+        """
+        by_entity = defaultdict(list)
+        groups = {}
+        for row in read_store.window_edges(window, settings.CONTEXT_WINDOW_MAX_EDGES):
+            for entity_id, labels, neighbor, outgoing in (
+                    (row["source"], row["source_labels"], row["target"], True),
+                    (row["target"], row["target_labels"], row["source"], False)):
+                groups[entity_id] = primary_label(labels)
+                by_entity[entity_id].append({**row, "neighbor": neighbor, "outgoing": outgoing})
+
+        top = sorted(by_entity.items(), key=lambda item: len(item[1]), reverse=True)[:self.digest_entities]
+        blocks = []
+        for entity_id, records in top:
+            sentiment = Counter(r["sentiment"] or "Neutral" for r in records)
+            records.sort(key=lambda r: ((r["sentiment"] or "Neutral") != "Neutral", r.get("mention_count") or 0),
+                         reverse=True)
+            lines = [_relation_line(entity_id, r) for r in records[:self.digest_lines]]
+            blocks.append("\n".join([_summary_line(entity_id, groups[entity_id], len(records), sentiment), *lines]))
+        return "\n\n".join(blocks)
+
+    # The read store may be Neo4j: keep blocking reads off the event loop
+    # unless it's the in-memory backend
+    async def acontext_for(self, names: List[str], window: Optional[TimeWindow] = None) -> str:
+        if read_store.name == "memory":
+            return self.context_for(names, window)
+        return await asyncio.to_thread(self.context_for, names, window)
+
+    async def adigest(self, window: Optional[TimeWindow] = None) -> str:
+        if read_store.name == "memory":
+            return self.digest(window)
+        return await asyncio.to_thread(self.digest, window)
+
+
+# Create a single instance to be imported elsewhere
+context_store = EntityContextStore(
+    lines_per_entity=settings.CONTEXT_LINES_PER_ENTITY,
+    digest_entities=settings.CONTEXT_DIGEST_ENTITIES,
+    digest_lines=settings.CONTEXT_DIGEST_LINES,
+    digest_refresh_seconds=settings.CONTEXT_DIGEST_REFRESH_SECONDS,
+)
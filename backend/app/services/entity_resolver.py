@@ -0,0 +1,270 @@
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Iterable, Optional
+
+from app.core.config import settings
+from app.services.graph_backends import read_store
+from app.models.schemas import Edge, GraphData, Node
+
+logger = logging.getLogger(__name__)
+
+# Dropped from names before comparing ("Nvidia Corp" -> "nvidia")
+CORPORATE_SUFFIXES = {"inc", "corp", "corporation", "co", "ltd", "llc", "plc", "company", "group", "the"}
+# Generic product nouns ("Blackwell B200 GPU" -> "blackwell b200"), kept when a
+# model number follows them ("Model 3")
+GENERIC_WORDS = {"gpu", "chip", "model", "models", "series"}
+
+# Question words that should never start or end an entity mention
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "did", "do", "does", "for", "from",
+    "has", "have", "how", "in", "is", "it", "of", "on", "or", "the", "to", "was", "were",
+    "what", "when", "where", "which", "who", "whom", "why", "with", "about", "tell", "me",
+    "i", "we", "our", "you", "he", "she", "him", "her", "his", "its", "they", "my",
+    "if", "so", "but", "not",
+}
+
+# Mentions this short only match an id spelled with the same casing
+# ("us" is not "US", "ai" is not "AI")
+SHORT_MENTION_LENGTH = 3
+
+_NON_ALNUM = re.compile(r"[^0-9a-z.]+")
+_WORD = re.compile(r"[\w.&'-]+")
+_TRAILING_ZERO_VERSION = re.compile(r"^(\d+)\.0+$")
+
+
+def _is_generic(tokens: list, i: int) -> bool:
+    # A generic noun followed by a model number is part of the name ("Model 3")
+    if tokens[i] not in GENERIC_WORDS:
+        return False
+    return i + 1 == len(tokens) or not tokens[i + 1][0].isdigit()
+
+
+def _name_tokens(name: str) -> list:
+    text = unicodedata.normalize("NFKC", name).lower()
+    tokens = []
+    for token in _NON_ALNUM.sub(" ", text).split():
+        token = token.strip(".")
+        token = _TRAILING_ZERO_VERSION.sub(r"\1", token)
+        if token:
+            tokens.append(token)
+
+    core = [
+        t for i, t in enumerate(tokens)
+        if t not in CORPORATE_SUFFIXES and not _is_generic(tokens, i)
+    ]
+    # Never normalize a name down to nothing ("The Company")
+    return core or tokens
+
+
+def normalize_name(name: str) -> str:
+    """
+    Deterministic canonical key for an entity mention.
+    Mirrors the rules in the extraction prompt so they hold even when
+    the LLM forgets them: case/punctuation-insensitive, corporate suffixes
+    and generic product nouns removed, "2.0" -> "2", and word order
+    ignored ("B200 Blackwell" == "Blackwell B200").
+    """
+    return " ".join(sorted(_name_tokens(name)))
+
+
+def compact_name(name: str) -> str:
+    """Spacing-insensitive key in original word order ("Open AI" == "OpenAI")."""
+    return "".join(_name_tokens(name))
+
+
+def _trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _numeric_tokens(key: str) -> frozenset:
+    return frozenset(t for t in key.split() if any(c.isdigit() for c in t))
+
+
+class EntityResolver:
+    """
+    In-memory alias index mapping entity mentions to canonical node ids.
+
+    Lookups go: exact id -> explicit alias -> normalized key -> compact
+    key -> fuzzy trigram match. Fuzzy matches must clear `threshold` (Dice similarity
+    on character trigrams) and agree on every token containing a digit,
+    so "Llama 3" never collapses into "Llama 4".
+    """
+
+    def __init__(self, threshold: float, aliases_path: Optional[str] = None):
+        self.threshold = threshold
+        self.aliases_path = aliases_path
+        self._ids = set()                      # canonical ids
+        self._by_key = {}                      # normalized key -> canonical id
+        self._aliases = {}                     # normalized alias -> canonical id
+        self._by_compact = {}                  # compact key -> canonical id
+        self._key_of = {}                      # canonical id -> normalized key
+        self._gram_count = {}                  # canonical id -> number of trigrams
+        self._trigram_index = defaultdict(set)  # trigram -> canonical ids
+        self._lock = threading.Lock()
+        self._load_aliases()
+
+    def _load_aliases(self):
+        """Optional hand-curated aliases, e.g. {"MSFT": "Microsoft"}."""
+        if not self.aliases_path or not os.path.exists(self.aliases_path):
+            return
+        with open(self.aliases_path, "r", encoding="utf-8") as f:
+            for alias, canonical in json.load(f).items():
+                self._aliases[normalize_name(alias)] = canonical
+
+    def __len__(self):
+        return len(self._ids)
+
+    # --- Index maintenance ---
+
+    def _add_locked(self, canonical_id: str):
+        if canonical_id in self._ids:
+            return
+        key = normalize_name(canonical_id)
+        self._ids.add(canonical_id)
+        self._key_of[canonical_id] = key
+        # First id registered for a key stays canonical
+        self._by_key.setdefault(key, canonical_id)
+        self._by_compact.setdefault(compact_name(canonical_id), canonical_id)
+        grams = _trigrams(key)
+        self._gram_count[canonical_id] = len(grams)
+        for gram in grams:
+            self._trigram_index[gram].add(canonical_id)
+
+    def add(self, canonical_id: str):
+        with self._lock:
+            self._add_locked(canonical_id)
+
+    def add_many(self, canonical_ids: Iterable[str]):
+        with self._lock:
+            for canonical_id in canonical_ids:
+                self._add_locked(canonical_id)
+
+    def load_from_graph(self):
+        """Seeds the index with every node id already in the graph."""
+        self.add_many(read_store.node_ids())
+        logger.info(f"🧭 Entity index loaded: {len(self)} canonical ids.")
+
+    # --- Lookups ---
+
+    def _fuzzy_locked(self, key: str) -> Optional[str]:
+        grams = _trigrams(key)
+        shared = Counter()
+        for gram in grams:
+            for candidate in self._trigram_index.get(gram, ()):
+                shared[candidate] += 1
+
+        numbers = _numeric_tokens(key)
+        best_id, best_score = None, 0.0
+        for candidate, overlap in shared.items():
+            score = 2 * overlap / (len(grams) + self._gram_count[candidate])
+            if score < self.threshold or score <= best_score:
+                continue
+            if _numeric_tokens(self._key_of[candidate]) != numbers:
+                continue
+            best_id, best_score = candidate, score
+        return best_id
+
+    def lookup(self, mention: str) -> Optional[str]:
+        """Returns the canonical id for a mention, or None if it's unknown."""
+        if mention in self._ids:
+            return mention
+        key = normalize_name(mention)
+        with self._lock:
+            return (self._aliases.get(key)
+                    or self._by_key.get(key)
+                    or self._by_compact.get(compact_name(mention))
+                    or self._fuzzy_locked(key))
+
+    def find_mentions(self, text: str, max_words: int = 5) -> list:
+        """
+        Finds known entities mentioned in free text (e.g. a chat question)
+        by looking up its word n-grams, longest first, without any LLM.
+        Returns canonical ids in order of appearance.
+        """
+        words = [w.strip(".'-") for w in _WORD.findall(text)]
+        found = {}
+        i = 0
+        while i < len(words):
+            matched = False
+            for size in range(min(max_words, len(words) - i), 0, -1):
+                span = words[i:i + size]
+                if span[0].lower() in STOPWORDS or span[-1].lower() in STOPWORDS:
+                    continue
+                mention = " ".join(span)
+                if len(mention) < 2:
+                    continue
+                canonical_id = self.lookup(mention)
+                if len(mention) <= SHORT_MENTION_LENGTH and canonical_id != mention:
+                    continue
+                if canonical_id is not None:
+                    found.setdefault(canonical_id, i)
+                    i += size
+                    matched = True
+                    break
+            if not matched:
+                i += 1
+        return sorted(found, key=found.get)
+
+    def resolve(self, mention: str) -> str:
+        """
+        Maps a mention to its canonical id, registering it as a new
+        canonical id when nothing matches.
+        """
+        canonical_id = self.lookup(mention)
+        if canonical_id is not None:
+            return canonical_id
+        with self._lock:
+            # Another worker may have registered the same key meanwhile
+            key = normalize_name(mention)
+            canonical_id = self._by_key.get(key)
+            if canonical_id is None:
+                self._add_locked(mention)
+                canonical_id = mention
+        return canonical_id
+
+    def resolve_graph(self, graph_data: GraphData) -> GraphData:
+        """Rewrites an extracted graph onto canonical ids, deduplicating nodes and edges."""
+        mapping = {}
+        mentions = [node.id for node in graph_data.nodes]
+        for edge in graph_data.edges:
+            mentions.extend((edge.source, edge.target))
+        for mention in mentions:
+            if mention not in mapping:
+                mapping[mention] = self.resolve(mention)
+
+        nodes = {}
+        for node in graph_data.nodes:
+            canonical_id = mapping[node.id]
+            nodes.setdefault(canonical_id, Node(id=canonical_id, type=node.type))
+
+        edges = {}
+        for edge in graph_data.edges:
+            source, target = mapping[edge.source], mapping[edge.target]
+            if source == target and edge.source != edge.target:
+                # Two mentions of the same entity; not a real self-loop
+                continue
+            edges[(source, edge.relationship, target)] = Edge(
+                source=source, target=target,
+                relationship=edge.relationship, sentiment=edge.sentiment)
+
+        return GraphData(nodes=list(nodes.values()), edges=list(edges.values()))
+
+
+# Create a single instance to be imported elsewhere
+entity_resolver = EntityResolver(
+    threshold=settings.ENTITY_FUZZY_THRESHOLD,
+    aliases_path=os.path.join(settings.DATA_DIR, "entity_aliases.json"),
+)
+
+
+def resolve_entities(graph_data: GraphData) -> GraphData:
+    """Canonicalization step between extraction and save_graph_to_neo4j."""
+    if not graph_data or not settings.ENTITY_RESOLUTION_ENABLED:
+        return graph_data
+    return entity_resolver.resolve_graph(graph_data)
@@ -0,0 +1,148 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Optional
+
+from app.core.config import settings
+from app.models.schemas import GraphData
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form of an article body for hashing.
+    RSS feeds re-serialize the same entry with different whitespace and
+    unicode forms between runs; those shouldn't count as new content.
+    """
+    text = unicodedata.normalize("NFKC", text)
+    return " ".join(text.split())
+
+
+def content_hash(text: str) -> str:
+    """Stable hash of an article's normalized text."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """
+    Persistent (SQLite) cache of LLM extraction results.
+
+    Keys combine the article's content hash with a version tag for the
+    prompt and model, so editing the prompt or switching models naturally
+    invalidates old entries. Entries expire after `ttl_seconds`, and the
+    least recently used rows are evicted once `max_entries` is exceeded.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Shared between the event loop and worker threads, guarded by _lock
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS extraction_cache (
+                    key TEXT PRIMARY KEY,
+                    graph_json TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_extraction_cache_accessed "
+                "ON extraction_cache (accessed_at)")
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def make_key(text: str, version: str) -> str:
+        return f"{version}:{content_hash(text)}"
+
+    def get(self, key: str) -> Optional[GraphData]:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT graph_json, created_at FROM extraction_cache WHERE key = ?",
+                (key,)).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            graph_json, created_at = row
+            if now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM extraction_cache WHERE key = ?", (key,))
+                conn.commit()
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            conn.execute(
+                "UPDATE extraction_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+
+        return GraphData.model_validate_json(graph_json)
+
+    def put(self, key: str, graph_data: GraphData):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO extraction_cache (key, graph_json, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, graph_data.model_dump_json(), now, now))
+            self._evict(conn, now)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        # 1. Drop expired rows
+        cursor = conn.execute(
+            "DELETE FROM extraction_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        self.evictions += cursor.rowcount
+
+        # 2. Enforce the size cap, least recently used first
+        count = conn.execute("SELECT count(*) FROM extraction_cache").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            cursor = conn.execute("""
+                DELETE FROM extraction_cache WHERE key IN (
+                    SELECT key FROM extraction_cache ORDER BY accessed_at LIMIT ?
+                )
+            """, (overflow,))
+            self.evictions += cursor.rowcount
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Create a single instance to be imported elsewhere
+extraction_cache = ExtractionCache(
+    path=os.path.join(settings.DATA_DIR, "extraction_cache.sqlite3"),
+    ttl_seconds=settings.EXTRACTION_CACHE_TTL_HOURS * 3600,
+    max_entries=settings.EXTRACTION_CACHE_MAX_ENTRIES,
+)
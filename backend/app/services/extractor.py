@@ -1,58 +1,244 @@
-from langchain_groq import ChatGroq
+import asyncio
+import hashlib
+import logging
+from typing import List, Optional
 from app.core.config import settings
-from app.models.schemas import GraphData
-from langchain_core.prompts import ChatPromptTemplate
+from app.core.metrics import metrics
+from app.models.schemas import BatchGraphData, GraphData
+from app.services.extraction_cache import extraction_cache
+from app.services.llm_gateway import BACKGROUND, LazyRunnable, chat_model, llm_gateway, text_tokens
 
 
-llm = ChatGroq(
-    api_key=settings.GROQ_API_KEY,
-    model="llama-3.3-70b-versatile",  # Powerful model for logic
-    temperature=0
-)
+logger = logging.getLogger(__name__)
 
-structured_llm = llm.with_structured_output(GraphData)
+MODEL_NAME = "llama-3.3-70b-versatile"  # Powerful model for logic
 
 
-def extract_graph_from_text(text: str):
-    system_prompt = """
-    You are an expert Knowledge Graph Engineer. 
-    Your goal is to extract structured data and enforce strict entity resolution.
-
-    CRITICAL RULES FOR DEDUPLICATION:
-    1. **Normalize Names (Companies/People)**:
-       - "Microsoft Corp", "MSFT" -> "Microsoft"
-       - "Sam Altman", "Samuel Altman" -> "Sam Altman"
-       - "Nvidia Corp" -> "Nvidia"
-    
-    2. **Standardize Product Names (The "Blackwell" Rule)**:
-       - ALWAYS use the format: [Brand/Series] [Model]
-       - "B200 Blackwell" -> "Blackwell B200"
-       - "Blackwell B200 GPU" -> "Blackwell B200"
-       - "Gemini 2.0" -> "Gemini 2"
-       - "Llama 4 model" -> "Llama 4"
-    
-    3. **Standardize Relationships (Verbs)**:
-       - "Fired", "Dismissed", "Removed", "Ousted" -> "FIRED"
-       - "Hired", "Appointed", "Recruited", "Joined" -> "HIRED"
-       - "Sued", "Filed Lawsuit" -> "SUED"
-       - "Invested", "Bought stake" -> "INVESTED_IN"
-       - "Launched", "Released", "Unveiled" -> "LAUNCHED"
-       - "Partnered" -> "PARTNERED_WITH"
-
-    Return JSON with 'nodes' and 'edges'.
-    """
+SYSTEM_PROMPT = """
+You are an expert Knowledge Graph Engineer. 
+Your goal is to extract structured data and enforce strict entity resolution.
+
+CRITICAL RULES FOR DEDUPLICATION:
+1. **Normalize Names (Companies/People)**:
+   - "Microsoft Corp", "MSFT" -> "Microsoft"
+   - "Sam Altman", "Samuel Altman" -> "Sam Altman"
+   - "Nvidia Corp" -> "Nvidia"
+
+2. **Standardize Product Names (The "Blackwell" Rule)**:
+   - ALWAYS use the format: [Brand/Series] [Model]
+   - "B200 Blackwell" -> "Blackwell B200"
+   - "Blackwell B200 GPU" -> "Blackwell B200"
+   - "Gemini 2.0" -> "Gemini 2"
+   - "Llama 4 model" -> "Llama 4"
+
+3. **Standardize Relationships (Verbs)**:
+   - "Fired", "Dismissed", "Removed", "Ousted" -> "FIRED"
+   - "Hired", "Appointed", "Recruited", "Joined" -> "HIRED"
+   - "Sued", "Filed Lawsuit" -> "SUED"
+   - "Invested", "Bought stake" -> "INVESTED_IN"
+   - "Launched", "Released", "Unveiled" -> "LAUNCHED"
+   - "Partnered" -> "PARTNERED_WITH"
+
+Return JSON with 'nodes' and 'edges'.
+"""
+
+def _structured_chain(system_prompt: str, schema):
+    from langchain_core.prompts import ChatPromptTemplate
 
     prompt = ChatPromptTemplate.from_messages([
         ("system", system_prompt),
         ("human", "{input_text}"),
     ])
+    # Shared client; every call goes through llm_gateway as BACKGROUND work
+    return prompt | chat_model(MODEL_NAME).with_structured_output(schema)
+
+
+# Built on first use and shared by the sync and async entry points
+chain = LazyRunnable(lambda: _structured_chain(SYSTEM_PROMPT, GraphData))
+
+# System prompt size, charged against the tokens-per-minute budget
+PROMPT_TOKENS = text_tokens(SYSTEM_PROMPT)
+
+# Cache entries are only valid for the prompt + model that produced them
+EXTRACTION_VERSION = f"{MODEL_NAME}:{hashlib.sha256(SYSTEM_PROMPT.encode()).hexdigest()[:12]}"
+
+
+def _cached_extraction(text: str):
+    """Returns (cache_key, cached GraphData or None)."""
+    if not settings.EXTRACTION_CACHE_ENABLED:
+        return None, None
+    key = extraction_cache.make_key(text, EXTRACTION_VERSION)
+    cached = extraction_cache.get(key)
+    metrics.inc("cache_requests_total", cache="extraction", result="hit" if cached is not None else "miss")
+    return key, cached
+
+
+async def _acached_extraction(text: str):
+    """_cached_extraction off the event loop (the cache is SQLite)."""
+    if not settings.EXTRACTION_CACHE_ENABLED:
+        return None, None
+    return await asyncio.to_thread(_cached_extraction, text)
 
-    chain = prompt | structured_llm
+
+async def _acache_put(key: str, graph_data):
+    await asyncio.to_thread(extraction_cache.put, key, graph_data)
+
+
+def extract_graph_from_text(text: str):
+    key, cached = _cached_extraction(text)
+    if cached is not None:
+        return cached
 
     try:
         # Run the AI
-        response = chain.invoke({"input_text": text})
-        return response
+        with metrics.span("extract_llm"):
+            response = llm_gateway.invoke(
+                chain, {"input_text": text}, priority=BACKGROUND, base_tokens=PROMPT_TOKENS)
+    except Exception as e:
+        # Only after the gateway's retries are spent
+        logger.error(f"AI Extraction Error ({type(e).__name__}): {e}")
+        return None
+
+    if key and response:
+        extraction_cache.put(key, response)
+    return response
+
+
+async def aextract_graph_from_text(text: str, limiter=None):
+    """
+    Async twin of extract_graph_from_text, used by the ETL pipeline so
+    several extractions can be in flight without blocking the event loop.
+    `limiter` (anything with an async `wait()`) only throttles real LLM
+    calls; cache hits return immediately.
+    """
+    key, cached = await _acached_extraction(text)
+    if cached is not None:
+        return cached
+
+    if limiter is not None:
+        await limiter.wait()
+
+    try:
+        with metrics.span("extract_llm"):
+            response = await llm_gateway.ainvoke(
+                chain, {"input_text": text}, priority=BACKGROUND, base_tokens=PROMPT_TOKENS)
     except Exception as e:
-        print(f"AI Extraction Error: {e}")
+        logger.error(f"AI Extraction Error ({type(e).__name__}): {e}")
         return None
+
+    if key and response:
+        await _acache_put(key, response)
+    return response
+
+
+# --- Batch extraction: one system prompt, several articles ---
+
+BATCH_INSTRUCTIONS = """
+You will receive SEVERAL articles, each prefixed with its index like [0], [1], ...
+Extract a separate graph for EVERY article and return JSON with an 'articles'
+list; each item has the article's 'index' plus its own 'nodes' and 'edges'.
+Never mix entities from different articles in one item.
+"""
+
+batch_chain = LazyRunnable(lambda: _structured_chain(SYSTEM_PROMPT + BATCH_INSTRUCTIONS, BatchGraphData))
+
+# Per-article share of a batch prompt: its text plus the index header
+_ARTICLE_OVERHEAD_TOKENS = 8
+
+
+def pack_batches(texts: List[str], token_budget: int, max_articles: int) -> List[List[int]]:
+    """
+    Greedily packs article indices into batches that stay under
+    `token_budget` estimated tokens and `max_articles` items. An article
+    larger than the budget on its own gets a batch to itself.
+    """
+    batches, current, current_tokens = [], [], 0
+    for i, text in enumerate(texts):
+        tokens = text_tokens(text) + _ARTICLE_OVERHEAD_TOKENS
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_articles):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def _extract_batch(texts: List[str], limiter=None) -> List[Optional[GraphData]]:
+    """One LLM call for a packed batch; slots it couldn't fill come back as None."""
+    if limiter is not None:
+        await limiter.wait()
+
+    input_text = "\n\n".join(f"[{i}] {text}" for i, text in enumerate(texts))
+    results: List[Optional[GraphData]] = [None] * len(texts)
+
+    try:
+        with metrics.span("extract_llm_batch"):
+            response = await llm_gateway.ainvoke(
+                batch_chain, {"input_text": input_text}, priority=BACKGROUND,
+                base_tokens=PROMPT_TOKENS + text_tokens(BATCH_INSTRUCTIONS))
+    except Exception as e:
+        logger.error(f"AI Batch Extraction Error ({len(texts)} articles): {e}")
+        return results
+
+    for item in response.articles if response else []:
+        # Ignore indices the model invented or repeated
+        if 0 <= item.index < len(texts) and results[item.index] is None:
+            results[item.index] = GraphData(nodes=item.nodes, edges=item.edges)
+    return results
+
+
+async def aextract_graphs_batch(texts: List[str], limiter=None) -> List[Optional[GraphData]]:
+    """
+    Extracts many articles with as few LLM calls as possible.
+    Cache hits are served first; the misses are packed into token-budgeted
+    batches. Articles a batch failed to return are retried with the
+    single-article extractor. Output is aligned with `texts`.
+    """
+    results: List[Optional[GraphData]] = [None] * len(texts)
+    keys = [None] * len(texts)
+    misses = []
+
+    # One trip off the event loop for every lookup
+    lookups = await asyncio.to_thread(lambda: [_cached_extraction(text) for text in texts])
+    for i, (key, cached) in enumerate(lookups):
+        keys[i], results[i] = key, cached
+        if cached is None:
+            misses.append(i)
+
+    if not misses:
+        return results
+
+    batches = pack_batches(
+        [texts[i] for i in misses],
+        settings.EXTRACT_BATCH_TOKEN_BUDGET,
+        settings.EXTRACT_BATCH_MAX_ARTICLES,
+    )
+
+    async def run_batch(batch: List[int]):
+        indices = [misses[j] for j in batch]
+        if len(indices) == 1:
+            i = indices[0]
+            results[i] = await aextract_graph_from_text(texts[i], limiter=limiter)
+            return
+
+        batch_results = await _extract_batch([texts[i] for i in indices], limiter=limiter)
+        fallbacks = []
+        for i, graph_data in zip(indices, batch_results):
+            if graph_data is None:
+                fallbacks.append(i)
+                continue
+            results[i] = graph_data
+            if keys[i]:
+                await _acache_put(keys[i], graph_data)
+
+        if fallbacks:
+            logger.info(f"↩️ Retrying {len(fallbacks)} article(s) one by one.")
+            retried = await asyncio.gather(
+                *[aextract_graph_from_text(texts[i], limiter=limiter) for i in fallbacks])
+            for i, graph_data in zip(fallbacks, retried):
+                results[i] = graph_data
+
+    await asyncio.gather(*[run_batch(batch) for batch in batches])
+    return results
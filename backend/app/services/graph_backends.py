@@ -0,0 +1,755 @@
+import heapq
+import logging
+import threading
+from array import array
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+from app.core.config import settings
+from app.core.database import neo4j_conn
+from app.core.graph_schema import (
+    ARTICLE_LABEL, ENTITY_LABEL, LAYOUT_STATE_LABEL, MENTIONS, ensure_relationship_indexes, primary_label,
+)
+from app.core.temporal import TimeWindow, history_entry, parse_history_entry
+
+logger = logging.getLogger(__name__)
+
+SENTIMENTS = ["Neutral", "Positive", "Negative"]
+_SENTIMENT_CODES = {name: code for code, name in enumerate(SENTIMENTS)}
+
+
+def _chunks(rows: list, size: int):
+    """Yields successive slices of `rows` with at most `size` items."""
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+class GraphStore:
+    """
+    Read/write interface over the knowledge graph.
+
+    Writes arrive pre-grouped from the write path:
+      nodes_by_label: {label: [{"id", "first_seen", "last_seen"}]}
+      edges_by_type:  {relationship: [{"source_id", "target_id", "sentiment",
+                                       "first_seen", "last_seen", "mentions", "history", "sources"}]}
+      articles:       [{"url", "title", "content_hash", "published", "ingested_at", "entities"}]
+    Timestamps are epoch seconds; writes widen [first_seen, last_seen],
+    add to mention_count and append to the sentiment history and to the
+    edge's source article urls. Each article becomes an :Article node
+    that MENTIONS the entities extracted from it.
+    Edge rows are returned as dicts with source, source_labels,
+    relationship, sentiment, first_seen, last_seen, mention_count,
+    sentiment_history, sources, target, target_labels.
+    """
+
+    name = "abstract"
+
+    def upsert(self, nodes_by_label: dict, edges_by_type: dict, batch_size: int,
+               articles: Optional[List[dict]] = None):
+        raise NotImplementedError
+
+    def node_ids(self) -> List[str]:
+        raise NotImplementedError
+
+    def node_count(self) -> int:
+        raise NotImplementedError
+
+    def sample_nodes(self, limit: int) -> List[dict]:
+        """A few {"id", "labels"} records, for diagnostics."""
+        raise NotImplementedError
+
+    def node_rows(self) -> List[dict]:
+        """Every entity as {"id", "labels", "first_seen", "last_seen"}, linked or not."""
+        raise NotImplementedError
+
+    def edge_rows(self) -> List[dict]:
+        raise NotImplementedError
+
+    def seed_nodes(self, ids: List[str]) -> List[dict]:
+        """{"id", "labels"} for the ids that exist."""
+        raise NotImplementedError
+
+    def neighborhood_hop(self, frontier: List[str], max_degree: int) -> List[dict]:
+        """
+        One BFS hop: up to `max_degree` relationships per frontier node, as
+        {"id", "relationship", "sentiment", "first_seen", "last_seen",
+        "mention_count", "outgoing", "neighbor", "neighbor_labels"}.
+        """
+        raise NotImplementedError
+
+    def window_edges(self, window: TimeWindow, limit: int) -> List[dict]:
+        """
+        Up to `limit` edge rows (edge_rows shape, without history) whose
+        [first_seen, last_seen] overlaps `window`, most recent first.
+        """
+        raise NotImplementedError
+
+    def degrees(self, ids: List[str]) -> Dict[str, int]:
+        """Relationship count (both directions) per existing id."""
+        raise NotImplementedError
+
+    def top_entities(self, limit: int) -> List[dict]:
+        """The `limit` highest-degree nodes as {"id", "labels", "degree"}."""
+        raise NotImplementedError
+
+    def article_urls(self, since: Optional[int] = None) -> List[str]:
+        """Every Article url, or those ingested at/after `since`."""
+        raise NotImplementedError
+
+    def existing_articles(self, urls: List[str]) -> Set[str]:
+        """The subset of `urls` that have an Article node."""
+        raise NotImplementedError
+
+    def article_rows(self, since: Optional[int] = None) -> List[dict]:
+        """Articles (ingested at/after `since`) as write-path rows, with the ids they mention."""
+        raise NotImplementedError
+
+    def article_sources(self, ids: List[str], limit: int) -> List[dict]:
+        """Newest articles mentioning any of `ids`, as {"url", "title", "published"}."""
+        raise NotImplementedError
+
+    def save_layout(self, rows: List[dict], batch_size: int, version: int):
+        """Stores x / y / z, degree, pagerank and community on each node, and `version` with them."""
+        raise NotImplementedError
+
+    def node_layout(self) -> List[dict]:
+        """The rows last passed to save_layout (nodes that have a position)."""
+        raise NotImplementedError
+
+    def layout_version(self) -> Optional[int]:
+        """The `version` last passed to save_layout (None: never saved). Cheap to poll."""
+        raise NotImplementedError
+
+    # Async variants; backends with real I/O override these
+    async def aseed_nodes(self, ids: List[str]) -> List[dict]:
+        return self.seed_nodes(ids)
+
+    async def aneighborhood_hop(self, frontier: List[str], max_degree: int) -> List[dict]:
+        return self.neighborhood_hop(frontier, max_degree)
+
+
+# --- Neo4j ---
+
+def _write_batches(tx, nodes_by_label: dict, edges_by_type: dict, batch_size: int, articles: List[dict]):
+    """Runs inside one explicit write transaction."""
+    # 1. Save Nodes (one UNWIND per label)
+    for label, rows in nodes_by_label.items():
+        # MERGE on the indexed :Entity id, then tag the type label.
+        # We use backticks ` ` around the type to handle spaces/special chars safely
+        query = f"""
+        UNWIND $rows AS row
+        MERGE (n:{ENTITY_LABEL} {{id: row.id}})
+        SET n:`{label}`
+        SET n.first_seen = CASE WHEN n.first_seen IS NULL OR row.first_seen < n.first_seen
+                                THEN row.first_seen ELSE n.first_seen END,
+            n.last_seen = CASE WHEN n.last_seen IS NULL OR row.last_seen > n.last_seen
+                               THEN row.last_seen ELSE n.last_seen END
+        """
+        for batch in _chunks(rows, batch_size):
+            tx.run(query, rows=batch).consume()
+
+    # 2. Save Edges (one UNWIND per relationship type)
+    for relationship, rows in edges_by_type.items():
+        # Note: We match by ID only (an index seek on :Entity), so we don't need to know the Type here.
+        # SET items apply in order: sentiment is compared against the old last_seen,
+        # so an older article arriving late doesn't overwrite a newer sentiment.
+        query = f"""
+        UNWIND $rows AS row
+        MATCH (s:{ENTITY_LABEL} {{id: row.source_id}})
+        MATCH (t:{ENTITY_LABEL} {{id: row.target_id}})
+        MERGE (s)-[r:`{relationship}`]->(t)
+        SET r.sentiment = CASE WHEN r.last_seen IS NULL OR row.last_seen >= r.last_seen
+                               THEN row.sentiment ELSE r.sentiment END,
+            r.first_seen = CASE WHEN r.first_seen IS NULL OR row.first_seen < r.first_seen
+                                THEN row.first_seen ELSE r.first_seen END,
+            r.last_seen = CASE WHEN r.last_seen IS NULL OR row.last_seen > r.last_seen
+                               THEN row.last_seen ELSE r.last_seen END,
+            r.mention_count = coalesce(r.mention_count, 0) + row.mentions,
+            r.sentiment_history = (coalesce(r.sentiment_history, []) + row.history)[-$history_limit..],
+            r.sources = (coalesce(r.sources, [])
+                         + [url IN row.sources WHERE NOT url IN coalesce(r.sources, [])])[-$sources_limit..]
+        """
+        for batch in _chunks(rows, batch_size):
+            tx.run(query, rows=batch, history_limit=settings.EDGE_HISTORY_LIMIT,
+                   sources_limit=settings.EDGE_SOURCES_LIMIT).consume()
+
+    # 3. Save source Articles and what they mention
+    query = f"""
+    UNWIND $rows AS row
+    MERGE (a:{ARTICLE_LABEL} {{url: row.url}})
+    SET a.title = row.title, a.content_hash = row.content_hash, a.published = row.published,
+        a.ingested_at = coalesce(a.ingested_at, row.ingested_at)
+    WITH a, row
+    UNWIND row.entities AS entity_id
+    MATCH (e:{ENTITY_LABEL} {{id: entity_id}})
+    MERGE (a)-[:{MENTIONS}]->(e)
+    """
+    for batch in _chunks(articles, batch_size):
+        tx.run(query, rows=batch).consume()
+
+
+class Neo4jGraphStore(GraphStore):
+    name = "neo4j"
+
+    SEED_QUERY = f"""
+    UNWIND $ids AS node_id
+    MATCH (n:{ENTITY_LABEL} {{id: node_id}})
+    RETURN n.id AS id, labels(n) AS labels
+    """
+
+    # The subquery caps how many relationships are followed per node, so
+    # hubs like "OpenAI" can't explode the result.
+    HOP_QUERY = f"""
+    UNWIND $frontier AS node_id
+    MATCH (n:{ENTITY_LABEL} {{id: node_id}})
+    CALL {{
+        WITH n
+        MATCH (n)-[r]-(m:{ENTITY_LABEL})
+        RETURN r, m
+        LIMIT $max_degree
+    }}
+    RETURN n.id AS id, type(r) AS relationship, r.sentiment AS sentiment,
+           r.first_seen AS first_seen, r.last_seen AS last_seen, r.mention_count AS mention_count,
+           startNode(r) = n AS outgoing, m.id AS neighbor, labels(m) AS neighbor_labels
+    """
+
+    # An edge is written together with both endpoints, so a node's last_seen
+    # is never older than its edges': the :Entity(last_seen) range index
+    # narrows the scan before relationships are expanded.
+    WINDOW_QUERY = f"""
+    MATCH (s:{ENTITY_LABEL})
+    WHERE s.last_seen >= $start
+    MATCH (s)-[r]->(t:{ENTITY_LABEL})
+    WHERE r.last_seen >= $start AND r.first_seen <= $end
+    RETURN s.id AS source, labels(s) AS source_labels,
+           type(r) AS relationship, r.sentiment AS sentiment,
+           r.first_seen AS first_seen, r.last_seen AS last_seen, r.mention_count AS mention_count,
+           t.id AS target, labels(t) AS target_labels
+    ORDER BY r.last_seen DESC
+    LIMIT $limit
+    """
+
+    DEGREE_QUERY = f"""
+    UNWIND $ids AS node_id
+    MATCH (n:{ENTITY_LABEL} {{id: node_id}})
+    RETURN n.id AS id, COUNT {{ (n)--(:{ENTITY_LABEL}) }} AS degree
+    """
+
+    TOP_QUERY = f"""
+    MATCH (n:{ENTITY_LABEL})
+    WITH n, COUNT {{ (n)--(:{ENTITY_LABEL}) }} AS degree
+    ORDER BY degree DESC
+    LIMIT $limit
+    RETURN n.id AS id, labels(n) AS labels, degree
+    """
+
+    ARTICLE_SOURCES_QUERY = f"""
+    UNWIND $ids AS entity_id
+    MATCH (:{ENTITY_LABEL} {{id: entity_id}})<-[:{MENTIONS}]-(a:{ARTICLE_LABEL})
+    WITH DISTINCT a
+    ORDER BY a.published DESC
+    LIMIT $limit
+    RETURN a.url AS url, a.title AS title, a.published AS published
+    """
+
+    def upsert(self, nodes_by_label: dict, edges_by_type: dict, batch_size: int,
+               articles: Optional[List[dict]] = None):
+        # Schema commands can't run inside the write transaction
+        ensure_relationship_indexes(edges_by_type.keys())
+        neo4j_conn.write_transaction(_write_batches, nodes_by_label, edges_by_type, batch_size, articles or [])
+
+    def node_ids(self) -> List[str]:
+        records = neo4j_conn.read(f"MATCH (n:{ENTITY_LABEL}) RETURN DISTINCT n.id AS id")
+        return [record["id"] for record in records]
+
+    def node_count(self) -> int:
+        return neo4j_conn.read(f"MATCH (n:{ENTITY_LABEL}) RETURN count(n) AS count")[0]["count"]
+
+    def sample_nodes(self, limit: int) -> List[dict]:
+        return neo4j_conn.read("MATCH (n) RETURN n.id AS id, labels(n) AS labels LIMIT $limit", limit=limit)
+
+    def node_rows(self) -> List[dict]:
+        return neo4j_conn.read(f"""
+        MATCH (n:{ENTITY_LABEL})
+        RETURN n.id AS id, labels(n) AS labels, n.first_seen AS first_seen, n.last_seen AS last_seen
+        """)
+
+    def edge_rows(self) -> List[dict]:
+        return neo4j_conn.read(f"""
+        MATCH (s:{ENTITY_LABEL})-[r]->(t:{ENTITY_LABEL})
+        RETURN s.id AS source, labels(s) AS source_labels,
+               type(r) AS relationship, r.sentiment AS sentiment,
+               r.first_seen AS first_seen, r.last_seen AS last_seen,
+               r.mention_count AS mention_count, r.sentiment_history AS sentiment_history,
+               r.sources AS sources,
+               t.id AS target, labels(t) AS target_labels
+        """)
+
+    def seed_nodes(self, ids: List[str]) -> List[dict]:
+        return neo4j_conn.read(self.SEED_QUERY, ids=ids)
+
+    def neighborhood_hop(self, frontier: List[str], max_degree: int) -> List[dict]:
+        return neo4j_conn.read(self.HOP_QUERY, frontier=frontier, max_degree=max_degree)
+
+    def window_edges(self, window: TimeWindow, limit: int) -> List[dict]:
+        start = window.start if window.start is not None else 0
+        end = window.end if window.end is not None else 2 ** 62
+        return neo4j_conn.read(self.WINDOW_QUERY, start=start, end=end, limit=limit)
+
+    def degrees(self, ids: List[str]) -> Dict[str, int]:
+        return {r["id"]: r["degree"] for r in neo4j_conn.read(self.DEGREE_QUERY, ids=ids)}
+
+    def top_entities(self, limit: int) -> List[dict]:
+        return neo4j_conn.read(self.TOP_QUERY, limit=limit)
+
+    def article_urls(self, since: Optional[int] = None) -> List[str]:
+        if since is None:
+            records = neo4j_conn.read(f"MATCH (a:{ARTICLE_LABEL}) RETURN a.url AS url")
+        else:
+            records = neo4j_conn.read(
+                f"MATCH (a:{ARTICLE_LABEL}) WHERE a.ingested_at >= $since RETURN a.url AS url", since=since)
+        return [record["url"] for record in records]
+
+    def existing_articles(self, urls: List[str]) -> Set[str]:
+        records = neo4j_conn.read(
+            f"UNWIND $urls AS url MATCH (a:{ARTICLE_LABEL} {{url: url}}) RETURN a.url AS url", urls=urls)
+        return {record["url"] for record in records}
+
+    def article_sources(self, ids: List[str], limit: int) -> List[dict]:
+        return neo4j_conn.read(self.ARTICLE_SOURCES_QUERY, ids=ids, limit=limit)
+
+    def article_rows(self, since: Optional[int] = None) -> List[dict]:
+        return neo4j_conn.read(f"""
+        MATCH (a:{ARTICLE_LABEL})
+        WHERE $since IS NULL OR a.ingested_at >= $since
+        OPTIONAL MATCH (a)-[:{MENTIONS}]->(e:{ENTITY_LABEL})
+        RETURN a.url AS url, a.title AS title, a.content_hash AS content_hash,
+               a.published AS published, a.ingested_at AS ingested_at, collect(e.id) AS entities
+        """, since=since)
+
+    def save_layout(self, rows: List[dict], batch_size: int, version: int):
+        query = f"""
+        UNWIND $rows AS row
+        MATCH (n:{ENTITY_LABEL} {{id: row.id}})
+        SET n.x = row.x, n.y = row.y, n.z = row.z,
+            n.degree = row.degree, n.pagerank = row.pagerank, n.community = row.community
+        """
+
+        def work(tx):
+            for batch in _chunks(rows, batch_size):
+                tx.run(query, rows=batch).consume()
+            # Same transaction: readers never see a version without its positions
+            tx.run(f"MERGE (s:{LAYOUT_STATE_LABEL}) SET s.version = $version", version=version).consume()
+
+        neo4j_conn.write_transaction(work)
+
+    def node_layout(self) -> List[dict]:
+        return neo4j_conn.read(f"""
+        MATCH (n:{ENTITY_LABEL})
+        WHERE n.x IS NOT NULL
+        RETURN n.id AS id, n.x AS x, n.y AS y, n.z AS z,
+               n.degree AS degree, n.pagerank AS pagerank, n.community AS community
+        """)
+
+    def layout_version(self) -> Optional[int]:
+        records = neo4j_conn.read(f"MATCH (s:{LAYOUT_STATE_LABEL}) RETURN s.version AS version")
+        return records[0]["version"] if records else None
+
+    async def aseed_nodes(self, ids: List[str]) -> List[dict]:
+        return await neo4j_conn.aread(self.SEED_QUERY, ids=ids)
+
+    async def aneighborhood_hop(self, frontier: List[str], max_degree: int) -> List[dict]:
+        return await neo4j_conn.aread(self.HOP_QUERY, frontier=frontier, max_degree=max_degree)
+
+
+# --- In-memory ---
+
+class InMemoryGraphStore(GraphStore):
+    """
+    Compact in-process graph.
+
+    Node ids are interned to ints; labels and relationship types are
+    interned to small ints. Edges live in parallel typed arrays
+    (source, target, type, sentiment, first/last seen, mentions) and each
+    node keeps arrays of its outgoing / incoming edge numbers, so neighbor
+    scans never touch Python objects per edge. Sentiment history is one
+    int64 array per edge, packed as `ts * 4 + sentiment code`; a
+    timestamp of 0 means "unknown". Article urls are interned too: nodes
+    and edges keep arrays of article numbers (mentions / sources). Used standalone (GRAPH_BACKEND=memory) or as
+    a read replica of Neo4j kept in sync by the write path.
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # Nodes
+        self._ids: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._node_label = array("H")
+        self._node_first = array("q")
+        self._node_last = array("q")
+        self._label_names: List[str] = []
+        self._label_codes: Dict[str, int] = {}
+        self._out: List[array] = []
+        self._in: List[array] = []
+        self._node_articles: List[array] = []
+        # Edges
+        self._src = array("i")
+        self._dst = array("i")
+        self._rel = array("H")
+        self._sentiment = array("b")
+        self._first = array("q")
+        self._last = array("q")
+        self._mentions = array("I")
+        self._history: List[array] = []
+        self._sources: List[array] = []
+        self._rel_names: List[str] = []
+        self._rel_codes: Dict[str, int] = {}
+        self._edge_index: Dict[tuple, int] = {}
+        # Articles: url -> number; metadata is None for urls only seen as edge sources
+        self._article_urls: List[str] = []
+        self._article_index: Dict[str, int] = {}
+        self._article_meta: List[Optional[tuple]] = []  # (title, content_hash, published, ingested_at)
+        # Last saved layout rows (the layout job already keeps them compact)
+        self._layout: List[dict] = []
+        self._layout_version: Optional[int] = None
+
+    # --- Interning ---
+
+    @staticmethod
+    def _intern(name: str, names: List[str], codes: Dict[str, int]) -> int:
+        code = codes.get(name)
+        if code is None:
+            code = codes[name] = len(names)
+            names.append(name)
+        return code
+
+    def _node(self, node_id: str, label: Optional[str]) -> int:
+        index = self._index.get(node_id)
+        if index is None:
+            index = self._index[node_id] = len(self._ids)
+            self._ids.append(node_id)
+            self._node_label.append(self._intern(label or ENTITY_LABEL, self._label_names, self._label_codes))
+            self._node_first.append(0)
+            self._node_last.append(0)
+            self._out.append(array("i"))
+            self._in.append(array("i"))
+            self._node_articles.append(array("i"))
+        return index
+
+    def _article(self, url: str) -> int:
+        index = self._article_index.get(url)
+        if index is None:
+            index = self._article_index[url] = len(self._article_urls)
+            self._article_urls.append(url)
+            self._article_meta.append(None)
+        return index
+
+    def _merge_sources(self, current: array, urls: Iterable[str]) -> array:
+        for url in urls or ():
+            article = self._article(url)
+            if article not in current:
+                current.append(article)
+        return current[-settings.EDGE_SOURCES_LIMIT:]
+
+    def _seen(self, index: int, first_seen: Optional[int], last_seen: Optional[int]):
+        if first_seen and (not self._node_first[index] or first_seen < self._node_first[index]):
+            self._node_first[index] = first_seen
+        if last_seen and last_seen > self._node_last[index]:
+            self._node_last[index] = last_seen
+
+    @staticmethod
+    def _pack_history(entries: Iterable[str]) -> array:
+        packed = array("q")
+        for entry in entries or ():
+            ts, sentiment = parse_history_entry(entry)
+            packed.append(ts * 4 + _SENTIMENT_CODES[sentiment])
+        return packed
+
+    def _history_entries(self, edge: int) -> List[str]:
+        return [history_entry(value >> 2, SENTIMENTS[value & 3]) for value in self._history[edge]]
+
+    def _edge(self, source: int, relationship: str, target: int, row: dict, replace: bool = False):
+        """
+        Merges a write-path row into the edge (widening its time span), or
+        with `replace` takes the row's values as-is (loading edge_rows).
+        """
+        rel = self._intern(relationship, self._rel_names, self._rel_codes)
+        code = _SENTIMENT_CODES.get(row.get("sentiment") or "Neutral", 0)
+        first_seen = row.get("first_seen") or 0
+        last_seen = row.get("last_seen") or 0
+        history = self._pack_history(row.get("sentiment_history" if replace else "history"))
+        mentions = row.get("mention_count" if replace else "mentions") or 0
+
+        key = (source, rel, target)
+        edge = self._edge_index.get(key)
+        if edge is None:
+            edge = self._edge_index[key] = len(self._src)
+            self._src.append(source)
+            self._dst.append(target)
+            self._rel.append(rel)
+            self._sentiment.append(code)
+            self._first.append(first_seen)
+            self._last.append(last_seen)
+            self._mentions.append(mentions)
+            self._history.append(history[-settings.EDGE_HISTORY_LIMIT:])
+            self._sources.append(self._merge_sources(array("i"), row.get("sources")))
+            self._out[source].append(edge)
+            self._in[target].append(edge)
+            return
+
+        if replace:
+            self._sentiment[edge] = code
+            self._first[edge] = first_seen
+            self._last[edge] = last_seen
+            self._mentions[edge] = mentions
+            self._history[edge] = history[-settings.EDGE_HISTORY_LIMIT:]
+            self._sources[edge] = self._merge_sources(array("i"), row.get("sources"))
+            return
+
+        if last_seen >= self._last[edge]:
+            self._sentiment[edge] = code
+            self._last[edge] = last_seen
+        if first_seen and (not self._first[edge] or first_seen < self._first[edge]):
+            self._first[edge] = first_seen
+        self._mentions[edge] += mentions
+        self._history[edge] = (self._history[edge] + history)[-settings.EDGE_HISTORY_LIMIT:]
+        self._sources[edge] = self._merge_sources(self._sources[edge], row.get("sources"))
+
+    # --- Writes ---
+
+    def upsert(self, nodes_by_label: dict, edges_by_type: dict, batch_size: int = 0,
+               articles: Optional[List[dict]] = None):
+        with self._lock:
+            for label, rows in nodes_by_label.items():
+                for row in rows:
+                    self._seen(self._node(row["id"], label), row.get("first_seen"), row.get("last_seen"))
+
+            for relationship, rows in edges_by_type.items():
+                for row in rows:
+                    # Same semantics as the Neo4j MATCH: both endpoints must exist
+                    source = self._index.get(row["source_id"])
+                    target = self._index.get(row["target_id"])
+                    if source is None or target is None:
+                        continue
+                    self._edge(source, relationship, target, row)
+
+            for row in articles or ():
+                article = self._article(row["url"])
+                previous = self._article_meta[article]
+                ingested_at = previous[3] if previous else row["ingested_at"]
+                self._article_meta[article] = (row["title"], row["content_hash"], row["published"], ingested_at)
+                for entity_id in row["entities"]:
+                    index = self._index.get(entity_id)
+                    if index is not None and article not in self._node_articles[index]:
+                        self._node_articles[index].append(article)
+
+    def load_rows(self, nodes: Iterable[dict], rows: Iterable[dict], articles: Iterable[dict] = ()):
+        """Bulk-loads node_rows, edge_rows and article_rows as another store returned them."""
+        with self._lock:
+            for row in nodes:
+                self._seen(self._node(row["id"], primary_label(row["labels"])),
+                           row.get("first_seen"), row.get("last_seen"))
+            for row in rows:
+                source = self._node(row["source"], primary_label(row["source_labels"]))
+                target = self._node(row["target"], primary_label(row["target_labels"]))
+                self._edge(source, row["relationship"], target, row, replace=True)
+                for index in (source, target):
+                    self._seen(index, row.get("first_seen"), row.get("last_seen"))
+            self.upsert({}, {}, articles=list(articles))
+
+    def warm_from(self, store: GraphStore):
+        self.load_rows(store.node_rows(), store.edge_rows(), store.article_rows())
+        logger.info(f"🧊 In-memory graph warmed: {len(self._ids)} nodes, {len(self._src)} edges, "
+                    f"{len(self._article_urls)} articles.")
+
+    # --- Reads ---
+
+    def _edge_parts(self, edge: int):
+        return (self._ids[self._src[edge]], self._rel_names[self._rel[edge]],
+                SENTIMENTS[self._sentiment[edge]], self._ids[self._dst[edge]])
+
+    def _labels(self, index: int) -> List[str]:
+        return [self._label_names[self._node_label[index]]]
+
+    def _edge_row(self, edge: int) -> dict:
+        source, relationship, sentiment, target = self._edge_parts(edge)
+        return {
+            "source": source, "source_labels": self._labels(self._src[edge]),
+            "relationship": relationship, "sentiment": sentiment,
+            "first_seen": self._first[edge] or None, "last_seen": self._last[edge] or None,
+            "mention_count": self._mentions[edge],
+            "target": target, "target_labels": self._labels(self._dst[edge]),
+        }
+
+    def node_ids(self) -> List[str]:
+        with self._lock:
+            return list(self._ids)
+
+    def node_rows(self) -> List[dict]:
+        with self._lock:
+            return [
+                {"id": node_id, "labels": self._labels(i),
+                 "first_seen": self._node_first[i] or None, "last_seen": self._node_last[i] or None}
+                for i, node_id in enumerate(self._ids)
+            ]
+
+    def node_count(self) -> int:
+        return len(self._ids)
+
+    def edge_count(self) -> int:
+        return len(self._src)
+
+    def sample_nodes(self, limit: int) -> List[dict]:
+        with self._lock:
+            return [{"id": self._ids[i], "labels": self._labels(i)} for i in range(min(limit, len(self._ids)))]
+
+    def edge_rows(self) -> List[dict]:
+        with self._lock:
+            rows = []
+            for edge in range(len(self._src)):
+                row = self._edge_row(edge)
+                row["sentiment_history"] = self._history_entries(edge)
+                row["sources"] = [self._article_urls[article] for article in self._sources[edge]]
+                rows.append(row)
+            return rows
+
+    def window_edges(self, window: TimeWindow, limit: int) -> List[dict]:
+        with self._lock:
+            matching = (
+                edge for edge in range(len(self._src))
+                if window.overlaps(self._first[edge] or None, self._last[edge] or None)
+            )
+            recent = heapq.nlargest(limit, matching, key=self._last.__getitem__)
+            return [self._edge_row(edge) for edge in recent]
+
+    def seed_nodes(self, ids: List[str]) -> List[dict]:
+        with self._lock:
+            return [{"id": i, "labels": self._labels(self._index[i])} for i in ids if i in self._index]
+
+    def neighborhood_hop(self, frontier: List[str], max_degree: int) -> List[dict]:
+        records = []
+        with self._lock:
+            for node_id in frontier:
+                index = self._index.get(node_id)
+                if index is None:
+                    continue
+                taken = 0
+                for edges, outgoing in ((self._out[index], True), (self._in[index], False)):
+                    for edge in edges:
+                        if taken >= max_degree:
+                            break
+                        neighbor = self._dst[edge] if outgoing else self._src[edge]
+                        records.append({
+                            "id": node_id,
+                            "relationship": self._rel_names[self._rel[edge]],
+                            "sentiment": SENTIMENTS[self._sentiment[edge]],
+                            "first_seen": self._first[edge] or None,
+                            "last_seen": self._last[edge] or None,
+                            "mention_count": self._mentions[edge],
+                            "outgoing": outgoing,
+                            "neighbor": self._ids[neighbor],
+                            "neighbor_labels": self._labels(neighbor),
+                        })
+                        taken += 1
+        return records
+
+    def degrees(self, ids: List[str]) -> Dict[str, int]:
+        with self._lock:
+            return {
+                node_id: len(self._out[index]) + len(self._in[index])
+                for node_id in ids
+                if (index := self._index.get(node_id)) is not None
+            }
+
+    def top_entities(self, limit: int) -> List[dict]:
+        with self._lock:
+            top = heapq.nlargest(limit, range(len(self._ids)), key=lambda i: len(self._out[i]) + len(self._in[i]))
+            return [
+                {"id": self._ids[i], "labels": self._labels(i), "degree": len(self._out[i]) + len(self._in[i])}
+                for i in top
+            ]
+
+    def article_urls(self, since: Optional[int] = None) -> List[str]:
+        with self._lock:
+            return [
+                url for url, meta in zip(self._article_urls, self._article_meta)
+                if meta is not None and (since is None or meta[3] >= since)
+            ]
+
+    def existing_articles(self, urls: List[str]) -> Set[str]:
+        with self._lock:
+            return {
+                url for url in urls
+                if (article := self._article_index.get(url)) is not None and self._article_meta[article] is not None
+            }
+
+    def article_rows(self, since: Optional[int] = None) -> List[dict]:
+        with self._lock:
+            mentions = defaultdict(list)
+            for index, articles in enumerate(self._node_articles):
+                for article in articles:
+                    mentions[article].append(self._ids[index])
+            return [
+                {"url": url, "title": meta[0], "content_hash": meta[1], "published": meta[2],
+                 "ingested_at": meta[3], "entities": mentions[article]}
+                for article, (url, meta) in enumerate(zip(self._article_urls, self._article_meta))
+                if meta is not None and (since is None or meta[3] >= since)
+            ]
+
+    def save_layout(self, rows: List[dict], batch_size: int = 0, version: int = 0):
+        self._layout = list(rows)
+        self._layout_version = version
+
+    def node_layout(self) -> List[dict]:
+        return list(self._layout)
+
+    def layout_version(self) -> Optional[int]:
+        return self._layout_version
+
+    def article_sources(self, ids: List[str], limit: int) -> List[dict]:
+        with self._lock:
+            articles = {
+                article
+                for node_id in ids if (index := self._index.get(node_id)) is not None
+                for article in self._node_articles[index]
+            }
+            newest = heapq.nlargest(limit, articles, key=lambda a: self._article_meta[a][2] or 0)
+            return [
+                {"url": self._article_urls[a], "title": self._article_meta[a][0], "published": self._article_meta[a][2]}
+                for a in newest
+            ]
+
+
+# --- Wiring ---
+
+def _build_stores():
+    """
+    GRAPH_BACKEND=memory  -> standalone in-memory graph (no database needed)
+    GRAPH_BACKEND=neo4j   -> Neo4j, optionally fronted by an in-memory
+                             read replica (GRAPH_READ_REPLICA)
+    """
+    if settings.GRAPH_BACKEND == "memory":
+        store = InMemoryGraphStore()
+        return store, store
+    primary = Neo4jGraphStore()
+    return primary, (InMemoryGraphStore() if settings.GRAPH_READ_REPLICA else primary)
+
+
+# Where writes go, and where reads are answered from
+primary_store, read_store = _build_stores()
+
+
+def has_read_replica() -> bool:
+    return read_store is not primary_store
+
+
+def warm_read_replica():
+    """Loads the replica from Neo4j at startup; no-op without one."""
+    if has_read_replica():
+        read_store.warm_from(primary_store)
+
+
+def uses_neo4j() -> bool:
+    return isinstance(primary_store, Neo4jGraphStore)
@@ -0,0 +1,318 @@
+import asyncio
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, Set
+
+from app.core.config import settings
+from app.core.graph_schema import primary_label
+from app.core.temporal import TimeWindow, now_ts
+from app.services.graph_backends import has_read_replica, primary_store, read_store
+from app.services.context_store import context_store
+from app.services.entity_resolver import entity_resolver
+from app.services.vector_index import vector_index
+
+logger = logging.getLogger(__name__)
+
+# Articles are re-synced from this long before the previous sync started
+# (covers write transactions still in flight back then)
+_ARTICLE_SYNC_OVERLAP_SECONDS = 60
+
+# A timed re-sync dropped because of a concurrent write is retried after this long
+_RESYNC_RETRY_SECONDS = 1.0
+
+LINK_FIELDS = ("source", "target", "relationship", "sentiment", "first_seen", "last_seen", "mention_count")
+
+
+class GraphSnapshot:
+    """
+    In-process copy of the graph served by /graph.
+
+    It is loaded from the primary graph store once, then patched by the write path
+    (`apply`) instead of re-scanning the database on every page load.
+    Every node and link is stamped with the snapshot `version` in which it
+    was added or last changed, which powers the `?since=` delta mode.
+    Links are kept in insertion order so integer cursors stay stable.
+    Links also carry first_seen / last_seen / mention_count, so `?from=&to=`
+    windows are a filter over the same log.
+
+    Writes from other processes (workers) arrive through a full re-sync
+    every `ttl_seconds`: on a timer (`run`) and, failing that, on the next
+    read. A re-sync also refreshes the read replica (entities, edges and
+    new Articles) and the chat indexes. In-process writes run inside
+    `writing()`: a re-sync that overlaps one is dropped (its rows may
+    predate the write) and tried again later.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self.loaded = False
+        self._expires_at = 0.0
+        self._articles_synced_at: Optional[int] = None
+        self._writes_in_flight = 0
+        self._write_epoch = 0     # In-process writes started so far
+        self.nodes = {}        # id -> {"id", "group", "version"}
+        self.links = {}        # (source, relationship, target) -> link dict
+        self._link_keys = []   # insertion order, for cursor pagination
+        self._lock = threading.RLock()
+
+    # --- Loading ---
+
+    def _fetch(self):
+        """Everything a re-sync needs, read from the primary store."""
+        # Always from the primary store: the re-sync exists to catch
+        # writes made by other processes, which a replica never saw
+        started = now_ts()
+        rows = primary_store.edge_rows()
+        nodes = articles = None
+        if has_read_replica():
+            nodes = primary_store.node_rows()
+            since = self._articles_synced_at
+            articles = primary_store.article_rows(since - _ARTICLE_SYNC_OVERLAP_SECONDS if since else None)
+        return started, rows, nodes, articles
+
+    def _sync(self, fetched: tuple):
+        started, rows, nodes, articles = fetched
+        if nodes is not None:
+            read_store.load_rows(nodes, rows, articles)
+            node_ids = [row["id"] for row in nodes]
+            entity_resolver.add_many(node_ids)
+            vector_index.add(node_ids)
+        vector_index.add_edge_rows(rows)
+        self._articles_synced_at = started
+        self._merge_rows(rows)
+        self.loaded = True
+        self._expires_at = time.monotonic() + self.ttl_seconds
+
+    def _ensure_fresh(self):
+        """Loads on first use and re-syncs after the TTL (catches out-of-process writes)."""
+        if self.loaded and time.monotonic() < self._expires_at:
+            return
+        with self._lock:
+            if self.loaded and (time.monotonic() < self._expires_at or self._writes_in_flight):
+                return
+            self._sync(self._fetch())
+
+    def resync(self) -> bool:
+        """
+        Full re-sync now; reads go on against the old copy while the rows
+        load. Returns False if an in-process write overlapped it (nothing
+        is replaced then: the rows could be older than that write).
+        """
+        with self._lock:
+            if self._writes_in_flight:
+                return False
+            epoch = self._write_epoch
+        fetched = self._fetch()
+        with self._lock:
+            if self._writes_in_flight or self._write_epoch != epoch:
+                logger.debug("⏭️ Graph snapshot re-sync overlapped a write; dropped.")
+                return False
+            self._sync(fetched)
+        return True
+
+    @contextmanager
+    def writing(self):
+        """Wraps an in-process write to the primary store, up to its `apply`."""
+        with self._lock:
+            self._writes_in_flight += 1
+            self._write_epoch += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._writes_in_flight -= 1
+
+    async def run(self, stop: asyncio.Event):
+        """Re-syncs every `ttl_seconds`, so idle processes pick up workers' writes too."""
+        delay = self.ttl_seconds
+        while True:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=delay)
+                return
+            except asyncio.TimeoutError:
+                pass
+            delay = self.ttl_seconds
+            try:
+                if not await asyncio.to_thread(self.resync):
+                    # Overlapped a write: try again soon rather than a whole TTL later
+                    delay = min(self.ttl_seconds, _RESYNC_RETRY_SECONDS)
+            except Exception as e:
+                logger.error(f"❌ Graph snapshot re-sync failed: {e}")
+
+    def _merge_rows(self, rows: list):
+        """Merges a full scan into the snapshot, only re-stamping what changed."""
+        # The initial load is version 0; later re-syncs stamp what they add
+        version = self.version + 1 if self.loaded else self.version
+        changed = False
+        touched = set()
+
+        for row in rows:
+            for node_id, labels in ((row["source"], row["source_labels"]), (row["target"], row["target_labels"])):
+                node_id = node_id or "Unknown"
+                group = primary_label(labels)
+                changed |= self._upsert_node(node_id, group, version)
+
+            source, target = row["source"] or "Unknown", row["target"] or "Unknown"
+            temporal = {k: row.get(k) for k in ("first_seen", "last_seen", "mention_count")}
+            if self._upsert_link(source, row["relationship"], target, row["sentiment"] or "Neutral", version,
+                                 temporal, replace=True):
+                changed = True
+                touched.update((source, target))
+
+        if changed:
+            self.version = version
+        # Writes from other processes (workers) reach the chat context here
+        if self.loaded and touched:
+            context_store.touch(touched)
+
+    # --- Patching from the write path ---
+
+    def _upsert_node(self, node_id: str, group: str, version: int) -> bool:
+        if node_id in self.nodes:
+            return False
+        self.nodes[node_id] = {"id": node_id, "group": group, "version": version}
+        return True
+
+    def _upsert_link(self, source: str, relationship: str, target: str, sentiment: str, version: int,
+                     temporal: dict, replace: bool = False) -> bool:
+        """
+        `temporal` holds first_seen / last_seen / mention_count. A full scan
+        (`replace`) carries the stored values; a write-path row is merged
+        in like the database does: span widened, mentions added.
+        """
+        key = (source, relationship, target)
+        link = self.links.get(key)
+        if link is None:
+            self.links[key] = {
+                "source": source,
+                "target": target,
+                "relationship": relationship,
+                "sentiment": sentiment,
+                "first_seen": temporal["first_seen"],
+                "last_seen": temporal["last_seen"],
+                "mention_count": temporal["mention_count"] or 0,
+                "version": version,
+            }
+            self._link_keys.append(key)
+            return True
+
+        if replace:
+            updated = {"sentiment": sentiment, **temporal, "mention_count": temporal["mention_count"] or 0}
+        else:
+            first_seen, last_seen = temporal["first_seen"], temporal["last_seen"]
+            newer = link["last_seen"] is None or last_seen >= link["last_seen"]
+            updated = {
+                "sentiment": sentiment if newer else link["sentiment"],
+                "first_seen": first_seen if link["first_seen"] is None else min(link["first_seen"], first_seen),
+                "last_seen": last_seen if newer else link["last_seen"],
+                "mention_count": link["mention_count"] + temporal["mention_count"],
+            }
+        if all(link[k] == v for k, v in updated.items()):
+            return False
+        link.update(updated)
+        link["version"] = version
+        return True
+
+    def apply(self, nodes_by_label: dict, edges_by_type: dict):
+        """
+        Patches the snapshot with rows that were just committed by
+        save_graphs_to_neo4j. A snapshot that was never loaded only bumps
+        its version (other caches key on it); it will pick the rows up on
+        its first read.
+        """
+        with self._lock:
+            if not self.loaded:
+                self.version += 1
+                return
+
+            version = self.version + 1
+            changed = False
+
+            for label, rows in nodes_by_label.items():
+                for row in rows:
+                    changed |= self._upsert_node(row["id"], label, version)
+
+            for relationship, rows in edges_by_type.items():
+                for row in rows:
+                    # Neo4j only creates the edge if both endpoints exist
+                    if row["source_id"] not in self.nodes or row["target_id"] not in self.nodes:
+                        continue
+                    temporal = {"first_seen": row["first_seen"], "last_seen": row["last_seen"],
+                                "mention_count": row["mentions"]}
+                    changed |= self._upsert_link(
+                        row["source_id"], relationship, row["target_id"], row["sentiment"], version, temporal)
+
+            if changed:
+                self.version = version
+
+    def invalidate(self):
+        """Forces a re-sync with Neo4j on the next read."""
+        with self._lock:
+            self._expires_at = 0.0
+
+    # --- Reading ---
+
+    def current_version(self) -> int:
+        """The version a query would see now (re-syncs first once the TTL is up)."""
+        self._ensure_fresh()
+        return self.version
+
+    def structure(self):
+        """(version, node ids, [(source, target)]) of everything linked, for the layout job."""
+        self._ensure_fresh()
+        with self._lock:
+            edges = [(link["source"], link["target"]) for link in self.links.values()]
+            return self.version, list(self.nodes), edges
+
+    def query(self, cursor: int = 0, limit: int = 500, labels: Optional[Set[str]] = None,
+              relationships: Optional[Set[str]] = None, since: Optional[int] = None,
+              window: Optional[TimeWindow] = None) -> dict:
+        """
+        Returns one page of links (plus the nodes they touch; like the old
+        full dump, nodes without any link are not returned).
+        `cursor` is a position in the link log; pass back `next_cursor`
+        to get the next page. With `since`, only nodes/links added or
+        changed after that version are returned. With `window`, only links
+        reported during it (their first/last seen span overlaps it).
+        """
+        self._ensure_fresh()
+
+        with self._lock:
+            nodes = {}
+            links = []
+            position = max(cursor, 0)
+            total = len(self._link_keys)
+
+            while position < total and len(links) < limit:
+                link = self.links[self._link_keys[position]]
+                position += 1
+
+                if since is not None and link["version"] <= since:
+                    continue
+                if relationships and link["relationship"] not in relationships:
+                    continue
+                if window and not window.overlaps(link["first_seen"], link["last_seen"]):
+                    continue
+
+                source = self.nodes[link["source"]]
+                target = self.nodes[link["target"]]
+                if labels and (source["group"] not in labels or target["group"] not in labels):
+                    continue
+
+                nodes[source["id"]] = {"id": source["id"], "group": source["group"]}
+                nodes[target["id"]] = {"id": target["id"], "group": target["group"]}
+                links.append({k: link[k] for k in LINK_FIELDS})
+
+            return {
+                "nodes": list(nodes.values()),
+                "links": links,
+                "version": self.version,
+                "next_cursor": position if position < total else None,
+            }
+
+
+# Create a single instance to be imported elsewhere
+graph_snapshot = GraphSnapshot(ttl_seconds=settings.GRAPH_SNAPSHOT_TTL_SECONDS)
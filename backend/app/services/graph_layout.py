@@ -0,0 +1,328 @@
+import asyncio
+import logging
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.graph_backends import primary_store
+from app.services.graph_cache import graph_snapshot
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# numpy and scipy.sparse are imported inside the functions: only the
+# background job needs them, and /graph starts serving before it runs
+
+# Spring length between linked nodes, in the visualizer's units
+_SPRING = 30.0
+# Pull toward the origin, so disconnected pieces don't drift away
+_GRAVITY = 0.01
+# In an incremental run, nodes that already had a position move this much slower
+_SETTLED_MOBILITY = 0.2
+
+
+def _adjacency(size: int, src: "np.ndarray", dst: "np.ndarray", weights: Optional["np.ndarray"] = None):
+    """Symmetric CSR adjacency (duplicate pairs summed)."""
+    import numpy as np
+    from scipy import sparse
+
+    weights = np.ones(len(src), dtype=np.float64) if weights is None else weights
+    matrix = sparse.coo_matrix((weights, (src, dst)), shape=(size, size))
+    return (matrix + matrix.T).tocsr()
+
+
+def _repulsion(positions: "np.ndarray", rng: "np.random.Generator", exact_max: int, samples: int) -> "np.ndarray":
+    """
+    Coulomb-style push, k^2 / d along each pair. Exact (in row chunks, to
+    bound memory) up to `exact_max` nodes; above that, against a random
+    sample of nodes, scaled up to the full count.
+    """
+    import numpy as np
+
+    size = len(positions)
+    if size <= exact_max:
+        others, scale = positions, 1.0
+    else:
+        others, scale = positions[rng.choice(size, samples, replace=False)], size / samples
+
+    # sum_j w_ij (p_i - o_j) = p_i * sum_j w_ij - W @ o, with w_ij = k^2 / d_ij^2:
+    # two matrix products per chunk instead of an (n, m, 3) difference tensor
+    force = np.zeros_like(positions)
+    other_norms = np.einsum("ij,ij->i", others, others)
+    chunk = max(1, 4_000_000 // len(others))
+    for start in range(0, size, chunk):
+        block = positions[start:start + chunk]
+        dist2 = np.einsum("ij,ij->i", block, block)[:, None] + other_norms[None, :] - 2 * block @ others.T
+        np.maximum(dist2, 1e-2, out=dist2)
+        weights = _SPRING ** 2 / dist2
+        force[start:start + chunk] = block * weights.sum(axis=1, keepdims=True) - weights @ others
+    return force * scale
+
+
+def force_layout(positions: "np.ndarray", src: "np.ndarray", dst: "np.ndarray", iterations: int,
+                 mobility: "np.ndarray", seed: int = 0) -> "np.ndarray":
+    """
+    Vectorized 3D Fruchterman-Reingold. Attraction is d^2 / k along each
+    link, computed as one sparse product; each step is capped by a
+    temperature that cools linearly. `mobility` scales each node's step
+    (1 = free), so a warm start mostly moves newcomers.
+    """
+    import numpy as np
+
+    size = len(positions)
+    if size < 2 or iterations <= 0:
+        return positions
+    rng = np.random.default_rng(seed)
+    positions = positions.copy()
+    temperature = _SPRING * max(1.0, np.cbrt(size))
+
+    for step in range(iterations):
+        force = _repulsion(positions, rng, settings.LAYOUT_EXACT_MAX_NODES, settings.LAYOUT_REPULSION_SAMPLES)
+
+        if len(src):
+            lengths = np.linalg.norm(positions[src] - positions[dst], axis=1) / _SPRING
+            springs = _adjacency(size, src, dst, lengths)
+            # sum_j w_ij (p_j - p_i)
+            force += springs @ positions - springs.sum(axis=1).A * positions
+
+        force -= _GRAVITY * positions * np.linalg.norm(positions, axis=1, keepdims=True) / _SPRING
+
+        length = np.linalg.norm(force, axis=1, keepdims=True)
+        limit = temperature * (1 - step / iterations) * mobility[:, None]
+        positions += force / np.maximum(length, 1e-9) * np.minimum(length, limit)
+    return positions
+
+
+def pagerank(size: int, src: "np.ndarray", dst: "np.ndarray", previous: Optional["np.ndarray"] = None,
+             damping: float = 0.85, tolerance: float = 1e-8, max_iterations: int = 100) -> "np.ndarray":
+    """Power iteration over the directed links; `previous` warm-starts it."""
+    import numpy as np
+    from scipy import sparse
+
+    if size == 0:
+        return np.zeros(0)
+    out_degree = np.bincount(src, minlength=size).astype(np.float64)
+    weights = 1.0 / out_degree[src]
+    # transition[j, i] = 1 / out_degree(i) for each link i -> j
+    transition = sparse.csr_matrix((weights, (dst, src)), shape=(size, size))
+    dangling = out_degree == 0
+
+    rank = previous if previous is not None else np.full(size, 1.0 / size)
+    rank = rank / rank.sum()
+    for _ in range(max_iterations):
+        updated = damping * (transition @ rank + rank[dangling].sum() / size) + (1 - damping) / size
+        if np.abs(updated - rank).sum() < tolerance:
+            return updated
+        rank = updated
+    return rank
+
+
+def label_propagation(size: int, src: "np.ndarray", dst: "np.ndarray", previous: Optional["np.ndarray"] = None,
+                      max_iterations: int = 20) -> "np.ndarray":
+    """
+    Community ids by label propagation: each node takes the label most
+    common among its neighbors (its own counts once, which damps
+    oscillation). Label counts per node are one sparse matrix product.
+    Warm-started from `previous`; returns ids 0.. ordered by community size.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    if size == 0:
+        return np.zeros(0, dtype=np.int64)
+    labels = previous.copy() if previous is not None else np.arange(size)
+    adjacency = _adjacency(size, src, dst) + sparse.identity(size, format="csr")
+    adjacency.data[:] = 1.0
+
+    for _ in range(max_iterations):
+        # counts[i, l] = neighbors of i (and i) labelled l
+        membership = sparse.csr_matrix((np.ones(size), (np.arange(size), labels)), shape=(size, labels.max() + 1))
+        updated = np.asarray((adjacency @ membership).argmax(axis=1)).ravel()
+        if np.array_equal(updated, labels):
+            break
+        labels = updated
+
+    _, compact, counts = np.unique(labels, return_inverse=True, return_counts=True)
+    order = np.argsort(-counts, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return rank[compact]
+
+
+class GraphLayout:
+    """
+    Server-side layout and analytics for the visualizer: 3D positions,
+    degree, PageRank and community per node, served with /graph so the
+    client can render without simulating.
+
+    Recomputed off the /graph snapshot whenever its version moves, warm-
+    started from the previous result: existing nodes keep their
+    positions (and move slowly), new ones start next to a neighbor,
+    PageRank and communities resume from their last values. The process
+    that owns the scheduler computes and saves the result as node
+    properties; other processes load it from the graph store.
+
+    `version` numbers the saved layouts and is stored with them, so every
+    process serving /graph agrees on it; the others poll it and reload
+    only when it moves.
+    """
+
+    def __init__(self):
+        self.version = -1
+        self.graph_version = -1  # Snapshot version the layout was computed from
+        self._ids: List[str] = []
+        self._index: Dict[str, int] = {}
+        # numpy arrays from the first load / compute on (empty until then)
+        self._positions = []
+        self._degree = []
+        self._pagerank = []
+        self._community = []
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    # --- Computing ---
+
+    def _load_saved(self):
+        """Warm start across restarts from the properties saved last time."""
+        import numpy as np
+
+        # Version first: rows saved in between only cause one extra reload
+        version = primary_store.layout_version()
+        rows = primary_store.node_layout()
+        self._install(
+            [row["id"] for row in rows],
+            np.array([[row["x"], row["y"], row["z"]] for row in rows], dtype=np.float64).reshape(-1, 3),
+            np.array([row["degree"] or 0 for row in rows], dtype=np.int64),
+            np.array([row["pagerank"] or 0.0 for row in rows], dtype=np.float64),
+            np.array([row["community"] or 0 for row in rows], dtype=np.int64),
+            -1 if version is None else version,
+        )
+        self._loaded = True
+
+    def _install(self, ids, positions, degree, rank, community, version):
+        with self._lock:
+            self._ids = ids
+            self._index = {node_id: i for i, node_id in enumerate(ids)}
+            self._positions = positions
+            self._degree = degree
+            self._pagerank = rank
+            self._community = community
+            self.version = version
+
+    def _initial_positions(self, ids: List[str], src: "np.ndarray", dst: "np.ndarray", rng) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Known nodes keep their place; new ones go next to a placed neighbor, or anywhere."""
+        import numpy as np
+
+        size = len(ids)
+        positions = np.zeros((size, 3))
+        known = np.zeros(size, dtype=bool)
+        for i, node_id in enumerate(ids):
+            previous = self._index.get(node_id)
+            if previous is not None:
+                positions[i] = self._positions[previous]
+                known[i] = True
+
+        spread = _SPRING * max(1.0, np.cbrt(size))
+        fresh = ~known
+        positions[fresh] = rng.normal(scale=spread, size=(fresh.sum(), 3))
+        for a, b in ((src, dst), (dst, src)):
+            anchored = fresh[a] & known[b]
+            positions[a[anchored]] = positions[b[anchored]] + rng.normal(scale=_SPRING / 2, size=(anchored.sum(), 3))
+        return positions, known
+
+    def compute(self, ids: List[str], edges: List[Tuple[str, str]], graph_version: int):
+        """Recomputes everything for this node / link set (warm-started) as the next version."""
+        import numpy as np
+
+        if not self._loaded:
+            self._load_saved()
+
+        index = {node_id: i for i, node_id in enumerate(ids)}
+        pairs = np.array([(index[s], index[t]) for s, t in edges], dtype=np.int64).reshape(-1, 2)
+        src, dst = pairs[:, 0], pairs[:, 1]
+        rng = np.random.default_rng(graph_version)
+
+        positions, known = self._initial_positions(ids, src, dst, rng)
+        incremental = known.any()
+        mobility = np.where(known, _SETTLED_MOBILITY, 1.0) if incremental else np.ones(len(ids))
+        iterations = settings.LAYOUT_INCREMENTAL_ITERATIONS if incremental else settings.LAYOUT_ITERATIONS
+        positions = force_layout(positions, src, dst, iterations, mobility, seed=graph_version)
+
+        previous_rank = np.array([
+            self._pagerank[self._index[i]] if i in self._index else 1.0 / max(1, len(ids)) for i in ids])
+        rank = pagerank(len(ids), src, dst, previous_rank if incremental else None)
+
+        # New nodes start in a community of their own (ids past any old one)
+        offset = (self._community.max() + 1) if len(self._community) else 0
+        previous_labels = np.array([
+            self._community[self._index[i]] if i in self._index else offset + n for n, i in enumerate(ids)],
+            dtype=np.int64)
+        community = label_propagation(len(ids), src, dst, previous_labels if incremental else None)
+
+        degree = np.bincount(np.concatenate([src, dst]), minlength=len(ids))
+        self._install(ids, positions, degree, rank, community, self.version + 1)
+        self.graph_version = graph_version
+
+    def rows(self) -> List[dict]:
+        with self._lock:
+            return [
+                {"id": node_id, "x": float(p[0]), "y": float(p[1]), "z": float(p[2]),
+                 "degree": int(d), "pagerank": float(r), "community": int(c)}
+                for node_id, p, d, r, c in zip(self._ids, self._positions, self._degree, self._pagerank, self._community)
+            ]
+
+    def refresh(self, compute: bool) -> bool:
+        """
+        One tick of the background job. With `compute`, recomputes and
+        saves if the graph changed; otherwise reloads what the computing
+        process saved, if its version moved. Returns True if the layout changed.
+        """
+        if not compute:
+            saved = primary_store.layout_version()
+            if saved is None or saved == self.version:
+                return False
+            self._load_saved()
+            logger.info(f"🧲 Loaded layout v{self.version}.")
+            return True
+
+        graph_version, ids, edges = graph_snapshot.structure()
+        if graph_version == self.graph_version:
+            return False
+        with metrics.span("graph_layout"):
+            self.compute(ids, edges, graph_version)
+            primary_store.save_layout(self.rows(), settings.NEO4J_WRITE_BATCH_SIZE, self.version)
+        logger.info(f"🧲 Layout v{self.version} (graph v{graph_version}): {len(ids)} nodes, {len(edges)} links.")
+        return True
+
+    async def run(self, compute: bool, stop: asyncio.Event):
+        while not stop.is_set():
+            try:
+                await asyncio.to_thread(self.refresh, compute)
+            except Exception as e:
+                logger.error(f"❌ Layout refresh failed: {e}")
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=settings.LAYOUT_REFRESH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    # --- Serving ---
+
+    def decorate(self, nodes: List[dict]) -> List[dict]:
+        """Adds x / y / z, degree, pagerank and community to /graph nodes (when known)."""
+        with self._lock:
+            for node in nodes:
+                i = self._index.get(node["id"])
+                if i is None:
+                    continue
+                x, y, z = self._positions[i]
+                node.update(x=round(float(x), 2), y=round(float(y), 2), z=round(float(z), 2),
+                            degree=int(self._degree[i]), pagerank=float(self._pagerank[i]),
+                            community=int(self._community[i]))
+        return nodes
+
+
+# Create a single instance to be imported elsewhere
+graph_layout = GraphLayout()
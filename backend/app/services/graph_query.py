@@ -0,0 +1,69 @@
+from typing import AsyncIterator, List
+
+from app.core.graph_schema import primary_label
+from app.services.graph_backends import read_store
+
+
+def _node_event(node_id: str, labels: list, hop: int) -> dict:
+    return {"type": "node", "id": node_id, "group": primary_label(labels), "hop": hop}
+
+
+async def iter_neighborhood(ids: List[str], depth: int = 1, max_degree: int = 25, max_nodes: int = 1000) -> AsyncIterator[dict]:
+    """
+    Walks the k-hop subgraph around `ids` and yields it as a stream of
+    events instead of building one big dict:
+      {"type": "node", "id", "group", "hop"}
+      {"type": "link", "source", "target", "relationship", "sentiment"}
+      {"type": "end", "nodes", "links", "truncated"}
+    Each node is emitted once, before any link that references it.
+    """
+    seen_nodes = set()
+    seen_links = set()
+    truncated = False
+
+    # 1. Seeds
+    frontier = []
+    for record in await read_store.aseed_nodes(ids):
+        if record["id"] in seen_nodes:
+            continue
+        seen_nodes.add(record["id"])
+        frontier.append(record["id"])
+        yield _node_event(record["id"], record["labels"], 0)
+
+    # 2. Expand one hop at a time (each hop is bounded by frontier x max_degree)
+    for hop in range(1, depth + 1):
+        if not frontier or truncated:
+            break
+
+        next_frontier = []
+        for record in await read_store.aneighborhood_hop(frontier, max_degree):
+            neighbor = record["neighbor"]
+
+            if neighbor not in seen_nodes:
+                if len(seen_nodes) >= max_nodes:
+                    truncated = True
+                    continue
+                seen_nodes.add(neighbor)
+                next_frontier.append(neighbor)
+                yield _node_event(neighbor, record["neighbor_labels"], hop)
+
+            if record["outgoing"]:
+                source, target = record["id"], neighbor
+            else:
+                source, target = neighbor, record["id"]
+
+            key = (source, record["relationship"], target)
+            if key in seen_links:
+                continue
+            seen_links.add(key)
+            yield {
+                "type": "link",
+                "source": source,
+                "target": target,
+                "relationship": record["relationship"],
+                "sentiment": record["sentiment"] or "Neutral",
+            }
+
+        frontier = next_frontier
+
+    yield {"type": "end", "nodes": len(seen_nodes), "links": len(seen_links), "truncated": truncated}
@@ -1,52 +1,168 @@
-from app.core.database import neo4j_conn
+import logging
+from collections import defaultdict
+from typing import Iterable, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.temporal import history_entry, now_ts
+from app.services.article_registry import article_registry, article_row, article_url
+from app.services.graph_backends import has_read_replica, primary_store, read_store
+from app.services.graph_cache import graph_snapshot
+from app.services.ingestion_log import ingestion_log
+from app.services.context_store import context_store
+from app.services.entity_resolver import entity_resolver
+from app.services.vector_index import vector_index
 from app.models.schemas import GraphData
 
+logger = logging.getLogger(__name__)
+
 
-def save_graph_to_neo4j(graph_data: GraphData):
+def group_graphs(graphs: Iterable[GraphData], seen_at: Iterable[int], articles: Iterable[Optional[dict]]):
     """
-    Takes the extracted Nodes/Edges and writes them to Neo4j.
+    Groups every node by label and every edge by relationship type.
+    Labels and relationship types can't be query parameters in Cypher,
+    so each group becomes its own UNWIND statement.
+
+    `seen_at` is each graph's article timestamp. Repeats of a node or edge
+    within the run fold into one row carrying first/last seen, the number
+    of mentions, their sentiment history (oldest first) and the urls of
+    the articles that reported it. `articles` (the source article of each
+    graph, or None) also become Article rows.
     """
-    session = neo4j_conn.get_session()
+    nodes_by_label = defaultdict(dict)
+    edges_by_type = defaultdict(dict)
+    article_rows = {}
+
+    for graph_data, ts, article in sorted(zip(graphs, seen_at, articles), key=lambda item: item[1]):
+        url = article_url(article) if article else None
+        if url:
+            row = article_rows[url] = article_row(article, (node.id for node in graph_data.nodes))
 
-    try:
-        # 1. Save Nodes
         for node in graph_data.nodes:
-            # Query: MERGE (n:Label {id: "Name"})
-            # We use backticks ` ` around the type to handle spaces/special chars safely
-            query = f"""
-            MERGE (n:`{node.type}` {{id: $id}})
-            RETURN n
-            """
-            session.run(query, id=node.id)
-
-        # 2. Save Edges
+            # Same label + id twice in a run is one MERGE, not two
+            row = nodes_by_label[node.type].setdefault(node.id, {"id": node.id, "first_seen": ts})
+            row["last_seen"] = ts
+
         for edge in graph_data.edges:
-            # Query: Find Source, Find Target, Create Link
-            # Note: We match by ID only, so we don't need to know the Type here
-            query = f"""
-            MATCH (s {{id: $source_id}})
-            MATCH (t {{id: $target_id}})
-            MERGE (s)-[r:`{edge.relationship}`]->(t)
-            SET r.sentiment = $sentiment
-            """
-            session.run(query,
-                        source_id=edge.source,
-                        target_id=edge.target,
-                        sentiment=edge.sentiment)
-
-        print(
-            f"✅ Saved {len(graph_data.nodes)} nodes and {len(graph_data.edges)} edges to Neo4j.")
+            key = (edge.source, edge.target)
+            row = edges_by_type[edge.relationship].setdefault(key, {
+                "source_id": edge.source,
+                "target_id": edge.target,
+                "first_seen": ts,
+                "mentions": 0,
+                "history": [],
+                "sources": [],
+            })
+            # Graphs are in time order, so the latest article wins for sentiment
+            row["sentiment"] = edge.sentiment
+            row["last_seen"] = ts
+            row["mentions"] += 1
+            row["history"].append(history_entry(ts, edge.sentiment))
+            if url and url not in row["sources"]:
+                row["sources"].append(url)
 
+    return (
+        {label: list(rows.values()) for label, rows in nodes_by_label.items()},
+        {rel: list(rows.values()) for rel, rows in edges_by_type.items()},
+        list(article_rows.values()),
+    )
+
+
+def _append_to_log(extracted, articles, seen_at):
+    """The graph is already committed: a log failure is reported, not retried."""
+    if not settings.INGEST_LOG_ENABLED:
+        return
+    try:
+        ingestion_log.append(extracted, articles, seen_at)
     except Exception as e:
-        print(f"❌ Database Save Error: {e}")
-    finally:
-        session.close()
+        logger.error(f"❌ Ingestion Log Error: {e}")
+
+
+def _after_commit(nodes_by_label: dict, edges_by_type: dict, article_rows: List[dict], batch_size: int):
+    """Brings this process's read side in step with a committed write."""
+    # Write-through to the in-memory read replica, if there is one
+    if has_read_replica():
+        read_store.upsert(nodes_by_label, edges_by_type, batch_size, article_rows)
+    # Later runs skip these articles without asking the database
+    article_registry.add(row["url"] for row in article_rows)
+    # Patch the /graph snapshot instead of forcing a full re-scan
+    graph_snapshot.apply(nodes_by_label, edges_by_type)
+    # Keep the alias index in step with what's actually in the graph
+    entity_resolver.add_many(row["id"] for rows in nodes_by_label.values() for row in rows)
+    # ...and the chat retrieval index (only new ids / facts get embedded)
+    vector_index.add(
+        (row["id"] for rows in nodes_by_label.values() for row in rows),
+        ((row["source_id"], relationship, row["target_id"])
+         for relationship, rows in edges_by_type.items() for row in rows))
+    # Only the touched entities get their chat context rebuilt
+    context_store.touch(
+        node_id for rows in edges_by_type.values() for row in rows
+        for node_id in (row["source_id"], row["target_id"]))
+
+
+def save_graphs_to_neo4j(graphs: List[GraphData], batch_size: Optional[int] = None,
+                         seen_at: Optional[List[Optional[int]]] = None,
+                         articles: Optional[List[Optional[dict]]] = None,
+                         extracted: Optional[List[GraphData]] = None, log: bool = True):
+    """
+    Bulk write path: flushes many extracted graphs (e.g. a whole scrape run)
+    in a single write transaction, batched by label / relationship type.
+    `articles` holds each graph's source article (scraper dict): it is
+    recorded as an Article node and its publish time stamps the graph.
+    `seen_at` overrides those times (epoch seconds); missing ones count
+    as now. Returns False only if the primary write failed: once it is
+    committed, errors updating this process's indexes are logged.
+
+    Once written, the graphs are appended to the ingestion log; pass the
+    pre-resolution graphs as `extracted` so a replay can re-resolve them
+    (`log=False` for the replay itself).
+    """
+    now = now_ts()
+    articles = articles or [None] * len(graphs)
+    extracted = extracted or graphs
+    seen_at = seen_at or [article.get("published_ts") if article else None for article in articles]
+    items = [(g, ts or now, article, raw) for g, ts, article, raw in zip(graphs, seen_at, articles, extracted) if g]
+    if not items:
+        return True
+    graphs, seen_at, articles, extracted = zip(*items)
+
+    batch_size = batch_size or settings.NEO4J_WRITE_BATCH_SIZE
+    nodes_by_label, edges_by_type, article_rows = group_graphs(graphs, seen_at, articles)
+    node_count = sum(len(rows) for rows in nodes_by_label.values())
+    edge_count = sum(len(rows) for rows in edges_by_type.values())
+
+    # A snapshot re-sync running meanwhile is dropped: its rows could predate this write
+    with graph_snapshot.writing():
+        try:
+            primary_store.upsert(nodes_by_label, edges_by_type, batch_size, article_rows)
+        except Exception as e:
+            logger.error(f"❌ Database Save Error: {e}")
+            return False
+
+        # Committed: from here on a failure must not make the caller retry the
+        # write (that would count every mention twice)
+        try:
+            _after_commit(nodes_by_label, edges_by_type, article_rows, batch_size)
+        except Exception as e:
+            logger.warning(f"⚠️ Saved, but updating the in-process indexes failed ({type(e).__name__}: {e}).")
+            metrics.inc("post_commit_errors_total", error=type(e).__name__)
+    if log:
+        _append_to_log(extracted, articles, seen_at)
+    logger.info(
+        f"✅ Saved {node_count} nodes, {edge_count} edges and {len(article_rows)} articles "
+        f"to {primary_store.name} ({len(graphs)} graphs, {len(nodes_by_label) + len(edges_by_type)} batches).")
+    return True
+
+
+def save_graph_to_neo4j(graph_data: GraphData, article: Optional[dict] = None,
+                        extracted: Optional[GraphData] = None):
+    """
+    Takes the extracted Nodes/Edges (and the article they came from) and writes them to Neo4j.
+    Returns False if the write failed.
+    """
+    return save_graphs_to_neo4j([graph_data], articles=[article], extracted=[extracted or graph_data])
 
 
 def check_article_exists(url: str):
-    session = neo4j_conn.get_session()
-    # Check if a Source Node with this URL exists
-    query = "MATCH (a:Article {url: $url}) RETURN count(a) as count"
-    result = session.run(query, url=url).single()
-    session.close()
-    return result["count"] > 0
+    # Bloom filter first; only a possible hit reaches the database
+    return url in article_registry.existing([url])
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import os
+import socket
+from typing import List
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.entity_resolver import resolve_entities
+from app.services.extractor import aextract_graph_from_text, aextract_graphs_batch
+from app.services.article_registry import article_registry, article_url
+from app.services.graph_store import save_graphs_to_neo4j
+from app.services.job_queue import Job, job_queue
+from app.services.pipeline import RateLimiter
+from app.services.scraper import commit_news, stream_latest_news
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_latest_news() -> int:
+    """
+    Producer side: polls the feeds and queues every new article.
+    Cheap (no LLM calls), so it is safe to run inside the web process.
+    Articles already in the graph are not queued again.
+    """
+    articles = list(stream_latest_news())
+    queued = job_queue.enqueue(article_registry.filter_new(articles))
+    # Queued (or already ingested): the feed cursors can move past them
+    commit_news(articles)
+    logger.info(f"📥 Queued {queued} new article(s) | Jobs: {job_queue.stats()}")
+    return queued
+
+
+def _article_text(article: dict) -> str:
+    return f"{article['title']}. {article['summary']}"
+
+
+async def _extract(jobs: List[Job], limiter: RateLimiter):
+    texts = [_article_text(job.payload) for job in jobs]
+    if settings.EXTRACT_BATCH_MODE and len(texts) > 1:
+        return await aextract_graphs_batch(texts, limiter=limiter)
+
+    semaphore = asyncio.Semaphore(max(1, settings.PIPELINE_EXTRACT_CONCURRENCY))
+
+    async def one(text: str):
+        async with semaphore:
+            return await aextract_graph_from_text(text, limiter=limiter)
+
+    return await asyncio.gather(*[one(text) for text in texts])
+
+
+async def process_jobs(jobs: List[Job], limiter: RateLimiter) -> dict:
+    """
+    Extracts, resolves and saves one leased batch, then settles every job:
+    already ingested or saved -> done; extraction or save failure -> retried with backoff.
+    """
+    # Another worker (or an earlier run) may have ingested some of these already
+    existing = await asyncio.to_thread(article_registry.existing, [article_url(job.payload) for job in jobs])
+    duplicates = [job for job in jobs if article_url(job.payload) in existing]
+    if duplicates:
+        job_queue.complete(duplicates)
+        metrics.inc("jobs_total", len(duplicates), outcome="duplicate")
+        jobs = [job for job in jobs if article_url(job.payload) not in existing]
+        if not jobs:
+            return {"done": 0, "failed": 0, "duplicate": len(duplicates)}
+
+    with metrics.span("extract"):
+        graphs = await _extract(jobs, limiter)
+
+    extracted, raw, resolved, failed = [], [], [], []
+    for job, graph_data in zip(jobs, graphs):
+        if graph_data:
+            extracted.append(job)
+            raw.append(graph_data)
+            with metrics.span("resolve"):
+                resolved.append(resolve_entities(graph_data))
+        else:
+            failed.append(job)
+
+    saved = True
+    if resolved:
+        with metrics.span("write"):
+            saved = await asyncio.to_thread(save_graphs_to_neo4j, resolved,
+                                            articles=[job.payload for job in extracted], extracted=raw)
+
+    if saved:
+        job_queue.complete(extracted)
+    else:
+        failed.extend(extracted)
+        extracted = []
+
+    for job in failed:
+        logger.warning(f"❌ Job {job.id} failed (attempt {job.attempts + 1}): {job.payload['title']}")
+    if failed:
+        job_queue.retry(failed, "save failed" if not saved else "extraction failed")
+
+    metrics.inc("jobs_total", len(extracted), outcome="done")
+    metrics.inc("jobs_total", len(failed), outcome="retried")
+    return {"done": len(extracted), "failed": len(failed), "duplicate": len(duplicates)}
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def run_worker(stop: asyncio.Event, once: bool = False) -> dict:
+    """
+    Lease -> process -> settle, until `stop` is set (or, with `once`,
+    until the queue has nothing runnable left).
+    """
+    name = worker_name()
+    limiter = RateLimiter(settings.PIPELINE_EXTRACT_RATE)
+    totals = {"done": 0, "failed": 0, "duplicate": 0}
+    logger.info(f"👷 Worker {name} started.")
+
+    while not stop.is_set():
+        jobs = await asyncio.to_thread(
+            job_queue.lease, name, settings.WORKER_BATCH_SIZE, settings.JOB_LEASE_SECONDS)
+        if not jobs:
+            if once:
+                break
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=settings.WORKER_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        try:
+            result = await process_jobs(jobs, limiter)
+        except Exception as e:
+            # e.g. Neo4j or SQLite hiccup: back off this batch instead of dying with its leases
+            logger.error(f"❌ Batch of {len(jobs)} job(s) failed: {e}")
+            metrics.inc("jobs_total", len(jobs), outcome="errored")
+            try:
+                await asyncio.to_thread(job_queue.retry, jobs, f"{type(e).__name__}: {e}")
+            except Exception as retry_error:
+                # The leases expire and count as an attempt instead
+                logger.error(f"❌ Could not reschedule the batch: {retry_error}")
+            result = {"failed": len(jobs)}
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=settings.WORKER_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+        for outcome, count in result.items():
+            totals[outcome] += count
+
+    logger.info(f"👷 Worker {name} stopped: {totals}")
+    return totals
@@ -0,0 +1,227 @@
+import io
+import logging
+import os
+import struct
+import threading
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import orjson
+import zstandard
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.temporal import now_ts
+from app.models.schemas import GraphData
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # No flock (Windows): single-writer dev setups only
+
+logger = logging.getLogger(__name__)
+
+# Inside the decompressed stream, each record is a 4-byte big-endian length, then its JSON
+_LENGTH = struct.Struct(">I")
+_PREFIX = "ingest-"
+_SUFFIX = ".log.zst"
+RECORD_VERSION = 1
+
+# Compressed bytes read at a time when walking a segment frame by frame
+_READ_CHUNK = 1 << 20
+
+
+def make_record(graph: GraphData, article: Optional[dict], seen_at: int, logged_at: int) -> dict:
+    """One log entry: the graph as extracted (before entity resolution) and its source article."""
+    return {
+        "v": RECORD_VERSION,
+        "logged_at": logged_at,
+        "seen_at": seen_at,
+        "article": article,
+        "graph": graph.model_dump(),
+    }
+
+
+def record_graph(record: dict) -> GraphData:
+    return GraphData.model_validate(record["graph"])
+
+
+class IngestionLog:
+    """
+    Append-only log of every extraction result, so the graph can be
+    rebuilt (`python replay_log.py`) without calling the LLM again.
+
+    Segments are files of concatenated zstd frames; their decompressed
+    stream is a sequence of length-prefixed JSON records. Each append
+    (one bulk write) is one frame written with one write() under an
+    flock, so processes can share the directory. A writer that crashes
+    mid-write leaves a torn frame at the end of the segment: the next
+    append cuts it off before writing (see _repair_tail), and readers
+    stop at it. A segment is closed once it reaches `segment_bytes`.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int, level: int):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._lock = threading.Lock()
+        # "<segment name> <size>" after the last complete append, by any process
+        self._committed_path = os.path.join(directory, ".committed")
+
+    def segments(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        names = sorted(n for n in os.listdir(self.directory) if n.startswith(_PREFIX) and n.endswith(_SUFFIX))
+        return [os.path.join(self.directory, name) for name in names]
+
+    def _segment_for_append(self) -> str:
+        segments = self.segments()
+        if segments and os.path.getsize(segments[-1]) < self.segment_bytes and self._repair_tail(segments[-1]):
+            return segments[-1]
+        number = int(os.path.basename(segments[-1])[len(_PREFIX):-len(_SUFFIX)]) + 1 if segments else 1
+        return os.path.join(self.directory, f"{_PREFIX}{number:06d}{_SUFFIX}")
+
+    # --- Torn tails ---
+
+    def _read_committed(self):
+        try:
+            with open(self._committed_path, encoding="utf-8") as f:
+                name, size = f.read().split()
+            return name, int(size)
+        except (OSError, ValueError):
+            return None
+
+    def _write_committed(self, segment: str, size: int):
+        temp = self._committed_path + ".tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            f.write(f"{os.path.basename(segment)} {size}")
+        os.replace(temp, self._committed_path)
+
+    @staticmethod
+    def _frames(f) -> Iterator[Tuple[int, bytes]]:
+        """
+        (file offset just past the frame, decompressed frame) for each
+        complete frame from the current position; stops quietly at a torn
+        frame and raises ZstdError at a corrupt one.
+        """
+        end = f.tell()
+        pending = b""
+        while True:
+            if not pending:
+                pending = f.read(_READ_CHUNK)
+                if not pending:
+                    return
+            decompressor = zstandard.ZstdDecompressor().decompressobj()
+            parts, fed = [], 0
+            while True:
+                parts.append(decompressor.decompress(pending))
+                fed += len(pending)
+                if decompressor.eof:
+                    pending = decompressor.unused_data
+                    break
+                pending = f.read(_READ_CHUNK)
+                if not pending:
+                    return
+            end += fed - len(pending)
+            yield end, b"".join(parts)
+
+    def _repair_tail(self, segment: str) -> bool:
+        """
+        Cuts a torn frame off the end of `segment` before anything is
+        appended after it; otherwise every later record would be
+        unreadable. Only the bytes past the last committed append are
+        checked (the whole segment if that isn't known). False if the
+        segment is corrupt before its end: appends go to a new one.
+        """
+        if not os.path.exists(segment):
+            return True
+        size = os.path.getsize(segment)
+        committed = self._read_committed()
+        start = 0
+        if committed and committed[0] == os.path.basename(segment) and committed[1] <= size:
+            start = committed[1]
+        end = start
+        with open(segment, "rb") as f:
+            f.seek(start)
+            try:
+                for end, _ in self._frames(f):
+                    pass
+            except zstandard.ZstdError as e:
+                logger.error(f"❌ Corrupt frame in {segment} ({e}); starting a new segment.")
+                return False
+        if end < size:
+            logger.warning(f"⚠️ Cutting a torn frame ({size - end} bytes) off the end of {segment}.")
+            os.truncate(segment, end)
+        return True
+
+    # --- Writes ---
+
+    def append(self, graphs: Sequence[GraphData], articles: Sequence[Optional[dict]], seen_at: Sequence[int]) -> int:
+        """Appends one record per graph as a single frame. Returns the number of records."""
+        logged_at = now_ts()
+        payload = io.BytesIO()
+        count = 0
+        for graph, article, ts in zip(graphs, articles, seen_at):
+            data = orjson.dumps(make_record(graph, article, ts, logged_at), default=str)
+            payload.write(_LENGTH.pack(len(data)))
+            payload.write(data)
+            count += 1
+        if not count:
+            return 0
+
+        with self._lock:
+            # The compressor isn't thread-safe
+            frame = self._compressor.compress(payload.getvalue())
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, ".lock"), "a") as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                path = self._segment_for_append()
+                with open(path, "ab") as segment:
+                    segment.write(frame)
+                    segment.flush()
+                    os.fsync(segment.fileno())
+                    size = segment.tell()
+                self._write_committed(path, size)
+
+        metrics.inc("ingest_log_records_total", count)
+        metrics.inc("ingest_log_bytes_total", len(frame))
+        return count
+
+    # --- Reads ---
+
+    def read(self, paths: Optional[List[str]] = None) -> Iterator[dict]:
+        """Yields every record, oldest first. A damaged segment is read up to the damage."""
+        for path in paths or self.segments():
+            try:
+                yield from self._read_segment(path)
+            except zstandard.ZstdError as e:
+                logger.error(f"❌ Corrupt frame in {path} ({e}); skipping the rest of that segment.")
+
+    def _read_segment(self, path: str) -> Iterator[dict]:
+        end = 0
+        with open(path, "rb") as f:
+            for end, content in self._frames(f):
+                position = 0
+                while position < len(content):
+                    size = _LENGTH.unpack_from(content, position)[0]
+                    position += _LENGTH.size
+                    yield orjson.loads(content[position:position + size])
+                    position += size
+            if end < os.fstat(f.fileno()).st_size:
+                logger.warning(f"⚠️ Torn frame at the end of {path} (a writer crashed); skipped.")
+
+    def stats(self) -> dict:
+        segments = self.segments()
+        return {
+            "segments": len(segments),
+            "bytes": sum(os.path.getsize(path) for path in segments),
+            "records": sum(1 for _ in self.read(segments)),
+        }
+
+
+# Create a single instance to be imported elsewhere
+ingestion_log = IngestionLog(
+    directory=os.path.join(settings.DATA_DIR, "ingest_log"),
+    segment_bytes=settings.INGEST_LOG_SEGMENT_MB * 1024 * 1024,
+    level=settings.INGEST_LOG_COMPRESSION_LEVEL,
+)
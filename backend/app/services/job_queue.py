@@ -0,0 +1,199 @@
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable, List
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class Job:
+    id: int
+    key: str
+    payload: dict
+    attempts: int
+
+
+def job_key(article: dict) -> str:
+    """Idempotency key: the article link (falling back to the feed GUID)."""
+    return article.get("link") or article.get("guid") or article["title"]
+
+
+class JobQueue:
+    """
+    Durable (SQLite) queue of article jobs shared by every process on the host.
+
+    - enqueue() is idempotent per key, so re-polling a feed or re-triggering
+      a scrape never creates duplicate work.
+    - lease() hands a job to exactly one worker until `lease_until`; if the
+      worker dies the lease expires and another worker picks the job up.
+      An expired lease counts as an attempt, so a job that keeps killing
+      its worker is eventually parked instead of retried forever.
+    - retry() puts a failed job back with exponential backoff (plus jitter)
+      until `max_attempts`, after which it is parked as failed.
+    """
+
+    def __init__(self, path: str, max_attempts: int, retry_base_seconds: float, retry_max_seconds: float):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    key TEXT NOT NULL UNIQUE,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    available_at REAL NOT NULL,
+                    lease_until REAL,
+                    worker TEXT,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_status_available ON jobs (status, available_at)")
+        return self._conn
+
+    def enqueue(self, articles: Iterable[dict]) -> int:
+        """Adds jobs for articles not queued before; returns how many were new."""
+        now = time.time()
+        rows = [(job_key(a), json.dumps(a), PENDING, now, now, now) for a in articles]
+        if not rows:
+            return 0
+        with self._lock:
+            conn = self._connect()
+            before = conn.total_changes
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO jobs (key, payload, status, available_at, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", rows)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return conn.total_changes - before
+
+    def lease(self, worker: str, limit: int, lease_seconds: float) -> List[Job]:
+        """
+        Claims up to `limit` runnable jobs: pending ones whose backoff has
+        passed, plus leased ones whose worker let the lease expire (that
+        attempt is counted; out of attempts, the job is parked as failed).
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            # IMMEDIATE takes the write lock up front, so two processes can't
+            # select the same rows
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute("""
+                    SELECT id, key, payload, attempts, status FROM jobs
+                    WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_until < ?)
+                    ORDER BY available_at
+                    LIMIT ?
+                """, (PENDING, now, LEASED, now, limit)).fetchall()
+                jobs, leased, parked = [], [], []
+                for job_id, key, payload, attempts, status in rows:
+                    if status == LEASED:
+                        attempts += 1
+                        if attempts >= self.max_attempts:
+                            parked.append((FAILED, attempts, "lease expired", now, job_id))
+                            continue
+                    jobs.append(Job(id=job_id, key=key, payload=json.loads(payload), attempts=attempts))
+                    leased.append((LEASED, attempts, now + lease_seconds, worker, now, job_id))
+                conn.executemany(
+                    "UPDATE jobs SET status = ?, attempts = ?, lease_until = ?, worker = ?, updated_at = ? "
+                    "WHERE id = ?", leased)
+                conn.executemany(
+                    "UPDATE jobs SET status = ?, attempts = ?, lease_until = NULL, last_error = ?, updated_at = ? "
+                    "WHERE id = ?", parked)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        expired = sum(1 for row in rows if row[4] == LEASED)
+        if expired:
+            metrics.inc("jobs_total", expired, outcome="lease_expired")
+        return jobs
+
+    def complete(self, jobs: Iterable[Job]):
+        now = time.time()
+        with self._lock:
+            self._connect().executemany(
+                "UPDATE jobs SET status = ?, lease_until = NULL, last_error = NULL, updated_at = ? WHERE id = ?",
+                [(DONE, now, job.id) for job in jobs])
+
+    def backoff_seconds(self, attempts: int) -> float:
+        """base * 2^(attempts - 1), capped, with +/-20% jitter so retries don't bunch up."""
+        delay = min(self.retry_base_seconds * (2 ** max(attempts - 1, 0)), self.retry_max_seconds)
+        return delay * random.uniform(0.8, 1.2)
+
+    def retry(self, jobs: Iterable[Job], error: str):
+        """Backs off (or parks) jobs that are still leased; ones already settled are left alone."""
+        now = time.time()
+        updates = []
+        for job in jobs:
+            attempts = job.attempts + 1
+            if attempts >= self.max_attempts:
+                updates.append((FAILED, attempts, now, error, now, job.id))
+            else:
+                updates.append((PENDING, attempts, now + self.backoff_seconds(attempts), error, now, job.id))
+        with self._lock:
+            self._connect().executemany(
+                "UPDATE jobs SET status = ?, attempts = ?, available_at = ?, lease_until = NULL, "
+                "last_error = ?, updated_at = ? WHERE id = ? AND status = ?",
+                [update + (LEASED,) for update in updates])
+
+    def requeue_failed(self) -> int:
+        """Gives parked jobs a fresh set of attempts (e.g. after an LLM outage)."""
+        now = time.time()
+        with self._lock:
+            cursor = self._connect().execute(
+                "UPDATE jobs SET status = ?, attempts = 0, available_at = ?, updated_at = ? WHERE status = ?",
+                (PENDING, now, now, FAILED))
+            return cursor.rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._connect().execute("SELECT status, count(*) FROM jobs GROUP BY status").fetchall()
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Create a single instance to be imported elsewhere
+job_queue = JobQueue(
+    path=os.path.join(settings.DATA_DIR, "jobs.sqlite3"),
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    retry_base_seconds=settings.JOB_RETRY_BASE_SECONDS,
+    retry_max_seconds=settings.JOB_RETRY_MAX_SECONDS,
+)
@@ -0,0 +1,507 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Lower number = served first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+_PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+# ~4 characters per token, like the batch packer's estimate
+_CHARS_PER_TOKEN = 4
+
+# While an interactive call is waiting, background callers re-check this often
+# at first, then back off (doubling) up to the max
+_YIELD_SECONDS = 0.05
+_MAX_YIELD_SECONDS = 1.0
+
+# A waiting interactive caller stays visible to other processes this long past its next re-check
+_WAITER_GRACE_SECONDS = 1.0
+
+
+@lru_cache(maxsize=None)
+def chat_model(model: str):
+    """
+    The one ChatGroq client per model, shared by extraction and QA.
+    The SDK's own retries are off: the gateway owns retry policy, so a
+    429 is never retried blindly by two layers at once.
+    LangChain and the Groq SDK are imported here, on first use.
+    """
+    from langchain_groq import ChatGroq
+    from app.core.llm_metrics import LLMMetricsCallback
+
+    options = {}
+    if settings.GROQ_BASE_URL:
+        options["base_url"] = settings.GROQ_BASE_URL
+    return ChatGroq(
+        api_key=settings.GROQ_API_KEY,
+        model=model,
+        temperature=0,
+        max_retries=0,
+        callbacks=[LLMMetricsCallback(model)],
+        **options,
+    )
+
+
+class LazyRunnable:
+    """
+    A chain built on first use and shared afterwards. Modules declare
+    their chains at import time without importing LangChain or creating
+    clients, which keeps process start-up fast.
+    """
+
+    def __init__(self, build: Callable[[], Any]):
+        self._build = build
+        self._runnable = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._runnable is None:
+            with self._lock:
+                if self._runnable is None:
+                    self._runnable = self._build()
+        return self._runnable
+
+    def invoke(self, inputs: dict):
+        return self.get().invoke(inputs)
+
+    async def ainvoke(self, inputs: dict):
+        return await self.get().ainvoke(inputs)
+
+    def astream(self, inputs: dict):
+        return self.get().astream(inputs)
+
+
+def text_tokens(text: str) -> int:
+    return len(text) // _CHARS_PER_TOKEN
+
+
+def estimate_tokens(inputs: dict, base_tokens: int = 0) -> int:
+    """Rough request size: prompt template + inputs + expected completion."""
+    return (base_tokens + text_tokens("".join(str(value) for value in inputs.values()))
+            + settings.LLM_COMPLETION_TOKENS_ESTIMATE)
+
+
+class TokenBucket:
+    """Refills continuously at `per_minute / 60` per second, up to `per_minute`."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay_for(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (0 if it is now)."""
+        if self.rate <= 0:
+            return 0.0
+        self._refill(now)
+        # A request larger than the whole bucket waits for a full bucket
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        if self.rate > 0:
+            self.level -= min(amount, self.capacity)
+
+
+class SharedBudget:
+    """
+    The gateway's admission state in SQLite, shared by every process on
+    the host (web workers and ingestion workers alike): both token
+    buckets, the 429 pause, and which processes have an interactive call
+    waiting. Each check is one short IMMEDIATE transaction, taken only
+    once a plain read found nothing to wait for; times are wall-clock,
+    since monotonic clocks don't compare across processes. Processes on
+    other hosts need their own share of the account limit.
+
+    The a* methods run on one dedicated thread, so a lock held by another
+    process never stalls the event loop.
+    """
+
+    def __init__(self, path: str, requests_per_minute: float, tokens_per_minute: float):
+        self.path = path
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._owner = str(os.getpid())
+        self._lock = threading.Lock()
+        self._conn = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-budget")
+
+    async def _run(self, work: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, work, *args)
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, level REAL NOT NULL, updated REAL NOT NULL)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS state (name TEXT PRIMARY KEY, value REAL NOT NULL)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS waiters (owner TEXT PRIMARY KEY, until REAL NOT NULL)")
+        return self._conn
+
+    def _transaction(self, work: Callable):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(conn, time.time())
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return result
+
+    @staticmethod
+    def _bucket(conn, name: str, per_minute: float, now: float) -> TokenBucket:
+        bucket = TokenBucket(per_minute)
+        row = conn.execute("SELECT level, updated FROM buckets WHERE name = ?", (name,)).fetchone()
+        bucket.level, bucket.updated = (min(row[0], bucket.capacity), row[1]) if row else (bucket.capacity, now)
+        return bucket
+
+    def _blocked(self, priority: int, waiting_here: bool) -> float:
+        """Read-only check: how long a caller has to wait no matter what (0: go on)."""
+        with self._lock:
+            conn = self._connect()
+            now = time.time()
+            paused = conn.execute("SELECT value FROM state WHERE name = 'paused_until'").fetchone()
+            if paused and now < paused[0]:
+                return paused[0] - now
+            if priority > INTERACTIVE and (waiting_here or conn.execute(
+                    "SELECT 1 FROM waiters WHERE until > ? LIMIT 1", (now,)).fetchone()):
+                return _YIELD_SECONDS
+            return 0.0
+
+    def try_acquire(self, tokens: int, priority: int, waiting_here: bool) -> float:
+        """Takes the budget and returns 0, or returns how long to wait."""
+        # Background callers stepping aside don't need the write lock to find out
+        if priority > INTERACTIVE:
+            delay = self._blocked(priority, waiting_here)
+            if delay:
+                return delay
+
+        def work(conn, now):
+            paused = conn.execute("SELECT value FROM state WHERE name = 'paused_until'").fetchone()
+            if paused and now < paused[0]:
+                delay = paused[0] - now
+            elif priority > INTERACTIVE and (waiting_here or conn.execute(
+                    "SELECT 1 FROM waiters WHERE until > ? LIMIT 1", (now,)).fetchone()):
+                return _YIELD_SECONDS
+            else:
+                requests = self._bucket(conn, "requests", self.requests_per_minute, now)
+                budget = self._bucket(conn, "tokens", self.tokens_per_minute, now)
+                delay = max(requests.delay_for(1, now), budget.delay_for(tokens, now))
+                if delay == 0:
+                    requests.take(1)
+                    budget.take(tokens)
+                    conn.executemany("INSERT OR REPLACE INTO buckets (name, level, updated) VALUES (?, ?, ?)",
+                                     [("requests", requests.level, now), ("tokens", budget.level, now)])
+            if priority == INTERACTIVE and delay:
+                # Background callers in every process step aside until we're through
+                conn.execute("INSERT OR REPLACE INTO waiters (owner, until) VALUES (?, ?)",
+                             (self._owner, now + delay + _WAITER_GRACE_SECONDS))
+            return delay
+
+        return self._transaction(work)
+
+    def done_waiting(self):
+        """No interactive call of this process is waiting any more."""
+        self._transaction(lambda conn, now: conn.execute("DELETE FROM waiters WHERE owner = ?", (self._owner,)))
+
+    def pause(self, seconds: float):
+        """Holds every caller on the host back (a 429 hit the shared account)."""
+        self._transaction(lambda conn, now: conn.execute(
+            "INSERT INTO state (name, value) VALUES ('paused_until', ?) "
+            "ON CONFLICT (name) DO UPDATE SET value = max(value, excluded.value)", (now + seconds,)))
+
+    async def atry_acquire(self, tokens: int, priority: int, waiting_here: bool) -> float:
+        return await self._run(self.try_acquire, tokens, priority, waiting_here)
+
+    async def adone_waiting(self):
+        await self._run(self.done_waiting)
+
+    async def apause(self, seconds: float):
+        await self._run(self.pause, seconds)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """Reads Retry-After (or Groq's x-ratelimit-reset-* hints) off an API error."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    # e.g. "7.66s", "1m2.5s", "120ms"
+    for header in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        value = headers.get(header)
+        if value:
+            seconds = 0.0
+            for number, unit in re.findall(r"([\d.]+)(ms|s|m|h)", value):
+                seconds += float(number) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+            if seconds:
+                return seconds
+    return None
+
+
+# The Groq SDK is only imported once a call has actually failed
+def _is_rate_limit(error: Exception) -> bool:
+    import groq
+
+    return isinstance(error, groq.RateLimitError) or getattr(error, "status_code", None) == 429
+
+
+def _is_retryable(error: Exception) -> bool:
+    import groq
+
+    if isinstance(error, (groq.RateLimitError, groq.APIConnectionError, groq.InternalServerError)):
+        return True
+    return getattr(error, "status_code", None) in (429, 500, 502, 503, 504)
+
+
+class LLMGateway:
+    """
+    Single choke point for every LLM call in the process.
+
+    - Token buckets enforce requests-per-minute and tokens-per-minute.
+    - Interactive callers (/chat) go first: background callers (extraction)
+      step aside while any interactive call is waiting for budget.
+    - Retryable errors back off with full jitter; a 429's Retry-After
+      pauses *all* callers, since the budget is shared upstream.
+    - Identical in-flight async requests are coalesced into one call.
+
+    With a `shared` budget, the buckets, the priority and the pause hold
+    across every process on the host (web and ingestion workers).
+    Without one they are per process: with N processes, give each 1/N
+    of the account limit.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float,
+                 max_retries: int, backoff_base: float, backoff_max: float,
+                 shared: Optional[SharedBudget] = None):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.shared = shared
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._lock = threading.Lock()
+        self._interactive_waiting = 0
+        self._paused_until = 0.0
+        self._inflight = {}
+
+    # --- Admission ---
+
+    def _try_acquire(self, tokens: int, priority: int) -> float:
+        """Takes the budget and returns 0, or returns how long to wait."""
+        if self.shared is not None:
+            return self.shared.try_acquire(tokens, priority, waiting_here=self._interactive_waiting > 0)
+        return self._try_acquire_local(tokens, priority)
+
+    async def _atry_acquire(self, tokens: int, priority: int) -> float:
+        if self.shared is not None:
+            return await self.shared.atry_acquire(tokens, priority, waiting_here=self._interactive_waiting > 0)
+        return self._try_acquire_local(tokens, priority)
+
+    def _try_acquire_local(self, tokens: int, priority: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            if priority > INTERACTIVE and self._interactive_waiting:
+                return _YIELD_SECONDS
+            delay = max(self.requests.delay_for(1, now), self.tokens.delay_for(tokens, now))
+            if delay == 0:
+                self.requests.take(1)
+                self.tokens.take(tokens)
+            return delay
+
+    def _waiting(self, priority: int, delta: int) -> bool:
+        """Counts this process's waiting interactive callers; True once the last one is through."""
+        if priority != INTERACTIVE:
+            return False
+        with self._lock:
+            self._interactive_waiting += delta
+            return delta < 0 and self._interactive_waiting == 0 and self.shared is not None
+
+    async def acquire(self, tokens: int, priority: int = BACKGROUND):
+        started = time.perf_counter()
+        self._waiting(priority, 1)
+        poll = _YIELD_SECONDS
+        try:
+            while True:
+                delay = await self._atry_acquire(tokens, priority)
+                if delay == 0:
+                    break
+                if priority > INTERACTIVE:
+                    # Re-checks back off while the wait goes on
+                    delay, poll = max(delay, poll), min(poll * 2, _MAX_YIELD_SECONDS)
+                await asyncio.sleep(delay)
+        finally:
+            if self._waiting(priority, -1):
+                await self.shared.adone_waiting()
+        metrics.observe("llm_queue_wait_seconds", time.perf_counter() - started,
+                        priority=_PRIORITY_NAMES[priority])
+
+    def acquire_sync(self, tokens: int, priority: int = BACKGROUND):
+        self._waiting(priority, 1)
+        poll = _YIELD_SECONDS
+        try:
+            while True:
+                delay = self._try_acquire(tokens, priority)
+                if delay == 0:
+                    return
+                if priority > INTERACTIVE:
+                    delay, poll = max(delay, poll), min(poll * 2, _MAX_YIELD_SECONDS)
+                time.sleep(delay)
+        finally:
+            if self._waiting(priority, -1):
+                self.shared.done_waiting()
+
+    # --- Retries ---
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Delay before the next attempt. A 429 also pauses every caller (see _pause)."""
+        retry_after = _retry_after_seconds(error)
+        if retry_after is not None:
+            delay = retry_after + random.uniform(0, self.backoff_base)
+        else:
+            # Full jitter: uniform(0, base * 2^attempt), capped
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        metrics.inc("llm_retries_total", error=type(error).__name__)
+        logger.warning(f"⏳ LLM call failed ({type(error).__name__}); retry {attempt + 1} in {delay:.1f}s")
+        return delay
+
+    def _pause(self, error: Exception, delay: float):
+        if not _is_rate_limit(error):
+            return
+        if self.shared is not None:
+            self.shared.pause(delay)
+            return
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+
+    async def _apause(self, error: Exception, delay: float):
+        if self.shared is not None and _is_rate_limit(error):
+            await self.shared.apause(delay)
+        else:
+            self._pause(error, delay)
+
+    async def _call(self, runnable, inputs: dict, priority: int, tokens: int):
+        for attempt in range(self.max_retries + 1):
+            await self.acquire(tokens, priority)
+            try:
+                return await runnable.ainvoke(inputs)
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+                delay = self._backoff(attempt, e)
+                await self._apause(e, delay)
+                await asyncio.sleep(delay)
+
+    # --- Public API ---
+
+    async def ainvoke(self, runnable, inputs: dict, priority: int = BACKGROUND,
+                      base_tokens: int = 0, key: Optional[str] = None) -> Any:
+        """
+        Runs `runnable.ainvoke(inputs)` under the budgets, with retries.
+        Calls with the same `key` (default: hash of runnable + inputs)
+        that overlap in time share one upstream request.
+        """
+        tokens = estimate_tokens(inputs, base_tokens)
+        key = key or hashlib.sha256(
+            f"{id(runnable)}:{json.dumps(inputs, sort_keys=True, default=str)}".encode()).hexdigest()
+
+        task = self._inflight.get(key)
+        if task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop():
+            metrics.inc("llm_coalesced_total")
+            return await asyncio.shield(task)
+
+        task = asyncio.ensure_future(self._call(runnable, inputs, priority, tokens))
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._inflight.pop(key, None) if self._inflight.get(key) is done else None)
+        # Shielded: one caller giving up doesn't cancel the call for the others
+        return await asyncio.shield(task)
+
+    def invoke(self, runnable, inputs: dict, priority: int = BACKGROUND, base_tokens: int = 0) -> Any:
+        """Blocking twin of ainvoke for sync callers (no coalescing)."""
+        tokens = estimate_tokens(inputs, base_tokens)
+        for attempt in range(self.max_retries + 1):
+            self.acquire_sync(tokens, priority)
+            try:
+                return runnable.invoke(inputs)
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+                delay = self._backoff(attempt, e)
+                self._pause(e, delay)
+                time.sleep(delay)
+
+    async def astream(self, runnable, inputs: dict, priority: int = INTERACTIVE, base_tokens: int = 0):
+        """
+        Streams `runnable.astream(inputs)`. Retries only if nothing has been
+        yielded yet; a failure mid-stream is raised to the caller.
+        """
+        tokens = estimate_tokens(inputs, base_tokens)
+        for attempt in range(self.max_retries + 1):
+            await self.acquire(tokens, priority)
+            started = False
+            try:
+                async for chunk in runnable.astream(inputs):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started or attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+                delay = self._backoff(attempt, e)
+                await self._apause(e, delay)
+                await asyncio.sleep(delay)
+
+
+# Create a single instance to be imported elsewhere
+llm_gateway = LLMGateway(
+    requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+    tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+    max_retries=settings.LLM_MAX_RETRIES,
+    backoff_base=settings.LLM_BACKOFF_BASE_SECONDS,
+    backoff_max=settings.LLM_BACKOFF_MAX_SECONDS,
+    shared=SharedBudget(
+        path=os.path.join(settings.DATA_DIR, "llm_budget.sqlite3"),
+        requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+        tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+    ) if settings.LLM_BUDGET_SHARED else None,
+)
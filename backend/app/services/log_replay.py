@@ -0,0 +1,186 @@
+import csv
+import hashlib
+import json
+import logging
+import os
+from collections import Counter, defaultdict
+from typing import Iterator, Optional, Set, Tuple
+
+import orjson
+
+from app.core.config import settings
+from app.core.graph_schema import ARTICLE_LABEL, ENTITY_LABEL, MENTIONS
+from app.core.temporal import TimeWindow
+from app.services.article_registry import article_registry, article_url
+from app.services.entity_resolver import resolve_entities
+from app.services.graph_backends import primary_store
+from app.services.graph_store import group_graphs, save_graphs_to_neo4j
+from app.services.ingestion_log import ingestion_log, record_graph
+
+logger = logging.getLogger(__name__)
+
+# neo4j-admin splits multi-valued columns (and multiple labels) on this;
+# article urls may contain ";", the default
+ARRAY_DELIMITER = "|"
+
+# Graphs logged without an article leave no Article node to dedupe a
+# replay on; the ones already replayed are recorded here instead
+_REPLAYED_PATH = os.path.join(ingestion_log.directory, ".replayed")
+
+
+def _load_replayed() -> Set[str]:
+    try:
+        with open(_REPLAYED_PATH, "r", encoding="utf-8") as f:
+            return set(json.load(f))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return set()
+
+
+def _save_replayed(keys: Set[str]):
+    os.makedirs(os.path.dirname(_REPLAYED_PATH), exist_ok=True)
+    temp = _REPLAYED_PATH + ".tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        json.dump(sorted(keys), f)
+    os.replace(temp, _REPLAYED_PATH)
+
+
+def _keyed_records(window: Optional[TimeWindow] = None) -> Iterator[Tuple[dict, Optional[str]]]:
+    """logged_records, each with a key for the article-less ones (None otherwise)."""
+    seen = set()
+    occurrences = Counter()
+    for record in ingestion_log.read():
+        key = None
+        if not record["article"]:
+            # Content plus how many identical records came before it, counted
+            # over the whole log so the key doesn't depend on `window`
+            digest = hashlib.sha256(orjson.dumps(record, option=orjson.OPT_SORT_KEYS)).hexdigest()
+            occurrences[digest] += 1
+            key = f"{digest}:{occurrences[digest]}"
+        if window and not window.overlaps(record["seen_at"], record["seen_at"]):
+            continue
+        url = article_url(record["article"]) if record["article"] else None
+        if url in seen:
+            continue
+        if url:
+            seen.add(url)
+        yield record, key
+
+
+def logged_records(window: Optional[TimeWindow] = None) -> Iterator[dict]:
+    """
+    Log records, oldest first; with `window`, only graphs seen during it.
+    An article logged twice (e.g. two workers raced on it) is yielded once.
+    """
+    for record, _ in _keyed_records(window):
+        yield record
+
+
+def replay(window: Optional[TimeWindow] = None, batch_graphs: Optional[int] = None) -> dict:
+    """
+    Writes logged graphs back through the bulk write path, `batch_graphs`
+    per transaction, re-running entity resolution with the current rules.
+    Articles already in the graph are skipped, and so are article-less
+    graphs an earlier replay into this graph saved (by content and
+    position in the log), so an interrupted replay can simply be run
+    again. Stops at the first failed write.
+    """
+    batch_graphs = batch_graphs or settings.REPLAY_BATCH_GRAPHS
+    stats = {"records": 0, "skipped": 0, "saved": 0, "failed": 0}
+    batch = []   # (record, key for article-less records)
+    # An empty graph gets everything again, whatever was replayed before
+    replayed = _load_replayed() if primary_store.node_count() else set()
+
+    def flush() -> bool:
+        # 1. Drop what's already in the graph (one bulk check per batch)
+        existing = article_registry.existing(article_url(r["article"]) for r, _ in batch if r["article"])
+        fresh = [(r, key) for r, key in batch
+                 if not (article_url(r["article"]) in existing if r["article"] else key in replayed)]
+        stats["skipped"] += len(batch) - len(fresh)
+        batch.clear()
+        if not fresh:
+            return True
+        keys = {key for _, key in fresh if key}
+        fresh = [r for r, _ in fresh]
+
+        # 2. Resolve in log order, like the live path did, then one bulk write
+        graphs = [resolve_entities(record_graph(r)) for r in fresh]
+        saved = save_graphs_to_neo4j(graphs, seen_at=[r["seen_at"] for r in fresh],
+                                     articles=[r["article"] for r in fresh], log=False)
+        stats["saved" if saved else "failed"] += len(fresh)
+        if saved and keys:
+            replayed.update(keys)
+            _save_replayed(replayed)
+        logger.info(f"🔁 Replayed {stats['saved']}/{stats['records']} logged graphs.")
+        return saved
+
+    for record, key in _keyed_records(window):
+        stats["records"] += 1
+        batch.append((record, key))
+        if len(batch) >= batch_graphs and not flush():
+            return stats
+    if batch:
+        flush()
+    return stats
+
+
+def _write_csv(path: str, header: list, rows) -> int:
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow(["" if value is None else value for value in row])
+            count += 1
+    return count
+
+
+def export_for_import(directory: str, window: Optional[TimeWindow] = None) -> dict:
+    """
+    Folds the whole log (resolved with the current rules) into CSV files
+    for `neo4j-admin database import full`, which builds a new database
+    far faster than transactional writes. Properties match what the write
+    path stores; the app adds constraints and indexes on its next start.
+    """
+    graphs, seen_at, articles = [], [], []
+    for record in logged_records(window):
+        graphs.append(resolve_entities(record_graph(record)))
+        seen_at.append(record["seen_at"])
+        articles.append(record["article"])
+    nodes_by_label, edges_by_type, article_rows = group_graphs(graphs, seen_at, articles)
+
+    # A node extracted under several types carries all of their labels
+    labels = defaultdict(lambda: {ENTITY_LABEL})
+    first_seen, last_seen = {}, {}
+    for label, rows in nodes_by_label.items():
+        for row in rows:
+            labels[row["id"]].add(label)
+            first_seen[row["id"]] = min(first_seen.get(row["id"], row["first_seen"]), row["first_seen"])
+            last_seen[row["id"]] = max(last_seen.get(row["id"], row["last_seen"]), row["last_seen"])
+
+    os.makedirs(directory, exist_ok=True)
+    join = ARRAY_DELIMITER.join
+    return {
+        "entities": _write_csv(
+            os.path.join(directory, "entities.csv"),
+            [f"id:ID({ENTITY_LABEL})", ":LABEL", "first_seen:long", "last_seen:long"],
+            ((node_id, join(sorted(node_labels)), first_seen[node_id], last_seen[node_id])
+             for node_id, node_labels in labels.items())),
+        "relationships": _write_csv(
+            os.path.join(directory, "relationships.csv"),
+            [f":START_ID({ENTITY_LABEL})", f":END_ID({ENTITY_LABEL})", ":TYPE", "sentiment",
+             "first_seen:long", "last_seen:long", "mention_count:long", "sentiment_history:string[]",
+             "sources:string[]"],
+            ((row["source_id"], row["target_id"], relationship, row["sentiment"], row["first_seen"],
+              row["last_seen"], row["mentions"], join(row["history"][-settings.EDGE_HISTORY_LIMIT:]),
+              join(row["sources"][-settings.EDGE_SOURCES_LIMIT:]))
+             for relationship, rows in edges_by_type.items() for row in rows)),
+        "articles": _write_csv(
+            os.path.join(directory, "articles.csv"),
+            [f"url:ID({ARTICLE_LABEL})", ":LABEL", "title", "content_hash", "published:long", "ingested_at:long"],
+            ((row["url"], ARTICLE_LABEL, row["title"], row["content_hash"], row["published"], row["ingested_at"])
+             for row in article_rows)),
+        "mentions": _write_csv(
+            os.path.join(directory, "mentions.csv"),
+            [f":START_ID({ARTICLE_LABEL})", f":END_ID({ENTITY_LABEL})", ":TYPE"],
+            ((row["url"], entity_id, MENTIONS) for row in article_rows for entity_id in row["entities"])),
+    }
@@ -0,0 +1,208 @@
+import asyncio
+import logging
+from typing import List, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.scraper import commit_news, stream_latest_news
+from app.services.extractor import aextract_graph_from_text, aextract_graphs_batch
+from app.services.extraction_cache import extraction_cache
+from app.services.entity_resolver import resolve_entities
+from app.services.graph_store import save_graphs_to_neo4j
+from app.services.article_registry import article_registry
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of the stream on a queue
+_DONE = None
+
+# In batch mode, how long a worker waits for more articles to fill a batch
+_BATCH_LINGER_SECONDS = 0.25
+
+
+class RateLimiter:
+    """
+    Spaces out calls so a stage never starts more than `rate` calls per second.
+    A rate of 0 disables the limit.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = asyncio.Lock()
+        self._next_slot = 0.0
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            delay = self._next_slot - now
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_slot = max(now, self._next_slot) + self.interval
+
+
+async def _fetch_stage(out_queue: asyncio.Queue, articles: Optional[List[dict]], workers: int, stats: dict):
+    """Stage 1: Scrape. Feeds articles into the extract queue."""
+    try:
+        if articles is None:
+            # Pull new entries as each feed is polled; feedparser is blocking,
+            # so every step of the stream runs off the event loop
+            stream = stream_latest_news()
+            while True:
+                with metrics.span("scrape"):
+                    article = await asyncio.to_thread(next, stream, None)
+                if article is None:
+                    break
+                stats["fetched"] += 1
+                metrics.inc("pipeline_articles_total", outcome="fetched")
+                # Usually answered by the Bloom filter alone
+                if not await asyncio.to_thread(article_registry.filter_new, [article]):
+                    stats["skipped"] += 1
+                    metrics.inc("pipeline_articles_total", outcome="skipped")
+                    await asyncio.to_thread(commit_news, [article])
+                    continue
+                await out_queue.put(article)
+        else:
+            stats["fetched"] += len(articles)
+            metrics.inc("pipeline_articles_total", len(articles), outcome="fetched")
+            # One bulk check for the whole list
+            new_articles = await asyncio.to_thread(article_registry.filter_new, articles)
+            stats["skipped"] += len(articles) - len(new_articles)
+            metrics.inc("pipeline_articles_total", len(articles) - len(new_articles), outcome="skipped")
+            for article in new_articles:
+                await out_queue.put(article)
+    finally:
+        # One end marker per extract worker
+        for _ in range(workers):
+            await out_queue.put(_DONE)
+
+
+async def _take_articles(in_queue: asyncio.Queue, max_articles: int):
+    """
+    Takes up to `max_articles` from the queue, waiting briefly for
+    stragglers. Returns (articles, reached_end).
+    """
+    first = await in_queue.get()
+    if first is _DONE:
+        return [], True
+
+    articles = [first]
+    while len(articles) < max_articles:
+        try:
+            article = await asyncio.wait_for(in_queue.get(), timeout=_BATCH_LINGER_SECONDS)
+        except asyncio.TimeoutError:
+            break
+        if article is _DONE:
+            return articles, True
+        articles.append(article)
+    return articles, False
+
+
+async def _extract_worker(in_queue: asyncio.Queue, out_queue: asyncio.Queue, limiter: RateLimiter, stats: dict):
+    """
+    Stage 2: Extract. Each worker keeps one LLM call in flight; in batch
+    mode that call covers several articles.
+    """
+    max_articles = settings.EXTRACT_BATCH_MAX_ARTICLES if settings.EXTRACT_BATCH_MODE else 1
+
+    try:
+        reached_end = False
+        while not reached_end:
+            articles, reached_end = await _take_articles(in_queue, max_articles)
+            if not articles:
+                break
+
+            texts = [f"{article['title']}. {article['summary']}" for article in articles]
+            for article in articles:
+                logger.debug(f"🧠 Extracting: {article['title']}...")
+
+            with metrics.span("extract"):
+                if len(texts) == 1:
+                    graphs = [await aextract_graph_from_text(texts[0], limiter=limiter)]
+                else:
+                    graphs = await aextract_graphs_batch(texts, limiter=limiter)
+
+            for article, graph_data in zip(articles, graphs):
+                if graph_data:
+                    stats["extracted"] += 1
+                    metrics.inc("pipeline_articles_total", outcome="extracted")
+                    # Canonicalize ids before they reach the MERGE
+                    with metrics.span("resolve"):
+                        resolved = resolve_entities(graph_data)
+                    await out_queue.put((resolved, article, graph_data))
+                else:
+                    stats["failed"] += 1
+                    metrics.inc("pipeline_articles_total", outcome="failed")
+                    logger.warning(f"❌ Extraction failed for: {article['title']}")
+    finally:
+        await out_queue.put(_DONE)
+
+
+async def _write_stage(in_queue: asyncio.Queue, workers: int, limiter: RateLimiter, stats: dict):
+    """Stage 3: Save. Collects graphs and flushes them in bulk batches."""
+    pending = []
+    finished_workers = 0
+
+    async def flush():
+        if not pending:
+            return
+        batch = list(pending)
+        pending.clear()
+        await limiter.wait()
+        with metrics.span("write"):
+            saved = await asyncio.to_thread(save_graphs_to_neo4j, [graph for graph, _, _ in batch],
+                                            articles=[article for _, article, _ in batch],
+                                            extracted=[raw for _, _, raw in batch])
+        if not saved:
+            stats["save_failed"] += len(batch)
+            metrics.inc("pipeline_articles_total", len(batch), outcome="save_failed")
+            logger.warning(f"❌ Save failed for a batch of {len(batch)} article(s).")
+            return
+        stats["saved"] += len(batch)
+        metrics.inc("pipeline_articles_total", len(batch), outcome="saved")
+        # Only now may the feed cursors move past these articles
+        await asyncio.to_thread(commit_news, [article for _, article, _ in batch])
+
+    while finished_workers < workers:
+        item = await in_queue.get()
+        if item is _DONE:
+            finished_workers += 1
+            continue
+
+        # (resolved graph, source article, graph as extracted)
+        pending.append(item)
+        if len(pending) >= settings.PIPELINE_WRITE_FLUSH_SIZE:
+            await flush()
+
+    await flush()
+
+
+async def run_etl_pipeline(articles: Optional[List[dict]] = None):
+    """
+    The full ETL pipeline: Scrape -> Extract (+ Resolve) -> Save, as three async stages
+    connected by bounded queues. Up to PIPELINE_EXTRACT_CONCURRENCY
+    extractions run at once, so a run takes roughly as long as its slowest
+    calls instead of the sum of all of them.
+
+    Pass `articles` to skip the scrape stage (e.g. for replays).
+    Returns a dict of counters for the run.
+    """
+    workers = max(1, settings.PIPELINE_EXTRACT_CONCURRENCY)
+    extract_queue = asyncio.Queue(maxsize=settings.PIPELINE_QUEUE_SIZE)
+    write_queue = asyncio.Queue(maxsize=settings.PIPELINE_QUEUE_SIZE)
+    extract_limiter = RateLimiter(settings.PIPELINE_EXTRACT_RATE)
+    write_limiter = RateLimiter(settings.PIPELINE_WRITE_RATE)
+
+    stats = {"fetched": 0, "skipped": 0, "extracted": 0, "failed": 0, "saved": 0, "save_failed": 0}
+
+    with metrics.span("pipeline_run"):
+        await asyncio.gather(
+            _fetch_stage(extract_queue, articles, workers, stats),
+            *[_extract_worker(extract_queue, write_queue, extract_limiter, stats) for _ in range(workers)],
+            _write_stage(write_queue, workers, write_limiter, stats),
+        )
+
+    logger.info(f"📦 Pipeline finished: {stats} | 🗃️ Extraction cache: {extraction_cache.stats()}")
+    return stats
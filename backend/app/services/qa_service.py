@@ -1,142 +1,277 @@
-from app.core.database import neo4j_conn
-from langchain_groq import ChatGroq
+import asyncio
+import logging
+import re
+import time
+from typing import Optional
+from app.core.cache import TTLCache
 from app.core.config import settings
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-
-# Initialize LLM
-llm = ChatGroq(
-    api_key=settings.GROQ_API_KEY,
-    model="llama-3.3-70b-versatile",
-    temperature=0
+from app.core.metrics import metrics
+from app.core.temporal import TimeWindow
+from app.services.context_store import context_store
+from app.services.entity_resolver import entity_resolver
+from app.services.graph_backends import read_store, uses_neo4j
+from app.services.graph_cache import graph_snapshot
+from app.services.llm_gateway import INTERACTIVE, LazyRunnable, chat_model, llm_gateway
+from app.services.vector_index import vector_index
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "llama-3.3-70b-versatile"
+
+# Pronouns and references that only make sense with the chat history
+ANAPHORA_PATTERN = re.compile(
+    r"\b(he|him|his|she|her|hers|they|them|their|theirs|it|its|this|that|these|those|"
+    r"the company|the ceo|the founder|the same|there)\b",
+    re.IGNORECASE,
 )
 
-def contextualize_question(question: str, history: list):
+CONTEXTUALIZE_MESSAGES = [
+    ("system", """
+    Given a chat history and the latest user question which might reference context in the chat history,
+    formulate a standalone question which can be understood without the chat history.
+    DO NOT answer the question, just reformulate it if needed and otherwise return it as is.
+    """),
+    ("human", "Chat History:\n{history}\n\nLatest Question: {question}"),
+]
+
+EXTRACTION_MESSAGES = [
+    ("system", """
+     You are a precise Entity Extractor API.
+     Your ONLY job is to extract entity names from the user's question.
+     RULES:
+     1. Return ONLY a comma-separated list of names (e.g. "Microsoft, Sam Altman").
+     2. If no specific Company, Person, or Product is named, return exactly the word "None".
+     3. DO NOT output any explanation. JUST the names.
+     """),
+    ("human", "{question}"),
+]
+
+RAG_TEMPLATE = """
+    You are a Data Analyst. Answer strictly based on the database context.
+
+    Context:
+    {context}
+
+    User Question: {question}
+
+    Answer (Max 3 sentences):
+    """
+
+
+def _chain(kind: str):
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+
+    # Shared client; chat calls go through llm_gateway ahead of extraction
+    llm = chat_model(MODEL_NAME)
+    if kind == "contextualize":
+        return ChatPromptTemplate.from_messages(CONTEXTUALIZE_MESSAGES) | llm | StrOutputParser()
+    if kind == "entity":
+        return ChatPromptTemplate.from_messages(EXTRACTION_MESSAGES) | llm
+    return ChatPromptTemplate.from_template(RAG_TEMPLATE) | llm
+
+
+# Chains are built on first use, then reused by every request
+contextualize_chain = LazyRunnable(lambda: _chain("contextualize"))
+entity_chain = LazyRunnable(lambda: _chain("entity"))
+answer_chain = LazyRunnable(lambda: _chain("answer"))
+
+# Keyed by (normalized question, graph version): any write to the graph
+# bumps the version, so cached answers never outlive the data they used.
+answer_cache = TTLCache(settings.QA_CACHE_MAX_ENTRIES, settings.QA_CACHE_TTL_SECONDS, name="qa_answer")
+entity_cache = TTLCache(settings.QA_CACHE_MAX_ENTRIES, settings.QA_CACHE_TTL_SECONDS, name="qa_entity")
+
+
+def _normalize_question(question: str) -> str:
+    return " ".join(question.lower().split()).rstrip("?!. ")
+
+
+def needs_contextualization(question: str, history: list) -> bool:
+    """Only questions that point back at the history need an LLM rewrite."""
+    return bool(history) and bool(ANAPHORA_PATTERN.search(question))
+
+
+async def contextualize_question(question: str, history: list):
     """
     Uses the LLM to rewrite the question based on history.
     Example: "Who fired him?" -> "Who fired Sam Altman?"
+    Skipped entirely when the question has nothing to resolve.
     """
-    if not history:
+    if not needs_contextualization(question, history):
         return question
 
     # Format history into a string
     history_str = "\n".join([f"{msg['role']}: {msg['text']}" for msg in history])
 
-    system_prompt = """
-    Given a chat history and the latest user question which might reference context in the chat history, 
-    formulate a standalone question which can be understood without the chat history. 
-    DO NOT answer the question, just reformulate it if needed and otherwise return it as is.
-    """
-    
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", system_prompt),
-        ("human", "Chat History:\n{history}\n\nLatest Question: {question}"),
-    ])
-    
-    chain = prompt | llm | StrOutputParser()
-    
-    print("⏳ Contextualizing question...")
-    new_question = chain.invoke({"history": history_str, "question": question})
-    print(f"🔄 Rephrased: '{question}' -> '{new_question}'")
+    logger.info("⏳ Contextualizing question...")
+    with metrics.span("qa_contextualize"):
+        new_question = await llm_gateway.ainvoke(
+            contextualize_chain, {"history": history_str, "question": question}, priority=INTERACTIVE)
+    logger.info(f"🔄 Rephrased: '{question}' -> '{new_question}'")
     return new_question
 
-def get_graph_context(entity_names: list):
-    # ... (Keep existing logic) ...
-    session = neo4j_conn.get_session()
-    query = """
-    MATCH (n)-[r]-(m)
-    WHERE n.id IN $names
-    RETURN n.id, type(r) as relationship, r.sentiment as sentiment, m.id as target
-    LIMIT 50
+
+async def get_graph_context(entity_names: list, window: Optional[TimeWindow] = None):
+    # One precomputed entry per entity (rebuilt only after a write touched it);
+    # a time window is built on the spot
+    return await context_store.acontext_for(entity_names, window)
+
+
+async def get_general_context(window: Optional[TimeWindow] = None):
+    # Top entities by centrality, instead of an arbitrary slice of edges
+    return await context_store.adigest(window)
+
+
+async def get_sources(entity_names: list) -> list:
+    # The replica gets Articles written by other processes on each snapshot re-sync
+    if read_store.name == "memory":
+        return read_store.article_sources(entity_names, settings.CHAT_SOURCES_LIMIT)
+    return await asyncio.to_thread(read_store.article_sources, entity_names, settings.CHAT_SOURCES_LIMIT)
+
+
+async def extract_entities_with_llm(question: str) -> list:
+    """LLM fallback for entity extraction. Returns [] for general questions."""
+    response = (await llm_gateway.ainvoke(
+        entity_chain, {"question": question}, priority=INTERACTIVE)).content.strip()
+
+    # Clean up response
+    if ":" in response: response = response.split(":")[-1].strip()
+    response = response.replace("**", "").replace('"', '').replace("'", "")
+
+    logger.info(f"🕵️ AI Extracted: '{response}'")
+    if response.lower() == "none" or response == "":
+        return []
+
+    names = [e.strip() for e in response.split(",") if e.strip()]
+    # Map the LLM's spelling onto ids that actually exist in the graph
+    return [entity_resolver.lookup(name) or name for name in names]
+
+
+async def resolve_question_entities(question: str, cache_key) -> list:
     """
-    results = session.run(query, names=entity_names)
-    context_lines = []
-    for record in results:
-        line = f"{record['n.id']} is connected to {record['target']} via {record['relationship']} ({record['sentiment']})"
-        context_lines.append(line)
-    session.close()
-    return "\n".join(context_lines)
-
-def get_general_context():
-    # ... (Keep existing logic) ...
-    session = neo4j_conn.get_session()
-    query = """
-    MATCH (n)-[r]->(m)
-    RETURN n.id, type(r) as relationship, r.sentiment as sentiment, m.id as target
-    LIMIT 20
+    Graph ids mentioned in the question: the alias index first (exact
+    names, microseconds), then vector retrieval over entity ids and
+    relationship facts (one matrix product), and the (cached) LLM
+    extractor only if QA_LLM_ENTITY_FALLBACK is on and both found nothing.
     """
-    results = session.run(query)
-    context_lines = []
-    for record in results:
-        line = f"{record['n.id']} {record['relationship']} {record['target']} (Sentiment: {record['sentiment']})"
-        context_lines.append(line)
-    session.close()
-    return "\n".join(context_lines)
+    entities = entity_resolver.find_mentions(question)
+    if entities:
+        logger.info(f"🧭 Resolved locally: {entities}")
+        return entities
 
-def answer_question(question: str, history: list = []): # <--- Accepts history
-    
+    with metrics.span("qa_retrieve"):
+        entities = vector_index.retrieve_entities(
+            question, settings.VECTOR_TOP_K, settings.VECTOR_MIN_SCORE, settings.VECTOR_MAX_ENTITIES)
+    if entities:
+        logger.info(f"🧮 Retrieved: {entities}")
+        return entities
+    if not settings.QA_LLM_ENTITY_FALLBACK:
+        return []
+
+    entities = entity_cache.get(cache_key)
+    if entities is None:
+        entities = await extract_entities_with_llm(question)
+        entity_cache.set(cache_key, entities)
+    return entities
+
+
+async def astream_answer(question: str, history: list = [], window: Optional[TimeWindow] = None):
+    """
+    The GraphRAG pipeline as a stream of (event, data) pairs:
+      question -> entities -> context -> sources -> token* -> done
+    Each stage is emitted as soon as it's known, and the answer is
+    streamed token by token, so the UI can render before the LLM finishes.
+    With `window`, the context only covers relationships reported in it.
+    """
     # 1. CONTEXTUALIZE (The Magic Step)
     # Replaces "him/it/they" with actual names
-    refined_question = contextualize_question(question, history)
-
-    # 2. EXTRACT ENTITIES (Using the REFINED question)
-    extraction_prompt = ChatPromptTemplate.from_messages([
-        ("system", """
-         You are a precise Entity Extractor API. 
-         Your ONLY job is to extract entity names from the user's question.
-         RULES:
-         1. Return ONLY a comma-separated list of names (e.g. "Microsoft, Sam Altman").
-         2. If no specific Company, Person, or Product is named, return exactly the word "None".
-         3. DO NOT output any explanation. JUST the names.
-         """),
-        ("human", "{question}"),
-    ])
-    
-    entity_chain = extraction_prompt | llm
-    response = entity_chain.invoke({"question": refined_question}).content.strip()
-    
-    # Clean up response
-    if ":" in response: response = response.split(":")[-1].strip()
-    response = response.replace("**", "").replace('"', '').replace("'", "")
-    
-    print(f"🕵️ AI Extracted: '{response}'")
+    refined_question = await contextualize_question(question, history)
+    yield "question", {"refined_question": refined_question}
+
+    # current_version() re-syncs first once the TTL is up, so writes from
+    # other processes retire the cached answers too
+    if uses_neo4j():
+        version = await asyncio.to_thread(graph_snapshot.current_version)
+    else:
+        version = graph_snapshot.current_version()
+    cache_key = (_normalize_question(refined_question), version, window)
+    cached = answer_cache.get(cache_key)
+    if cached is not None:
+        logger.info("⚡ Answer cache hit.")
+        yield "entities", {"entities": cached["entity"]}
+        yield "context", {"context": cached["context"]}
+        yield "sources", {"sources": cached["sources"]}
+        yield "token", {"text": cached["answer"]}
+        yield "done", cached
+        return
+
+    # 2. EXTRACT ENTITIES, while the general context is fetched alongside
+    # (it's needed whenever no entity is found, and is cached per graph version)
+    with metrics.span("qa_entities"):
+        entity_list, general_context = await asyncio.gather(
+            resolve_question_entities(refined_question, cache_key[:2]),
+            get_general_context(window),
+        )
 
     # 3. GRAPH LOOKUP
-    if response.lower() == "none" or response == "":
-        print("🌍 General Question detected.")
-        context = get_general_context()
+    sources = []
+    if not entity_list:
+        logger.info("🌍 General Question detected.")
+        context = general_context
         entity_list = ["Global Context"]
         if not context: context = "The graph is currently empty."
+        yield "entities", {"entities": str(entity_list)}
     else:
-        entity_list = [e.strip() for e in response.split(",")]
-        print(f"🔍 Looking up entities: {entity_list}")
-        context = get_graph_context(entity_list)
+        logger.info(f"🔍 Looking up entities: {entity_list}")
+        yield "entities", {"entities": str(entity_list)}
+        with metrics.span("qa_context"):
+            context = await get_graph_context(entity_list, window)
         if not context:
-            return {
-                "entity": str(entity_list),
-                "context": "No data",
-                "answer": f"I couldn't find records for {response} in the database."
-            }
-
-    # 4. GENERATE ANSWER
-    rag_prompt = ChatPromptTemplate.from_template(
-        """
-        You are a Data Analyst. Answer strictly based on the database context.
-        
-        Context:
-        {context}
-        
-        User Question: {question}
-        
-        Answer (Max 3 sentences):
-        """
-    )
-    
-    answer_chain = rag_prompt | llm
-    final_response = answer_chain.invoke({"context": context, "question": refined_question})
-    
-    return {
+            answer = f"I couldn't find records for {', '.join(entity_list)} in the database."
+            yield "context", {"context": "No data"}
+            yield "token", {"text": answer}
+            yield "done", {"entity": str(entity_list), "context": "No data", "answer": answer, "sources": []}
+            return
+        # The articles these entities were extracted from
+        sources = await get_sources(entity_list)
+
+    yield "context", {"context": context}
+    yield "sources", {"sources": sources}
+
+    # 4. GENERATE ANSWER, token by token
+    # (timed by hand: a span can't stay open across the yields to the client)
+    chunks = []
+    started = time.perf_counter()
+    stream = llm_gateway.astream(
+        answer_chain, {"context": context, "question": refined_question}, priority=INTERACTIVE)
+    async for chunk in stream:
+        if chunk.content:
+            chunks.append(chunk.content)
+            yield "token", {"text": chunk.content}
+    metrics.observe("stage_duration_seconds", time.perf_counter() - started, stage="qa_answer")
+
+    result = {
         "entity": str(entity_list),
         "context": context,
-        "answer": final_response.content
-    }
\ No newline at end of file
+        "answer": "".join(chunks),
+        "sources": sources,
+    }
+    answer_cache.set(cache_key, result)
+    yield "done", result
+
+
+async def aanswer_question(question: str, history: list = [], window: Optional[TimeWindow] = None):
+    """
+    Non-streaming GraphRAG: runs the same stages as astream_answer and
+    returns only the final {"entity", "context", "answer", "sources"} result.
+    """
+    result = None
+    async for event, data in astream_answer(question, history, window):
+        if event == "done":
+            result = data
+    return result
+
+
+def answer_question(question: str, history: list = []): # <--- Accepts history
+    """Sync wrapper for scripts; the API uses aanswer_question."""
+    return asyncio.run(aanswer_question(question, history))
@@ -1,25 +1,196 @@
-import feedparser
-from bs4 import BeautifulSoup
+import calendar
+import json
+import logging
+import os
+import threading
+from typing import Iterable, Iterator, List, Optional
 
-RSS_URL = "https://techcrunch.com/feed/"
+from app.core.config import settings
 
-def fetch_latest_news():
+logger = logging.getLogger(__name__)
+
+# feedparser and BeautifulSoup are imported on the first poll, not at start-up
+
+
+class FeedPoller:
     """
-    Fetches the latest 3 articles from TechCrunch RSS feed.
+    Polls a list of RSS feeds incrementally.
+
+    Each feed keeps a cursor on disk:
+      - etag / modified: sent back as If-None-Match / If-Modified-Since, so an
+        unchanged feed costs a 304 and no parsing at all
+      - high_water: newest `published` timestamp of a fetch that was ingested in full
+      - seen: recent entry GUIDs, to catch re-published or undated entries
+
+    The cursor only moves for articles the caller reports back through
+    `commit` (saved, queued or already in the graph). Until every entry of
+    a fetch is committed, its etag / high_water stay where they were, so
+    the next poll fetches the feed again and hands out what's left.
     """
-    feed = feedparser.parse(RSS_URL)
-    articles = []
 
-    # Loop through the first 3 entries
-    for entry in feed.entries[:3]:
+    def __init__(self, feeds: List[str], state_path: str, seen_limit: int):
+        self.feeds = feeds
+        self.state_path = state_path
+        self.seen_limit = seen_limit
+        self._lock = threading.Lock()
+        self._state = self._load_state()
+        # feed url -> the latest fetch whose entries aren't all committed yet
+        self._pending = {}
+
+    def _load_state(self) -> dict:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._state, f)
+        # Atomic swap so a crash never leaves a half-written cursor
+        os.replace(tmp_path, self.state_path)
+
+    @staticmethod
+    def _published_ts(entry) -> Optional[int]:
+        parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+        return calendar.timegm(parsed) if parsed else None
+
+    @staticmethod
+    def _to_article(entry, feed_url: str) -> dict:
+        from bs4 import BeautifulSoup
+
         # Clean HTML tags from the summary (RSS often has <p> tags)
-        summary_text = BeautifulSoup(entry.summary, "html.parser").get_text()
-        
-        articles.append({
-            "title": entry.title,
-            "link": entry.link,
+        summary_text = BeautifulSoup(entry.get("summary", ""), "html.parser").get_text()
+
+        return {
+            "title": entry.get("title", ""),
+            "link": entry.get("link", ""),
             "summary": summary_text,
-            "published": entry.published
-        })
-    
-    return articles
\ No newline at end of file
+            "published": entry.get("published", ""),
+            "published_ts": FeedPoller._published_ts(entry),
+            "guid": entry.get("id") or entry.get("link", ""),
+            "feed": feed_url,
+        }
+
+    def poll_feed(self, feed_url: str) -> Iterator[dict]:
+        """Yields only the entries of one feed that we haven't seen yet, oldest first."""
+        import feedparser
+
+        with self._lock:
+            cursor = dict(self._state.get(feed_url, {}))
+
+        feed = feedparser.parse(
+            feed_url,
+            etag=cursor.get("etag"),
+            modified=cursor.get("modified"),
+        )
+
+        if feed.get("status") == 304:
+            logger.info(f"💤 Feed unchanged: {feed_url}")
+            return
+
+        if feed.get("bozo") and not feed.entries:
+            logger.warning(f"⚠️ Failed to read feed {feed_url}: {feed.get('bozo_exception')}")
+            return
+
+        high_water = cursor.get("high_water")
+        seen_set = set(cursor.get("seen", []))
+
+        new_entries = []
+        for entry in feed.entries:
+            guid = entry.get("id") or entry.get("link")
+            published = self._published_ts(entry)
+
+            if guid in seen_set:
+                continue
+            if high_water is not None and published is not None and published < high_water:
+                continue
+            new_entries.append((published or 0, guid, entry))
+
+        # Feeds list newest first; hand entries downstream in publish order
+        new_entries.sort(key=lambda item: item[0])
+
+        published_times = [published for published, _, _ in new_entries if published]
+        with self._lock:
+            self._pending[feed_url] = {
+                "etag": feed.get("etag") or cursor.get("etag"),
+                "modified": feed.get("modified") or cursor.get("modified"),
+                "high_water": max([high_water or 0, *published_times]) or None,
+                "outstanding": {guid for _, guid, _ in new_entries},
+            }
+            # Nothing new: the fetch is complete as it is
+            if self._settle_locked(feed_url):
+                self._save_state()
+
+        for _, _, entry in new_entries:
+            yield self._to_article(entry, feed_url)
+
+    def _settle_locked(self, feed_url: str) -> bool:
+        """Advances etag / high_water once every entry of the pending fetch is committed."""
+        pending = self._pending.get(feed_url)
+        if pending is None or pending["outstanding"]:
+            return False
+        del self._pending[feed_url]
+        cursor = self._state.setdefault(feed_url, {})
+        cursor.update(etag=pending["etag"], modified=pending["modified"], high_water=pending["high_water"])
+        return True
+
+    def commit(self, articles: Iterable[dict]):
+        """
+        Marks articles as ingested (saved, queued or found in the graph), so
+        later polls skip them. Articles that never get here are handed out
+        again by the next poll.
+        """
+        changed = False
+        with self._lock:
+            for article in articles:
+                feed_url, guid = article.get("feed"), article.get("guid")
+                if feed_url not in self.feeds or not guid:
+                    continue
+                cursor = self._state.setdefault(feed_url, {})
+                seen = cursor.setdefault("seen", [])
+                if guid not in seen:
+                    seen.append(guid)
+                    del seen[:-self.seen_limit]
+                    changed = True
+                pending = self._pending.get(feed_url)
+                if pending is not None:
+                    pending["outstanding"].discard(guid)
+                    changed = self._settle_locked(feed_url) or changed
+            if changed:
+                self._save_state()
+
+    def poll(self) -> Iterator[dict]:
+        """Streams new entries across every configured feed."""
+        for feed_url in self.feeds:
+            yield from self.poll_feed(feed_url)
+
+
+# Create a single instance to be imported elsewhere
+feed_poller = FeedPoller(
+    feeds=settings.RSS_FEEDS,
+    state_path=os.path.join(settings.DATA_DIR, "feed_state.json"),
+    seen_limit=settings.FEED_SEEN_IDS_LIMIT,
+)
+
+
+def stream_latest_news() -> Iterator[dict]:
+    """
+    Yields articles from the configured RSS feeds that haven't been
+    processed before, as each feed is fetched. Pass the ones that were
+    ingested to `commit_news`; the rest come back on the next poll.
+    """
+    return feed_poller.poll()
+
+
+def commit_news(articles: Iterable[dict]):
+    feed_poller.commit(articles)
+
+
+def fetch_latest_news():
+    """
+    Fetches all new articles from the configured RSS feeds.
+    """
+    return list(stream_latest_news())
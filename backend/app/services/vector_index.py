@@ -0,0 +1,182 @@
+import logging
+import re
+import threading
+import unicodedata
+import zlib
+from typing import TYPE_CHECKING, Iterable, List, Tuple
+
+from app.core.config import settings
+from app.services.entity_resolver import STOPWORDS
+from app.services.graph_backends import read_store
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# numpy is imported on first use (the matrix is allocated by the first
+# append), so importing the app doesn't pay for it
+
+ENTITY = "entity"
+FACT = "fact"
+
+_WORD = re.compile(r"[0-9a-z]+")
+
+# Word features count double: trigrams only have to carry partial matches
+_WORD_WEIGHT = 2.0
+_TRIGRAM_WEIGHT = 1.0
+
+
+def _features(text: str):
+    """Word unigrams and character trigrams of each word (with boundaries)."""
+    text = unicodedata.normalize("NFKC", text).lower()
+    for word in _WORD.findall(text):
+        if word in STOPWORDS:
+            continue
+        yield "w:" + word, _WORD_WEIGHT
+        padded = f"<{word}>"
+        for i in range(len(padded) - 2):
+            yield padded[i:i + 3], _TRIGRAM_WEIGHT
+
+
+def embed(texts: List[str], dim: int) -> "np.ndarray":
+    """
+    Hashed n-gram embeddings: each feature lands in one of `dim` buckets
+    with a hash-derived sign, then rows are L2-normalized, so a dot
+    product is cosine similarity. Deterministic and offline; no model.
+    """
+    import numpy as np
+
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for feature, weight in _features(text):
+            h = zlib.crc32(feature.encode())
+            vectors[row, h % dim] += weight if h & 0x80000000 else -weight
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+def _numbers(text: str) -> set:
+    return {word for word in _WORD.findall(text.lower()) if any(c.isdigit() for c in word)}
+
+
+def render_fact(source: str, relationship: str, target: str) -> str:
+    """"OpenAI", "PARTNERS_WITH", "Microsoft" -> "OpenAI partners with Microsoft" """
+    return f"{source} {relationship.replace('_', ' ').lower()} {target}"
+
+
+class VectorIndex:
+    """
+    Embedded retrieval over entity ids and rendered relationship facts.
+
+    Vectors live in one float32 matrix (grown by doubling) so a search is
+    a single matrix product; queries are searched in batches. The write
+    path appends what it writes; items are keyed, so re-adding one is a
+    no-op and only new ones get embedded.
+    """
+
+    def __init__(self, dim: int, initial_capacity: int = 1024):
+        self.dim = dim
+        self._initial_capacity = initial_capacity
+        self._matrix = None  # Allocated by the first append
+        self._size = 0
+        self._items: List[Tuple[str, str, tuple]] = []   # (kind, text, entity ids)
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    # --- Writes ---
+
+    def _append_locked(self, items: List[Tuple[str, str, tuple]]):
+        import numpy as np
+
+        vectors = embed([text for _, text, _ in items], self.dim)
+        needed = self._size + len(items)
+        if self._matrix is None:
+            self._matrix = np.zeros((max(needed, self._initial_capacity), self.dim), dtype=np.float32)
+        elif needed > len(self._matrix):
+            capacity = max(needed, 2 * len(self._matrix))
+            grown = np.zeros((capacity, self.dim), dtype=np.float32)
+            grown[:self._size] = self._matrix[:self._size]
+            self._matrix = grown
+        self._matrix[self._size:needed] = vectors
+        for item in items:
+            self._keys[(item[0], item[1])] = len(self._items)
+            self._items.append(item)
+        self._size = needed
+
+    def add(self, entity_ids: Iterable[str] = (), facts: Iterable[Tuple[str, str, str]] = ()):
+        """Appends entity ids and (source, relationship, target) facts not indexed yet."""
+        items = [(ENTITY, entity_id, (entity_id,)) for entity_id in entity_ids if entity_id]
+        items += [(FACT, render_fact(s, r, t), (s, t)) for s, r, t in facts if s and t]
+        with self._lock:
+            new, seen = [], set()
+            for item in items:
+                key = (item[0], item[1])
+                if key not in self._keys and key not in seen:
+                    seen.add(key)
+                    new.append(item)
+            if new:
+                self._append_locked(new)
+
+    def add_edge_rows(self, rows: Iterable[dict]):
+        """Indexes rows shaped like GraphStore.edge_rows()."""
+        rows = list(rows)
+        self.add(
+            (node_id for row in rows for node_id in (row["source"], row["target"])),
+            ((row["source"], row["relationship"], row["target"]) for row in rows),
+        )
+
+    def load_from_graph(self):
+        self.add(read_store.node_ids())
+        self.add_edge_rows(read_store.edge_rows())
+        logger.info(f"🧮 Vector index loaded: {len(self)} entities and facts.")
+
+    # --- Reads ---
+
+    def search(self, queries: List[str], k: int) -> List[List[Tuple[float, Tuple[str, str, tuple]]]]:
+        """Top-k (score, item) per query, best first, in one matrix product."""
+        import numpy as np
+
+        with self._lock:
+            size = self._size
+            matrix = self._matrix[:size] if size else None
+            items = self._items[:size]
+        if not size or not queries:
+            return [[] for _ in queries]
+
+        scores = embed(queries, self.dim) @ matrix.T
+        k = min(k, size)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in enumerate(top):
+            ranked = candidates[np.argsort(-scores[row, candidates])]
+            results.append([(float(scores[row, i]), items[i]) for i in ranked])
+        return results
+
+    def retrieve_entities(self, question: str, k: int, min_score: float, max_entities: int) -> List[str]:
+        """
+        Entity ids a question is about: direct entity hits, plus both ends
+        of matching facts (slightly discounted), best first. Like the
+        resolver's fuzzy match, when the question names a version, an
+        entity hit must not name another ("Llama 4" never finds "Llama 3").
+        """
+        numbers = _numbers(question)
+        ranked = {}
+        for score, (kind, text, entity_ids) in self.search([question], k)[0]:
+            if score < min_score:
+                break
+            if kind == FACT:
+                score *= 0.9
+            elif numbers and not _numbers(text) <= numbers:
+                continue
+            for entity_id in entity_ids:
+                ranked[entity_id] = max(ranked.get(entity_id, 0.0), score)
+        return sorted(ranked, key=ranked.get, reverse=True)[:max_entities]
+
+
+# Create a single instance to be imported elsewhere
+vector_index = VectorIndex(dim=settings.VECTOR_DIM)
@@ -0,0 +1,131 @@
+# backend/benchmark_startup.py
+"""
+Cold-start benchmark: how long a fresh process takes to import the app,
+run its start-up until /ready, and (off the request path) build the LLM
+clients. Each run is a new interpreter, like a free-tier instance waking up.
+
+It also checks that the heavy dependencies (LangChain, Groq, neo4j,
+SciPy, feedparser, BeautifulSoup) are NOT imported by `import app.main`;
+they load on first use or in the background.
+
+Usage:
+  python benchmark_startup.py                   # 5 runs, GRAPH_BACKEND=memory
+  python benchmark_startup.py --runs 10 --importtime 15
+  python benchmark_startup.py --json startup.json
+"""
+import argparse
+import collections
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Must stay out of sys.modules after `import app.main`
+DEFERRED_MODULES = ["langchain_core", "langchain_groq", "groq", "langsmith", "neo4j", "numpy", "scipy", "feedparser", "bs4"]
+
+# Runs inside each fresh interpreter; prints one JSON line
+_PROBE = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+import app.main as main
+imported = time.perf_counter()
+loaded = sorted(m for m in {deferred!r} if m in sys.modules)
+
+async def start_up():
+    async with main.app.router.lifespan_context(main.app):
+        await main.readiness.wait(None)
+        ready = time.perf_counter()
+        await asyncio.to_thread(main._build_llm_clients)
+        return ready, time.perf_counter()
+
+ready, llm_ready = asyncio.run(start_up())
+print(json.dumps({{
+    "import_s": imported - started,
+    "ready_s": ready - started,
+    "llm_s": llm_ready - ready,
+    "deferred_but_loaded": loaded,
+}}))
+"""
+
+
+def _environment(backend: str, data_dir: str) -> dict:
+    env = dict(os.environ, GRAPH_BACKEND=backend, DATA_DIR=data_dir, LAYOUT_ENABLED="false", LOG_LEVEL="WARNING")
+    # Settings need these even though nothing is called
+    for key in ("NEO4J_URI", "NEO4J_USERNAME", "NEO4J_PASSWORD", "GROQ_API_KEY"):
+        env.setdefault(key, "unused")
+    return env
+
+
+def run_once(env: dict) -> dict:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(deferred=DEFERRED_MODULES)],
+        env=env, capture_output=True, text=True, check=True)
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report["process_s"] = time.perf_counter() - started
+    return report
+
+
+def import_profile(env: dict, top: int) -> list:
+    """Self time per top-level package for `import app.main` (python -X importtime)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=env, capture_output=True, text=True, check=True)
+    totals = collections.Counter()
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+\d+ \|\s*(\S+)", line)
+        if match:
+            totals[match[2].split(".")[0]] += int(match[1])
+    return [(package, round(us / 1000, 1)) for package, us in totals.most_common(top)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--backend", default="memory", help="GRAPH_BACKEND for the runs (neo4j needs a database)")
+    parser.add_argument("--importtime", type=int, default=10, help="Show the N packages slowest to import (0: skip)")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = _environment(args.backend, data_dir)
+        runs = [run_once(env) for _ in range(args.runs)]
+        profile = import_profile(env, args.importtime) if args.importtime else []
+
+    report = {
+        stage: {
+            "median_ms": round(statistics.median(run[stage] for run in runs) * 1000, 1),
+            "max_ms": round(max(run[stage] for run in runs) * 1000, 1),
+        }
+        for stage in ("import_s", "ready_s", "llm_s", "process_s")
+    }
+    report["deferred_but_loaded"] = sorted({m for run in runs for m in run["deferred_but_loaded"]})
+    report["import_profile_ms"] = profile
+
+    print(f"\n🧊 Cold start ({args.runs} runs, GRAPH_BACKEND={args.backend})")
+    print("Stage                          median ms    max ms")
+    for stage, label in (("import_s", "import app.main"), ("ready_s", "import -> /ready"),
+                         ("llm_s", "LLM clients (background)"), ("process_s", "whole process")):
+        print(f"{label:<28} {report[stage]['median_ms']:>11} {report[stage]['max_ms']:>9}")
+    if profile:
+        print("\nSlowest imports (self time)")
+        for package, ms in profile:
+            print(f"  {package:<24} {ms:>8} ms")
+    if report["deferred_but_loaded"]:
+        print(f"\n⚠️ Imported at start-up but should be lazy: {', '.join(report['deferred_but_loaded'])}")
+    else:
+        print("\n✅ Heavy dependencies stay out of the import path.")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if report["deferred_but_loaded"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# backend/fake_llm_server.py
+"""
+Tiny OpenAI/Groq-compatible chat server that misbehaves on purpose, for
+exercising the LLM gateway (rate limits, Retry-After, backoff) offline.
+
+    python fake_llm_server.py --port 8900 --rpm 20 --fail-rate 0.2
+    GROQ_BASE_URL=http://localhost:8900 python simulate_feed.py
+
+- --rpm: real rolling-window limit; excess requests get 429 + Retry-After
+- --fail-rate: extra random 429s
+- --latency-ms: time per response
+Tool calls (structured output) are answered with an empty-but-valid object
+built from the tool's JSON schema; plain chat gets a canned sentence.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ARGS = None
+_window = deque()
+_window_lock = threading.Lock()
+_counts = {"ok": 0, "429": 0}
+
+
+def _empty_value(schema: dict):
+    kind = schema.get("type")
+    if kind == "array":
+        return []
+    if kind == "object":
+        return {name: _empty_value(prop) for name, prop in schema.get("properties", {}).items()}
+    if kind in ("integer", "number"):
+        return 0
+    if kind == "boolean":
+        return False
+    return ""
+
+
+def _rate_limited() -> float:
+    """Returns seconds to wait if this request is over the limit, else 0."""
+    now = time.monotonic()
+    with _window_lock:
+        while _window and now - _window[0] > 60:
+            _window.popleft()
+        if ARGS.rpm and len(_window) >= ARGS.rpm:
+            return 60 - (now - _window[0])
+        if random.random() < ARGS.fail_rate:
+            return ARGS.retry_after
+        _window.append(now)
+    return 0.0
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict, headers: dict = None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+
+        wait = _rate_limited()
+        if wait:
+            _counts["429"] += 1
+            self._send_json(429, {"error": {"message": "Rate limit reached", "type": "tokens", "code": "rate_limit_exceeded"}},
+                            {"retry-after": f"{wait:.2f}", "x-ratelimit-reset-requests": f"{wait:.2f}s"})
+            return
+
+        time.sleep(ARGS.latency_ms / 1000)
+        _counts["ok"] += 1
+
+        message = {"role": "assistant", "content": "This is a fake answer from the test server."}
+        tools = request.get("tools") or []
+        if tools:
+            function = tools[0]["function"]
+            message = {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [{
+                    "id": f"call_{uuid.uuid4().hex[:8]}",
+                    "type": "function",
+                    "function": {
+                        "name": function["name"],
+                        "arguments": json.dumps(_empty_value(function.get("parameters", {}))),
+                    },
+                }],
+            }
+
+        prompt_chars = sum(len(str(m.get("content") or "")) for m in request.get("messages", []))
+        usage = {"prompt_tokens": prompt_chars // 4, "completion_tokens": 20, "total_tokens": prompt_chars // 4 + 20}
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex}", "created": int(time.time()), "model": request.get("model")}
+
+        if request.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for word in (message["content"] or "").split(" "):
+                chunk = {**base, "object": "chat.completion.chunk",
+                         "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            final = {**base, "object": "chat.completion.chunk",
+                     "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "x_groq": {"usage": usage}}
+            self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode())
+            return
+
+        self._send_json(200, {**base, "object": "chat.completion", "usage": usage, "choices": [{
+            "index": 0, "message": message, "finish_reason": "tool_calls" if tools else "stop"}]})
+
+
+def main():
+    global ARGS
+    parser = argparse.ArgumentParser(description="Fake Groq endpoint that emits 429s.")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--rpm", type=int, default=20, help="Requests per rolling minute before 429s (0 = no limit)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Probability of a random 429")
+    parser.add_argument("--retry-after", type=float, default=2.0, help="Retry-After for random 429s")
+    parser.add_argument("--latency-ms", type=float, default=200)
+    ARGS = parser.parse_args()
+
+    server = ThreadingHTTPServer(("0.0.0.0", ARGS.port), Handler)
+    print(f"🤖 Fake LLM on http://localhost:{ARGS.port} (rpm={ARGS.rpm}, fail_rate={ARGS.fail_rate})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n📊 Served: {_counts}")
+
+
+if __name__ == "__main__":
+    main()
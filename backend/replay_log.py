@@ -0,0 +1,89 @@
+# backend/replay_log.py
+"""
+Rebuilds the graph from the ingestion log (data/ingest_log) instead of
+re-running every article through the LLM, e.g. after a schema or entity
+resolution change.
+
+    python replay_log.py stats
+    python replay_log.py replay                      # bulk writes into the configured graph
+    python replay_log.py replay --from 2025-06-01 --batch 2000
+    python replay_log.py replay --no-resolve         # keep ids exactly as extracted
+    python replay_log.py export import/              # CSVs for neo4j-admin (new, empty database)
+
+Replay skips articles that are already in the graph (and graphs logged
+without an article that an earlier replay saved, see ingest_log/.replayed),
+so it can be rerun after an interruption. With GRAPH_BACKEND=memory it is
+a dry run.
+"""
+import argparse
+import logging
+import sys
+
+from app.core.config import settings
+from app.core.database import neo4j_conn
+from app.core.graph_schema import ensure_schema
+from app.core.metrics import configure_logging
+from app.core.temporal import TimeWindow
+from app.services.entity_resolver import entity_resolver
+from app.services.graph_backends import uses_neo4j, warm_read_replica
+from app.services.ingestion_log import ingestion_log
+from app.services.log_replay import ARRAY_DELIMITER, export_for_import, replay
+
+logger = logging.getLogger("replay_log")
+
+
+def _replay(window, batch):
+    if uses_neo4j():
+        neo4j_conn.connect()
+        ensure_schema()
+    try:
+        # Resolution picks up the ids already in the graph, like a worker does
+        warm_read_replica()
+        entity_resolver.load_from_graph()
+        stats = replay(window, batch)
+    finally:
+        neo4j_conn.close()
+
+    logger.info(f"🏁 Replay finished: {stats}")
+    if stats["failed"]:
+        sys.exit("❌ A write failed; fix it and run the replay again (saved articles are skipped).")
+
+
+def _export(directory, window):
+    counts = export_for_import(directory, window)
+    logger.info(f"📦 Exported {counts} to {directory}")
+    print(
+        f"\nImport into a new database (stopped), then start the app to create the indexes:\n"
+        f"  neo4j-admin database import full --array-delimiter='{ARRAY_DELIMITER}' "
+        f"--nodes={directory}/entities.csv --nodes={directory}/articles.csv "
+        f"--relationships={directory}/relationships.csv --relationships={directory}/mentions.csv <database>")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay or export the ingestion log.")
+    parser.add_argument("command", choices=["stats", "replay", "export"])
+    parser.add_argument("directory", nargs="?", default="import", help="Output directory for `export`")
+    parser.add_argument("--from", dest="start", help="Only graphs seen from this time (epoch seconds or ISO date)")
+    parser.add_argument("--to", dest="end", help="...up to this time")
+    parser.add_argument("--batch", type=int, default=settings.REPLAY_BATCH_GRAPHS, help="Graphs per write transaction")
+    parser.add_argument("--no-resolve", action="store_true", help="Skip entity resolution")
+    args = parser.parse_args()
+
+    configure_logging()
+    if args.no_resolve:
+        settings.ENTITY_RESOLUTION_ENABLED = False
+    try:
+        window = TimeWindow.parse(args.start, args.end)
+    except ValueError:
+        sys.exit("❌ --from / --to must be epoch seconds or ISO 8601 dates.")
+
+    if args.command == "stats":
+        logger.info(f"📜 Ingestion log ({ingestion_log.directory}): {ingestion_log.stats()}")
+    elif args.command == "replay":
+        _replay(window, args.batch)
+    else:
+        _export(args.directory, window)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
 import time
+from app.core.database import neo4j_conn
+from app.core.metrics import configure_logging
+from app.services.graph_backends import uses_neo4j, warm_read_replica
 from app.services.extractor import extract_graph_from_text
 from app.services.graph_store import save_graph_to_neo4j
+from app.services.entity_resolver import entity_resolver, resolve_entities
 
 # YOUR DATASET
 dummy_articles = [
@@ -116,6 +120,11 @@ dummy_articles = [
 def run_simulation():
     print("🚀 STARTING SMART SIMULATION (DEDUPLICATION TEST)...")
     print(f"Loaded {len(dummy_articles)} articles.")
+    # Same order as the app's start-up: the resolver reads the warmed replica
+    if uses_neo4j():
+        neo4j_conn.connect()
+    warm_read_replica()
+    entity_resolver.load_from_graph()
     print("--------------------------------------------------")
 
     for i, article in enumerate(dummy_articles):
@@ -127,7 +136,8 @@ def run_simulation():
         try:
             # 1. Extract
             print("   🧠 Llama 3 Extracting & Normalizing...")
-            graph_data = extract_graph_from_text(full_text)
+            extracted = extract_graph_from_text(full_text)
+            graph_data = resolve_entities(extracted)
 
             if graph_data:
                 # Debug: Show what the LLM decided the ID should be
@@ -137,7 +147,7 @@ def run_simulation():
 
                 # 2. Save (MERGE logic handles the deduplication)
                 print("   💾 Saving to Neo4j (Merging duplicates)...")
-                save_graph_to_neo4j(graph_data)
+                save_graph_to_neo4j(graph_data, extracted=extracted)
                 print("   ✅ Done.")
             else:
                 print("   ⚠️ No data extracted.")
@@ -153,4 +163,5 @@ def run_simulation():
 
 
 if __name__ == "__main__":
+    configure_logging()
     run_simulation()
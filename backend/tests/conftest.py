@@ -0,0 +1,13 @@
+import os
+import tempfile
+
+# Settings are read at import time: no Neo4j, no Groq, state in a scratch directory
+os.environ.setdefault("NEO4J_URI", "bolt://localhost:7687")
+os.environ.setdefault("NEO4J_USERNAME", "neo4j")
+os.environ.setdefault("NEO4J_PASSWORD", "unused")
+os.environ.setdefault("GROQ_API_KEY", "unused")
+os.environ["GRAPH_BACKEND"] = "memory"
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="graph-tests-")
+os.environ["LOG_LEVEL"] = "WARNING"
+# Tests drive the layout job themselves
+os.environ["LAYOUT_ENABLED"] = "false"
@@ -0,0 +1,38 @@
+from app.core.bloom import BloomFilter
+from app.services.article_registry import ArticleRegistry
+from app.services.graph_backends import primary_store
+
+
+def test_added_items_are_always_found():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    urls = [f"https://example.com/{i}" for i in range(1000)]
+    bloom.update(urls)
+    assert all(url in bloom for url in urls)
+    assert bloom.count == 1000
+
+
+def test_false_positive_rate_stays_near_the_target():
+    bloom = BloomFilter(capacity=2000, error_rate=0.01)
+    bloom.update(f"seen-{i}" for i in range(2000))
+    false_positives = sum(f"new-{i}" in bloom for i in range(20000))
+    assert false_positives / 20000 < 0.02
+
+
+def test_clear_forgets_everything():
+    bloom = BloomFilter(capacity=100, error_rate=0.01)
+    bloom.add("a")
+    bloom.clear()
+    assert "a" not in bloom
+    assert bloom.count == 0
+
+
+def test_registry_confirms_maybe_seen_urls_against_the_store():
+    url = "https://example.com/bloom-registry"
+    primary_store.upsert({}, {}, articles=[{"url": url, "title": "t", "content_hash": "h",
+                                            "published": None, "ingested_at": 1, "entities": []}])
+    registry = ArticleRegistry(capacity=1000, error_rate=0.01, refresh_seconds=3600)
+
+    assert registry.existing([url, "https://example.com/never"]) == {url}
+    # A false positive from the filter is caught by the store lookup
+    registry.add(["https://example.com/only-in-the-filter"])
+    assert registry.existing(["https://example.com/only-in-the-filter"]) == set()
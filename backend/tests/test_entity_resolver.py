@@ -0,0 +1,32 @@
+from app.core.config import settings
+from app.services.entity_resolver import EntityResolver, normalize_name
+
+
+def _resolver(*ids):
+    resolver = EntityResolver(settings.ENTITY_FUZZY_THRESHOLD)
+    resolver.add_many(ids)
+    return resolver
+
+
+def test_short_words_only_match_with_the_same_casing():
+    resolver = _resolver("US", "AI", "OpenAI")
+    assert resolver.find_mentions("What did OpenAI tell us about the deal?") == ["OpenAI"]
+    assert resolver.find_mentions("Did the US sue OpenAI?") == ["US", "OpenAI"]
+    assert resolver.find_mentions("who makes ai chips") == []
+
+
+def test_pronouns_never_match():
+    resolver = _resolver("We", "Her")
+    assert resolver.find_mentions("What did we learn about her?") == []
+
+
+def test_longer_mentions_ignore_casing():
+    resolver = _resolver("Sam Altman", "Microsoft")
+    assert resolver.find_mentions("did sam altman meet MICROSOFT") == ["Sam Altman", "Microsoft"]
+
+
+def test_generic_words_before_a_model_number_are_kept():
+    assert normalize_name("Tesla Model 3") == "3 model tesla"
+    assert normalize_name("Model 3") != normalize_name("3")
+    assert normalize_name("Blackwell B200 GPU") == "b200 blackwell"
+    assert normalize_name("Llama model") == "llama"
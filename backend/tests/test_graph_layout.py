@@ -0,0 +1,62 @@
+import numpy as np
+
+from app.models.schemas import Edge, GraphData, Node
+from app.services.graph_layout import GraphLayout, label_propagation, pagerank
+from app.services.graph_store import save_graph_to_neo4j
+
+
+def _save_chain(prefix: str, size: int):
+    save_graph_to_neo4j(GraphData(
+        nodes=[Node(id=f"{prefix}{i}", type="Company") for i in range(size)],
+        edges=[Edge(source=f"{prefix}{i}", target=f"{prefix}{i + 1}", relationship="PARTNERS_WITH",
+                    sentiment="Neutral") for i in range(size - 1)],
+    ))
+
+
+def _positions(layout: GraphLayout) -> dict:
+    return {row["id"]: (row["x"], row["y"], row["z"]) for row in layout.rows()}
+
+
+def test_pagerank_sums_to_one_and_favors_the_sink():
+    src, dst = np.array([0, 1, 2]), np.array([2, 2, 0])
+    rank = pagerank(3, src, dst)
+    assert abs(rank.sum() - 1) < 1e-9
+    assert rank.argmax() == 2
+
+
+def test_label_propagation_splits_disconnected_cliques():
+    src, dst = np.array([0, 0, 1, 3, 3, 4]), np.array([1, 2, 2, 4, 5, 5])
+    labels = label_propagation(6, src, dst)
+    assert labels[0] == labels[1] == labels[2]
+    assert labels[3] == labels[4] == labels[5]
+    assert labels[0] != labels[3]
+
+
+def test_other_processes_follow_the_saved_version():
+    owner, reader = GraphLayout(), GraphLayout()
+    _save_chain("layout-a", 5)
+
+    assert owner.refresh(compute=True)
+    assert not owner.refresh(compute=True)  # graph unchanged
+    assert reader.refresh(compute=False)
+    assert reader.version == owner.version
+    assert not reader.refresh(compute=False)  # nothing new saved: no reload
+
+    _save_chain("layout-b", 3)
+    assert owner.refresh(compute=True)
+    assert reader.refresh(compute=False)
+    assert reader.version == owner.version
+    assert _positions(reader) == _positions(owner)
+    assert "layout-b0" in _positions(reader)
+
+
+def test_version_keeps_counting_after_a_restart():
+    GraphLayout().refresh(compute=True)
+    _save_chain("layout-c", 2)
+    before = GraphLayout()
+    before.refresh(compute=False)
+
+    # A new owner process warm-starts from the saved layout and numbers on from it
+    restarted = GraphLayout()
+    assert restarted.refresh(compute=True)
+    assert restarted.version == before.version + 1
@@ -0,0 +1,17 @@
+from app.models.schemas import Edge, GraphData, Node
+from app.services import graph_store
+
+
+def test_a_failing_index_update_after_the_commit_still_counts_as_saved(monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("index down")
+
+    # Retrying a committed write would count its mentions twice
+    monkeypatch.setattr(graph_store.vector_index, "add", broken)
+    url = "https://example.com/committed"
+    graph = GraphData(nodes=[Node(id="Committed", type="Company"), Node(id="Committed Labs", type="Company")],
+                      edges=[Edge(source="Committed", target="Committed Labs", relationship="OWNS",
+                                  sentiment="Neutral")])
+
+    assert graph_store.save_graphs_to_neo4j([graph], articles=[{"link": url, "title": "t", "summary": ""}])
+    assert graph_store.primary_store.existing_articles([url]) == {url}
@@ -0,0 +1,95 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.http_cache import etag_matches, make_etag
+from app.main import app
+from app.core.readiness import readiness
+from app.models.schemas import Edge, GraphData, Node
+from app.services.graph_backends import primary_store
+from app.services.graph_layout import graph_layout
+from app.services.graph_store import save_graph_to_neo4j
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        deadline = time.monotonic() + 30
+        while not readiness.ready and time.monotonic() < deadline:
+            time.sleep(0.05)
+        save_graph_to_neo4j(GraphData(
+            nodes=[Node(id=f"http-{i}", type="Company") for i in range(40)],
+            edges=[Edge(source=f"http-{i}", target=f"http-{i + 1}", relationship="PARTNERS_WITH",
+                        sentiment="Neutral") for i in range(39)],
+        ))
+        yield client
+
+
+def test_etag_matches_encoded_and_weak_variants():
+    etag = make_etag(3, 7)
+    assert etag_matches(etag, etag) == etag
+    assert etag_matches(f'W/{etag[:-1]}-gzip"', etag)
+    assert etag_matches(f'"other", {etag[:-1]}-zstd"', etag) == f'{etag[:-1]}-zstd"'
+    assert etag_matches("*", etag) == etag
+    assert etag_matches(make_etag(3, 8), etag) is None
+    assert etag_matches(None, etag) is None
+
+
+def test_graph_revalidates_with_304(client):
+    response = client.get("/graph", headers={"accept-encoding": "identity"})
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-cache"
+
+    cached = client.get("/graph", headers={"if-none-match": response.headers["etag"]})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+
+def test_write_changes_the_etag(client):
+    etag = client.get("/graph").headers["etag"]
+    save_graph_to_neo4j(GraphData(nodes=[Node(id="http-new", type="Person")], edges=[
+        Edge(source="http-new", target="http-0", relationship="WORKS_AT", sentiment="Neutral")]))
+
+    response = client.get("/graph", headers={"if-none-match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_relayout_changes_the_etag(client):
+    graph_layout.refresh(compute=False)
+    etag = client.get("/graph", headers={"accept-encoding": "identity"}).headers["etag"]
+
+    # The layout owner (another process) saves a new run; this one picks it up on its next tick
+    rows = [dict(row, x=row["x"] + 1) for row in graph_layout.rows()] or [
+        {"id": "http-0", "x": 1.0, "y": 0.0, "z": 0.0, "degree": 1, "pagerank": 0.1, "community": 0}]
+    primary_store.save_layout(rows, 0, graph_layout.version + 1)
+    assert graph_layout.refresh(compute=False)
+
+    response = client.get("/graph", headers={"if-none-match": etag, "accept-encoding": "identity"})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["layout_version"] == graph_layout.version
+    node = next(n for n in response.json()["nodes"] if n["id"] == rows[0]["id"])
+    assert node["x"] == round(rows[0]["x"], 2)
+
+
+@pytest.mark.parametrize("encoding", ["zstd", "gzip"])
+def test_large_bodies_are_compressed(client, encoding):
+    plain = client.get("/graph", headers={"accept-encoding": "identity"})
+    response = client.get("/graph", headers={"accept-encoding": encoding})
+
+    assert response.headers["content-encoding"] == encoding
+    assert response.headers["etag"] == f'{plain.headers["etag"][:-1]}-{encoding}"'
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert response.num_bytes_downloaded < len(plain.content)
+    assert response.json() == plain.json()
+
+    # The compressed variant's validator revalidates too
+    cached = client.get("/graph", headers={"accept-encoding": encoding, "if-none-match": response.headers["etag"]})
+    assert cached.status_code == 304
+
+
+def test_small_bodies_are_not_compressed(client):
+    response = client.get("/", headers={"accept-encoding": "gzip"})
+    assert "content-encoding" not in response.headers
@@ -0,0 +1,102 @@
+import os
+
+from app.models.schemas import Edge, GraphData, Node
+from app.services.ingestion_log import IngestionLog, record_graph
+
+
+def _graph(i: int) -> GraphData:
+    return GraphData(
+        nodes=[Node(id=f"A{i}", type="Company"), Node(id=f"B{i}", type="Person")],
+        edges=[Edge(source=f"B{i}", target=f"A{i}", relationship="WORKS_AT", sentiment="Neutral")],
+    )
+
+
+def _append(log: IngestionLog, first: int, count: int):
+    for i in range(first, first + count):
+        log.append([_graph(i)], [{"url": f"https://example.com/{i}"}], [i])
+
+
+def _ids(log: IngestionLog):
+    return [record_graph(record).nodes[0].id for record in log.read()]
+
+
+def test_records_round_trip(tmp_path):
+    log = IngestionLog(str(tmp_path), segment_bytes=1 << 20, level=3)
+    _append(log, 0, 3)
+
+    records = list(log.read())
+    assert [r["seen_at"] for r in records] == [0, 1, 2]
+    assert record_graph(records[1]) == _graph(1)
+    assert log.stats()["records"] == 3
+
+
+def test_segments_roll_over(tmp_path):
+    log = IngestionLog(str(tmp_path), segment_bytes=1, level=3)
+    _append(log, 0, 3)
+
+    assert len(log.segments()) == 3
+    assert _ids(log) == ["A0", "A1", "A2"]
+
+
+def test_torn_tail_is_skipped(tmp_path):
+    log = IngestionLog(str(tmp_path), segment_bytes=1 << 20, level=3)
+    _append(log, 0, 50)
+    segment = log.segments()[-1]
+    os.truncate(segment, os.path.getsize(segment) - 5)
+
+    assert _ids(log) == [f"A{i}" for i in range(49)]
+
+
+def test_append_after_torn_tail(tmp_path):
+    log = IngestionLog(str(tmp_path), segment_bytes=1 << 20, level=3)
+    _append(log, 0, 50)
+    segment = log.segments()[-1]
+    os.truncate(segment, os.path.getsize(segment) - 5)
+
+    # A restarted writer (a new instance) appends to the same segment
+    _append(IngestionLog(str(tmp_path), segment_bytes=1 << 20, level=3), 50, 1)
+
+    assert log.segments() == [segment]
+    assert _ids(log) == [f"A{i}" for i in range(49)] + ["A50"]
+
+
+def test_torn_tail_without_committed_marker(tmp_path):
+    log = IngestionLog(str(tmp_path), segment_bytes=1 << 20, level=3)
+    _append(log, 0, 5)
+    segment = log.segments()[-1]
+    os.truncate(segment, os.path.getsize(segment) - 5)
+    os.remove(os.path.join(str(tmp_path), ".committed"))
+
+    _append(log, 5, 1)
+
+    assert _ids(log) == ["A0", "A1", "A2", "A3", "A5"]
+
+
+def test_corrupt_segment_does_not_hide_later_segments(tmp_path):
+    log = IngestionLog(str(tmp_path), segment_bytes=1, level=3)
+    _append(log, 0, 2)
+    # A torn frame followed by a good one in the first segment, as an
+    # append after a crash used to leave it
+    first = log.segments()[0]
+    with open(first, "rb") as f:
+        frame = f.read()
+    with open(first, "ab") as f:
+        f.write(frame[:-5] + frame)
+
+    assert _ids(log) == ["A0", "A1"]
+
+
+def test_append_after_corrupt_segment_starts_a_new_one(tmp_path):
+    log = IngestionLog(str(tmp_path), segment_bytes=1 << 20, level=3)
+    _append(log, 0, 1)
+    segment = log.segments()[0]
+    with open(segment, "rb") as f:
+        frame = f.read()
+    with open(segment, "ab") as f:
+        f.write(frame[:-5] + frame)
+    os.remove(os.path.join(str(tmp_path), ".committed"))
+
+    _append(log, 1, 1)
+
+    assert len(log.segments()) == 2
+    assert _ids(log) == ["A0", "A1"]
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services import ingest_worker
+from app.services.job_queue import DONE, FAILED, LEASED, PENDING, JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), max_attempts=3, retry_base_seconds=30, retry_max_seconds=60)
+    yield queue
+    queue.close()
+
+
+def _article(i: int) -> dict:
+    return {"link": f"https://example.com/{i}", "title": f"Article {i}", "summary": "..."}
+
+
+def _row(queue: JobQueue, job_id: int) -> dict:
+    status, attempts, last_error = queue._connect().execute(
+        "SELECT status, attempts, last_error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return {"status": status, "attempts": attempts, "last_error": last_error}
+
+
+def test_enqueue_is_idempotent(queue):
+    assert queue.enqueue([_article(1), _article(2)]) == 2
+    assert queue.enqueue([_article(2), _article(3)]) == 1
+    assert queue.stats()[PENDING] == 3
+
+
+def test_a_lease_is_exclusive_until_settled(queue):
+    queue.enqueue([_article(1)])
+    [job] = queue.lease("a", 10, lease_seconds=60)
+
+    assert queue.lease("b", 10, lease_seconds=60) == []
+    queue.complete([job])
+    assert queue.stats()[DONE] == 1
+
+
+def test_retry_backs_off(queue):
+    queue.enqueue([_article(1)])
+    [job] = queue.lease("a", 10, lease_seconds=60)
+    queue.retry([job], "extraction failed")
+
+    assert _row(queue, job.id) == {"status": PENDING, "attempts": 1, "last_error": "extraction failed"}
+    assert queue.lease("a", 10, lease_seconds=60) == []  # still backing off
+
+
+def test_retry_leaves_settled_jobs_alone(queue):
+    queue.enqueue([_article(1)])
+    [job] = queue.lease("a", 10, lease_seconds=60)
+    queue.complete([job])
+    queue.retry([job], "late failure")
+
+    assert _row(queue, job.id)["status"] == DONE
+
+
+def test_expired_leases_count_as_attempts(queue):
+    queue.enqueue([_article(1)])
+    [job] = queue.lease("a", 10, lease_seconds=-1)  # the worker died with it
+    assert job.attempts == 0
+
+    [again] = queue.lease("b", 10, lease_seconds=-1)
+    assert again.attempts == 1
+    [third] = queue.lease("c", 10, lease_seconds=-1)
+    assert third.attempts == 2
+
+    # Out of attempts: parked instead of handed out a fourth time
+    assert queue.lease("d", 10, lease_seconds=60) == []
+    assert _row(queue, job.id) == {"status": FAILED, "attempts": 3, "last_error": "lease expired"}
+
+
+def test_worker_survives_a_failing_batch(queue, monkeypatch):
+    async def explode(jobs, limiter):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(ingest_worker, "job_queue", queue)
+    monkeypatch.setattr(ingest_worker, "process_jobs", explode)
+    monkeypatch.setattr(settings, "WORKER_POLL_SECONDS", 0)
+    queue.enqueue([_article(1), _article(2)])
+
+    totals = asyncio.run(ingest_worker.run_worker(asyncio.Event(), once=True))
+
+    assert totals["failed"] == 2
+    stats = queue.stats()
+    assert stats[LEASED] == 0 and stats[PENDING] == 2
+    assert _row(queue, 1) == {"status": PENDING, "attempts": 1, "last_error": "RuntimeError: database is locked"}
@@ -0,0 +1,97 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from app.services.llm_gateway import BACKGROUND, INTERACTIVE, LLMGateway, SharedBudget
+
+
+@pytest.fixture
+def budgets(tmp_path):
+    """Two handles on one budget file, as two processes would have."""
+    path = str(tmp_path / "llm_budget.sqlite3")
+    first = SharedBudget(path, requests_per_minute=2, tokens_per_minute=10_000)
+    second = SharedBudget(path, requests_per_minute=2, tokens_per_minute=10_000)
+    second._owner = "other-process"
+    yield first, second
+    first.close()
+    second.close()
+
+
+def test_requests_budget_is_shared(budgets):
+    first, second = budgets
+    assert first.try_acquire(10, BACKGROUND, waiting_here=False) == 0
+    assert second.try_acquire(10, BACKGROUND, waiting_here=False) == 0
+    # Two requests per minute across both processes: the third waits ~30s for a refill
+    assert first.try_acquire(10, BACKGROUND, waiting_here=False) > 20
+
+
+def test_a_rate_limit_pauses_every_process(budgets):
+    first, second = budgets
+    first.pause(5)
+    assert 4 < second.try_acquire(10, INTERACTIVE, waiting_here=False) <= 5
+
+
+def test_background_yields_to_interactive_in_another_process(budgets):
+    first, second = budgets
+    first.try_acquire(10, BACKGROUND, waiting_here=False)
+    second.try_acquire(10, BACKGROUND, waiting_here=False)
+
+    # Out of budget: the chat call waits, and says so
+    assert first.try_acquire(10, INTERACTIVE, waiting_here=True) > 0
+    assert second.try_acquire(10, BACKGROUND, waiting_here=False) == pytest.approx(0.05)
+
+    first.done_waiting()
+    assert second.try_acquire(10, BACKGROUND, waiting_here=False) > 0.05
+
+
+def test_gateway_retries_through_the_shared_budget(tmp_path):
+    class Flaky:
+        calls = 0
+
+        async def ainvoke(self, inputs):
+            self.calls += 1
+            if self.calls == 1:
+                error = ConnectionError("reset")
+                error.status_code = 503
+                raise error
+            return "ok"
+
+    shared = SharedBudget(str(tmp_path / "budget.sqlite3"), requests_per_minute=100, tokens_per_minute=100_000)
+    gateway = LLMGateway(100, 100_000, max_retries=2, backoff_base=0.01, backoff_max=0.01, shared=shared)
+    runnable = Flaky()
+
+    assert asyncio.run(gateway.ainvoke(runnable, {"q": "hi"}, priority=INTERACTIVE)) == "ok"
+    assert runnable.calls == 2
+    shared.close()
+
+
+def test_a_locked_budget_does_not_block_the_event_loop(tmp_path):
+    path = str(tmp_path / "budget.sqlite3")
+    shared = SharedBudget(path, requests_per_minute=100, tokens_per_minute=100_000)
+    gateway = LLMGateway(100, 100_000, max_retries=0, backoff_base=0.01, backoff_max=0.01, shared=shared)
+    shared.done_waiting()  # creates the tables
+
+    # Another process sits on the write lock for a while
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticking = asyncio.create_task(ticker())
+        asyncio.get_running_loop().call_later(0.3, other.execute, "COMMIT")
+        await gateway.acquire(10, INTERACTIVE)
+        ticking.cancel()
+        return ticks
+
+    # The loop kept running while acquire() waited for the lock
+    assert asyncio.run(main()) > 10
+    other.close()
+    shared.close()
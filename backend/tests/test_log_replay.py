@@ -0,0 +1,32 @@
+from app.models.schemas import Edge, GraphData, Node
+from app.services import log_replay
+from app.services.graph_backends import primary_store
+from app.services.ingestion_log import IngestionLog
+
+
+def _graph(name: str) -> GraphData:
+    return GraphData(nodes=[Node(id=f"{name} Inc", type="Company"), Node(id=f"{name} Smith", type="Person")],
+                     edges=[Edge(source=f"{name} Smith", target=f"{name} Inc", relationship="WORKS_AT",
+                                 sentiment="Neutral")])
+
+
+def _mentions(name: str) -> int:
+    return next(row["mention_count"] for row in primary_store.edge_rows() if row["source"] == f"{name} Smith")
+
+
+def test_replaying_twice_does_not_count_article_less_graphs_again(tmp_path, monkeypatch):
+    log = IngestionLog(str(tmp_path / "log"), segment_bytes=1 << 20, level=3)
+    monkeypatch.setattr(log_replay, "ingestion_log", log)
+    monkeypatch.setattr(log_replay, "_REPLAYED_PATH", str(tmp_path / "log" / ".replayed"))
+    # Two identical article-less records (e.g. a script saved the same graph twice) and one with an article
+    log.append([_graph("Replay"), _graph("Replay")], [None, None], [1, 1])
+    log.append([_graph("Keyed")], [{"link": "https://example.com/replay-keyed", "title": "t"}], [2])
+
+    first = log_replay.replay()
+    assert first["saved"] == 3
+    assert _mentions("Replay") == 2
+
+    second = log_replay.replay()
+    assert second["saved"] == 0
+    assert second["skipped"] == 3
+    assert _mentions("Replay") == 2
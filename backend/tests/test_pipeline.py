@@ -0,0 +1,29 @@
+import asyncio
+
+from app.models.schemas import Edge, GraphData, Node
+from app.services import pipeline
+
+
+def _article(i: int) -> dict:
+    return {"link": f"https://example.com/pipeline-{i}", "title": f"Pipeline {i}", "summary": "..."}
+
+
+async def _extract(text, limiter=None):
+    name = text.split(".")[0]
+    return GraphData(nodes=[Node(id=name, type="Company"), Node(id=f"{name} Labs", type="Company")],
+                     edges=[Edge(source=name, target=f"{name} Labs", relationship="OWNS", sentiment="Neutral")])
+
+
+def test_saved_articles_are_counted(monkeypatch):
+    monkeypatch.setattr(pipeline, "aextract_graph_from_text", _extract)
+    stats = asyncio.run(pipeline.run_etl_pipeline([_article(1), _article(2)]))
+    assert stats["saved"] == 2
+    assert stats["save_failed"] == 0
+
+
+def test_a_failed_save_is_not_counted_as_saved(monkeypatch):
+    monkeypatch.setattr(pipeline, "aextract_graph_from_text", _extract)
+    monkeypatch.setattr(pipeline, "save_graphs_to_neo4j", lambda *args, **kwargs: False)
+    stats = asyncio.run(pipeline.run_etl_pipeline([_article(3), _article(4)]))
+    assert stats["saved"] == 0
+    assert stats["save_failed"] == 2
@@ -0,0 +1,76 @@
+from app.core.temporal import now_ts
+from app.services import graph_cache
+from app.services.graph_backends import InMemoryGraphStore
+from app.services.graph_cache import GraphSnapshot
+
+
+def _write(store: InMemoryGraphStore, prefix: str, ingested_at: int):
+    # What a worker process writes: entities, one relationship, the Article
+    store.upsert(
+        {"Company": [{"id": f"{prefix}-a", "first_seen": ingested_at, "last_seen": ingested_at},
+                     {"id": f"{prefix}-b", "first_seen": ingested_at, "last_seen": ingested_at},
+                     {"id": f"{prefix}-lonely", "first_seen": ingested_at, "last_seen": ingested_at}]},
+        {"PARTNERS_WITH": [{"source_id": f"{prefix}-a", "target_id": f"{prefix}-b", "sentiment": "Neutral",
+                            "first_seen": ingested_at, "last_seen": ingested_at}]},
+        articles=[{"url": f"https://example.com/{prefix}", "title": prefix, "content_hash": prefix,
+                   "published": ingested_at, "ingested_at": ingested_at,
+                   "entities": [f"{prefix}-a", f"{prefix}-lonely"]}],
+    )
+
+
+def test_warm_from_copies_nodes_edges_and_articles():
+    primary, replica = InMemoryGraphStore(), InMemoryGraphStore()
+    _write(primary, "warm", now_ts())
+
+    replica.warm_from(primary)
+
+    assert sorted(row["id"] for row in replica.node_rows()) == ["warm-a", "warm-b", "warm-lonely"]
+    assert len(replica.edge_rows()) == 1
+    assert [s["url"] for s in replica.article_sources(["warm-lonely"], 5)] == ["https://example.com/warm"]
+
+
+def test_resync_brings_other_processes_writes_into_the_replica(monkeypatch):
+    primary, replica = InMemoryGraphStore(), InMemoryGraphStore()
+    monkeypatch.setattr(graph_cache, "primary_store", primary)
+    monkeypatch.setattr(graph_cache, "read_store", replica)
+    monkeypatch.setattr(graph_cache, "has_read_replica", lambda: True)
+    snapshot = GraphSnapshot(ttl_seconds=3600)
+
+    _write(primary, "old", now_ts() - 7200)
+    snapshot.resync()
+    _write(primary, "new", now_ts())
+    snapshot.resync()
+
+    ids = {row["id"] for row in replica.node_rows()}
+    assert {"old-lonely", "new-a", "new-b", "new-lonely"} <= ids
+    assert replica.existing_articles(["https://example.com/old", "https://example.com/new"]) == {
+        "https://example.com/old", "https://example.com/new"}
+    assert "new-a" in snapshot.nodes
+
+
+def test_a_resync_overlapping_a_write_does_not_roll_it_back(monkeypatch):
+    primary, replica = InMemoryGraphStore(), InMemoryGraphStore()
+    monkeypatch.setattr(graph_cache, "primary_store", primary)
+    monkeypatch.setattr(graph_cache, "read_store", replica)
+    monkeypatch.setattr(graph_cache, "has_read_replica", lambda: True)
+    snapshot = GraphSnapshot(ttl_seconds=3600)
+    ts = now_ts()
+    _write(primary, "race", ts)
+    assert snapshot.resync()
+
+    fetch = primary.edge_rows
+
+    def edge_rows_then_write():
+        rows = fetch()
+        # This process writes while the re-sync's rows are in flight
+        with snapshot.writing():
+            snapshot.apply({}, {"PARTNERS_WITH": [{"source_id": "race-a", "target_id": "race-b",
+                                                   "sentiment": "Positive", "first_seen": ts, "last_seen": ts,
+                                                   "mentions": 1}]})
+        return rows
+
+    monkeypatch.setattr(primary, "edge_rows", edge_rows_then_write)
+    version = snapshot.version
+    assert not snapshot.resync()
+    assert snapshot.version == version + 1
+    assert snapshot.links[("race-a", "PARTNERS_WITH", "race-b")]["sentiment"] == "Positive"
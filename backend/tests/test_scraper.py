@@ -0,0 +1,62 @@
+import feedparser
+import pytest
+
+from app.services.scraper import FeedPoller
+
+FEED = "https://example.com/feed.xml"
+
+
+class _Feed(dict):
+    def __init__(self, entries, etag, status=200):
+        super().__init__(status=status, etag=etag)
+        self.entries = entries
+
+
+def _entry(i: int) -> dict:
+    return {"id": f"guid-{i}", "link": f"https://example.com/{i}", "title": f"Entry {i}",
+            "summary": "<p>...</p>", "published_parsed": (2025, 1, i, 0, 0, 0, 0, 0, 0)}
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    served = {"entries": [], "etag": "v1", "requests": []}
+
+    def parse(url, etag=None, modified=None):
+        served["requests"].append(etag)
+        if etag == served["etag"]:
+            return _Feed([], etag, status=304)
+        return _Feed(list(served["entries"]), served["etag"])
+
+    monkeypatch.setattr(feedparser, "parse", parse)
+    return served
+
+
+def _poller(tmp_path) -> FeedPoller:
+    return FeedPoller([FEED], str(tmp_path / "feed_state.json"), seen_limit=100)
+
+
+def test_uncommitted_articles_come_back(serve, tmp_path):
+    serve["entries"] = [_entry(3), _entry(2), _entry(1)]
+    poller = _poller(tmp_path)
+
+    articles = list(poller.poll())
+    assert [a["guid"] for a in articles] == ["guid-1", "guid-2", "guid-3"]
+    # guid-2 failed to save: the others are committed
+    poller.commit([articles[0], articles[2]])
+
+    # A fresh process re-reads the cursor from disk
+    again = list(_poller(tmp_path).poll())
+    assert [a["guid"] for a in again] == ["guid-2"]
+
+
+def test_the_etag_only_moves_once_a_fetch_is_fully_committed(serve, tmp_path):
+    serve["entries"] = [_entry(1)]
+    poller = _poller(tmp_path)
+
+    articles = list(poller.poll())
+    assert list(poller.poll()) == articles  # not committed: fetched in full again
+    assert serve["requests"] == [None, None]
+
+    poller.commit(articles)
+    assert list(poller.poll()) == []
+    assert serve["requests"][-1] == "v1"
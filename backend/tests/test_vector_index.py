@@ -0,0 +1,38 @@
+import numpy as np
+
+from app.services.vector_index import VectorIndex, embed
+
+
+def test_embeddings_are_unit_length_and_deterministic():
+    vectors = embed(["OpenAI partners with Microsoft", "", "Nvidia"], 64)
+    assert np.allclose(np.linalg.norm(vectors[[0, 2]], axis=1), 1.0)
+    assert not vectors[1].any()
+    assert np.array_equal(vectors, embed(["OpenAI partners with Microsoft", "", "Nvidia"], 64))
+
+
+def test_empty_index_finds_nothing():
+    index = VectorIndex(dim=64)
+    assert index.search(["anything"], 5) == [[]]
+    assert index.retrieve_entities("anything", 5, 0.0, 3) == []
+
+
+def test_adding_is_idempotent_and_grows_past_the_initial_capacity():
+    index = VectorIndex(dim=64, initial_capacity=2)
+    index.add([f"Company {i}" for i in range(10)])
+    index.add(["Company 3", "Company 3"])
+    assert len(index) == 10
+    assert index.search(["Company 7"], 1)[0][0][1][1] == "Company 7"
+
+
+def test_retrieves_entities_from_names_and_facts():
+    index = VectorIndex(dim=512)
+    index.add(["Nvidia", "Microsoft", "Sam Altman"], [("OpenAI", "PARTNERS_WITH", "Microsoft")])
+
+    assert index.retrieve_entities("news about nvidia", 10, 0.3, 3)[0] == "Nvidia"
+    assert set(index.retrieve_entities("who partners with openai", 10, 0.3, 3)) >= {"OpenAI", "Microsoft"}
+
+
+def test_a_version_in_the_question_rules_out_other_versions():
+    index = VectorIndex(dim=512)
+    index.add(["Llama 3", "Llama 4"])
+    assert index.retrieve_entities("What is Llama 4?", 10, 0.3, 3) == ["Llama 4"]
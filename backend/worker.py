@@ -0,0 +1,99 @@
+# backend/worker.py
+"""
+Ingestion worker: drains the article job queue (data/jobs.sqlite3) that the
+scheduler and /trigger-scrape-secure-xyz fill.
+
+    python worker.py                 # one worker, runs until Ctrl+C / SIGTERM
+    python worker.py --processes 4   # four worker processes
+    python worker.py --once          # drain what's runnable, then exit
+    python worker.py --enqueue       # poll the feeds into the queue first
+    python worker.py --requeue-failed
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import signal
+import sys
+
+from app.core.config import settings
+from app.core.database import neo4j_conn
+from app.core.metrics import configure_logging
+from app.services.entity_resolver import entity_resolver
+from app.services.graph_backends import uses_neo4j, warm_read_replica
+from app.services.ingest_worker import enqueue_latest_news, run_worker
+from app.services.job_queue import job_queue
+
+logger = logging.getLogger("worker")
+
+
+async def _main(once: bool):
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            # Finish the current batch, then exit; unfinished leases expire anyway
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+
+    neo4j_conn.connect()
+    warm_read_replica()
+    entity_resolver.load_from_graph()
+    try:
+        await run_worker(stop, once=once)
+    finally:
+        await neo4j_conn.aclose()
+
+
+def _run_process(once: bool):
+    configure_logging()
+    asyncio.run(_main(once))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run ingestion worker process(es).")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--once", action="store_true", help="Exit once the queue has nothing runnable")
+    parser.add_argument("--enqueue", action="store_true", help="Poll the feeds into the queue before starting")
+    parser.add_argument("--requeue-failed", action="store_true", help="Retry jobs that ran out of attempts")
+    args = parser.parse_args()
+
+    configure_logging()
+    if not uses_neo4j():
+        # Each process would write to its own in-memory graph
+        sys.exit("❌ Workers need GRAPH_BACKEND=neo4j.")
+
+    if not settings.INGEST_QUEUE_ENABLED:
+        logger.warning("⚠️ INGEST_QUEUE_ENABLED is off: the web process ingests inline and queues nothing new.")
+
+    if args.requeue_failed:
+        logger.info(f"🔁 Requeued {job_queue.requeue_failed()} failed job(s).")
+    if args.enqueue:
+        enqueue_latest_news()
+    # Each process opens its own SQLite connection and Neo4j driver
+    # (--enqueue may have opened both here; forked children must not share them)
+    job_queue.close()
+    neo4j_conn.close()
+
+    if args.processes <= 1:
+        _run_process(args.once)
+        return
+
+    processes = [
+        multiprocessing.Process(target=_run_process, args=(args.once,), name=f"worker-{i}")
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # Children got the SIGINT too and are finishing their batch
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,33 @@
 import { useState, useRef, useEffect } from "react"; // <--- Added useRef, useEffect
-import axios from "axios";
+
+const API_URL = "http://72.61.232.29:8000";
+
+// Parses a Server-Sent Events body and calls onEvent(event, data) per message
+async function readEventStream(body, onEvent) {
+  const reader = body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+      const message = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = "message";
+      let data = "";
+      for (const line of message.split("\n")) {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      }
+      if (data) onEvent(event, JSON.parse(data));
+    }
+  }
+}
 
 export default function ChatOverlay({ onFocusNode }) {
   const [query, setQuery] = useState("");
@@ -32,18 +60,31 @@ export default function ChatOverlay({ onFocusNode }) {
         role: msg.role === "user" ? "human" : "ai", // LangChain prefers 'human'/'ai'
         text: msg.text,
       }));
-      const res = await axios.post("http://72.61.232.29:8000/chat", {
-        question: query,
-        history: historyPayload,
+
+      // Streamed answer: tokens are appended to this message as they arrive
+      setMessages((prev) => [...prev, { role: "system", text: "" }]);
+      const appendToAnswer = (text) =>
+        setMessages((prev) => {
+          const last = prev[prev.length - 1];
+          return [...prev.slice(0, -1), { ...last, text: last.text + text }];
+        });
+
+      const res = await fetch(`${API_URL}/chat/stream`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ question: query, history: historyPayload }),
       });
+      if (!res.ok || !res.body) throw new Error(`HTTP ${res.status}`);
 
-      setMessages((prev) => [
-        ...prev,
-        { role: "system", text: res.data.answer },
-      ]);
+      let result = null;
+      await readEventStream(res.body, (event, data) => {
+        if (event === "token") appendToAnswer(data.text);
+        if (event === "done") result = data;
+        if (event === "error") throw new Error(data.message);
+      });
 
       // Camera Focus Logic
-      let entitiesRaw = res.data.entity;
+      let entitiesRaw = result?.entity;
       if (entitiesRaw) {
         let targetNode = entitiesRaw
           .replace(/[\[\]'"]/g, "")
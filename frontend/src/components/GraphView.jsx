@@ -2,28 +2,111 @@ import { useEffect, useState, useRef, useCallback } from "react";
 import ForceGraph3D from "react-force-graph-3d";
 import axios from "axios";
 
+const API_URL = "http://72.61.232.29:8000";
+const POLL_INTERVAL_MS = 30000;
+
+const linkKey = (l) => {
+  // After the force engine runs, source/target become node objects
+  const source = typeof l.source === "object" ? l.source.id : l.source;
+  const target = typeof l.target === "object" ? l.target.id : l.target;
+  return `${source}|${l.relationship}|${target}`;
+};
+
+// The backend computes positions (x/y/z); pin nodes there so the
+// browser doesn't have to run the force simulation
+const placeNode = (n) =>
+  n.x === undefined ? { ...n } : { ...n, fx: n.x, fy: n.y, fz: n.z };
+
 // 1. WE ADDED { focusNode } HERE so the component can receive the signal
 export default function GraphView({ focusNode }) {
   const fgRef = useRef();
   const [graphData, setGraphData] = useState({ nodes: [], links: [] });
+  const versionRef = useRef(null);
+  const layoutVersionRef = useRef(null);
+
+  // Follows next_cursor until the whole (or delta) graph has been read
+  const fetchPages = useCallback(async (since) => {
+    const nodes = [];
+    const links = [];
+    let cursor = 0;
+    let version = null;
+    let layoutVersion = null;
+
+    while (cursor !== null) {
+      const params = { cursor };
+      if (since !== null) params.since = since;
+      const res = await axios.get(`${API_URL}/graph`, { params });
+      nodes.push(...res.data.nodes);
+      links.push(...res.data.links);
+      version = res.data.version;
+      layoutVersion = res.data.layout_version;
+      cursor = res.data.next_cursor;
+    }
+    return { nodes, links, version, layoutVersion };
+  }, []);
 
   const fetchGraphData = useCallback(async () => {
     try {
-      const res = await axios.get("http://72.61.232.29:8000/graph");
+      const { nodes, links, version, layoutVersion } = await fetchPages(null);
+      versionRef.current = version;
+      layoutVersionRef.current = layoutVersion;
       setGraphData({
-         nodes: res.data.nodes.map(n => ({...n})),
-         links: res.data.links.map(l => ({...l}))
+         nodes: nodes.map(placeNode),
+         links: links.map(l => ({...l}))
       });
     } catch (error) {
       console.error("Failed to fetch graph:", error);
     }
-  }, []);
+  }, [fetchPages]);
+
+  // Only asks for what changed since our version, and leaves the
+  // graph untouched (no jitter) when nothing did
+  const pollGraphDelta = useCallback(async () => {
+    if (versionRef.current === null) return;
+    try {
+      const delta = await fetchPages(versionRef.current);
+      // A layout run moved every node: the delta only has the changed ones,
+      // so reload the whole graph with its new positions
+      if (delta.layoutVersion !== layoutVersionRef.current) {
+        await fetchGraphData();
+        return;
+      }
+      versionRef.current = delta.version;
+      if (!delta.nodes.length && !delta.links.length) return;
+
+      setGraphData((prev) => {
+        const changedNodes = new Map(delta.nodes.map((n) => [n.id, n]));
+        const nodes = prev.nodes.map((n) => {
+          const updated = changedNodes.get(n.id);
+          if (!updated) return n;
+          changedNodes.delete(n.id);
+          return placeNode({ ...n, ...updated });
+        });
 
-  // 2. FETCH ONCE. REMOVED THE INTERVAL.
-  // This stops the "Jitter" and lets you interact with the graph.
+        const changedLinks = new Map(delta.links.map((l) => [linkKey(l), l]));
+        const links = prev.links.map((l) => {
+          const updated = changedLinks.get(linkKey(l));
+          if (!updated) return l;
+          changedLinks.delete(linkKey(l));
+          return { ...l, sentiment: updated.sentiment };
+        });
+
+        return {
+          nodes: [...nodes, ...[...changedNodes.values()].map(placeNode)],
+          links: [...links, ...[...changedLinks.values()].map((l) => ({ ...l }))],
+        };
+      });
+    } catch (error) {
+      console.error("Failed to poll graph:", error);
+    }
+  }, [fetchPages, fetchGraphData]);
+
+  // 2. FETCH ONCE, THEN POLL FOR DELTAS ONLY.
   useEffect(() => {
     fetchGraphData();
-  }, [fetchGraphData]);
+    const interval = setInterval(pollGraphDelta, POLL_INTERVAL_MS);
+    return () => clearInterval(interval);
+  }, [fetchGraphData, pollGraphDelta]);
 
   // 3. CAMERA ZOOM LOGIC (Uncommented and Fixed)
     useEffect(() => {
@@ -51,6 +134,9 @@ export default function GraphView({ focusNode }) {
     }
   }, [focusNode, graphData]);
 
+  // Only simulate when some node came without a server position
+  const needsSimulation = graphData.nodes.some((n) => n.fx === undefined);
+
   return (
     <div className="fixed inset-0 z-0">
       <ForceGraph3D
@@ -58,6 +144,8 @@ export default function GraphView({ focusNode }) {
         graphData={graphData}
         nodeLabel="id"
         nodeAutoColorBy="group"
+        // Size by server-computed PageRank (relative to an average node)
+        nodeVal={(n) => (n.pagerank ? 1 + n.pagerank * graphData.nodes.length : 1)}
         
         // Visual Styling
         nodeOpacity={0.9}
@@ -80,7 +168,7 @@ export default function GraphView({ focusNode }) {
         nodeRelSize={6}
         
         // 4. CHANGED: Wait longer for physics to settle, but don't auto-zoom-out if we are focused
-        cooldownTicks={100}
+        cooldownTicks={needsSimulation ? 100 : 0}
         onEngineStop={() => {
             // Only zoom to fit if we haven't focused on a specific node yet
             if (!focusNode) {